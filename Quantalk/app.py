@@ -4,20 +4,28 @@ import plotly.graph_objects as go
 import plotly.express as px
 import requests
 import os
+import time
 import finnhub
 from dotenv import load_dotenv
 import pandas as pd
-from datetime import datetime, timedelta
 
 # =========================
 # utils 불러오기
 # =========================
 try:
     load_dotenv()
-    from utils.data_fetcher import get_index_data, get_stock_detail
+    from utils.data_fetcher import (get_index_data, get_quote, get_history, get_fundamentals, build_stock_detail,
+                                    get_universe_data, load_sp500_constituents, get_economic_events, format_economic_calendar)
+    from utils.async_fetcher import run_in_thread, run_sections, get_market_news_with_sentiment_async
     from utils.indicators import calculate_indicators, interpret_indicator
-    from utils.sentiment import get_wordcloud_base64, get_market_news_with_sentiment
-    from utils.chatbot import chatbot_response
+    from utils.sentiment import get_wordcloud_base64, wordcloud_rendering, get_market_news_with_sentiment
+    from utils.chatbot import chatbot_response_stream
+    from utils.semantic_cache import prompt_ticker
+    from utils.context_builder import get_ticker_context
+    from utils.prompt_budget import build_prompt
+    from utils.cache import shared_cache
+    from utils.snapshot import start_snapshot_scheduler, load_snapshot, snapshot_age, SNAPSHOT_INTERVAL
+    from utils.screener import load_indicator_table, refresh_indicator_table, screen, EXAMPLE_QUERY
     from utils.financial_analysis import run_full_analysis_pipeline 
 except Exception as e:
     st.error(f"utils 오류: {e}")
@@ -79,7 +87,11 @@ if st.sidebar.button("종목 분석하기", type="primary"):
         st.session_state.ticker = ticker_input
         st.rerun()
 
-if st.session_state.page == "detail":
+if st.sidebar.button("지표 스크리너"):
+    st.session_state.page = "screener"
+    st.rerun()
+
+if st.session_state.page != "main":
     if st.sidebar.button("메인으로 돌아가기", type="secondary"):
         st.session_state.page = "main"
         st.session_state.ticker = ""
@@ -89,13 +101,12 @@ if st.session_state.page == "detail":
 # S&P500 티커 로드
 # =========================
 @st.cache_data(ttl=86400)
+@shared_cache(ttl=86400)
+def get_sp500_constituents():
+    return load_sp500_constituents()
+
 def get_sp500_tickers():
-    try:
-        url = "https://raw.githubusercontent.com/datasets/s-and-p-500-companies/main/data/constituents.csv"
-        df = pd.read_csv(url)
-        return df['Symbol'].str.replace('.', '-', regex=False).tolist()[:150]
-    except:
-        return ["AAPL","MSFT","NVDA","GOOGL","AMZN","META","TSLA","BRK-B","LLY","JPM"]
+    return list(get_sp500_constituents())
 
 # =========================
 # 경제 일정
@@ -103,87 +114,48 @@ def get_sp500_tickers():
 finnhub_client = finnhub.Client(api_key=os.getenv("FINNHUB_API_KEY"))
 
 @st.cache_data(ttl=3600)
+@shared_cache(ttl=3600)
 def get_economic_calendar():
-    api_key = os.getenv("FINNHUB_API_KEY")
-    if not api_key:
-        st.error("Finnhub API 키가 설정되지 않았습니다.")
-        return pd.DataFrame()
+    # (일정 DataFrame, 오류 메시지) — 화면 출력은 호출하는 쪽에서 (스레드에서도 호출되므로)
+    if not os.getenv("FINNHUB_API_KEY"):
+        return pd.DataFrame(), "Finnhub API 키가 설정되지 않았습니다."
 
     try:
-        # 1. 날짜 계산
-        today = datetime.today()
-        start_of_week = today - timedelta(days=today.weekday())
-        end_of_week = start_of_week + timedelta(days=13)
-
-        from_date = start_of_week.strftime("%Y-%m-%d")
-        to_date = end_of_week.strftime("%Y-%m-%d")
-
-        # 2. requests를 사용하여 직접 API 호출 (라이브러리 버전 문제 해결)
-        url = "https://finnhub.io/api/v1/calendar/economic"
-        params = {
-            "from": from_date,
-            "to": to_date,
-            "token": api_key
-        }
-        
-        response = requests.get(url, params=params)
-        
-        # 3. 응답 처리
-        if response.status_code != 200:
-             # 에러 발생 시 처리
-            if response.status_code == 403:
-                st.error("API 접근 거부 (403): 무료 키 사용 제한.")
-            else:
-                st.error(f"API 오류: {response.status_code} - {response.text}")
-            return pd.DataFrame()
-
-        data = response.json()
-        calendar = data.get("economicCalendar", [])
-        
-        if not calendar:
-            st.warning("수신된 경제 일정 데이터가 없습니다.")
-            return pd.DataFrame()
-
-        # 4. 데이터 가공
-        country_map = {
-            "US": "미국", "EU": "유로존", "CN": "중국", "JP": "일본", "GB": "영국",
-            "CA": "캐나다", "AU": "호주", "DE": "독일", "FR": "프랑스", "KR": "한국"
-        }
-
-        events = []
-        for item in sorted(calendar, key=lambda x: x.get("date", ""))[:15]:
-            date_str = item.get("date", "")[:10].replace("-", "/")
-            country_code = item.get("country", "기타")
-            country = country_map.get(country_code, country_code)
-            event = item.get("event", "제목 없음")
-            impact = item.get("impact", "").lower()
-            importance_icon = "★★★" if impact == "high" else "★★" if impact in ["medium", "moderate"] else "★"
-
-            events.append({
-                "날짜": date_str,
-                "국가": country,
-                "지표": event,
-                "중요도": importance_icon
-            })
-
-        return pd.DataFrame(events)
-
+        calendar = get_economic_events()
+    except requests.HTTPError as e:
+        if e.response.status_code == 403:
+            return pd.DataFrame(), "API 접근 거부 (403): 무료 키 사용 제한."
+        return pd.DataFrame(), f"API 오류: {e.response.status_code} - {e.response.text}"
     except Exception as e:
-        st.error(f"경제 일정 로드 중 시스템 오류: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), f"경제 일정 로드 중 시스템 오류: {e}"
+
+    if not calendar:
+        return pd.DataFrame(), "수신된 경제 일정 데이터가 없습니다."
+    return format_economic_calendar(calendar), None
 
 # =========================
 # 데이터 함수들
 # =========================
+# 시세 / 히스토리 / 펀더멘털은 캐시 수명을 따로 둔다 (t.info 는 하루 한 번만)
+# st.cache_data(프로세스 내) 뒤에 shared_cache(워커 간 공유, 만료 시 이전 값 반환 + 백그라운드 갱신)
 @st.cache_data(ttl=60)
+@shared_cache(ttl=60)
 def fetch_quote(sym): return get_index_data(sym) or {}
+@st.cache_data(ttl=60)
+@shared_cache(ttl=60)
+def fetch_stock_quote(ticker): return get_quote(ticker) or {}
 @st.cache_data(ttl=180)
-def fetch_detail(ticker): return get_stock_detail(ticker) or {}
+@shared_cache(ttl=180)
+def fetch_history(ticker): return get_history(ticker)
+@st.cache_data(ttl=86400)
+@shared_cache(ttl=86400)
+def fetch_fundamentals(ticker): return get_fundamentals(ticker) or {}
+
+def fetch_detail(ticker):
+    return build_stock_detail(fetch_history(ticker), fetch_stock_quote(ticker), fetch_fundamentals(ticker)) or {}
 
 def fetch_series(ticker):
-    data = fetch_detail(ticker)
-    if not data or "history" not in data: return None
-    df = data["history"]
+    df = fetch_history(ticker)
     if df is None or df.empty or "Close" not in df.columns: return None
     return df["Close"].tail(60)
 
@@ -198,22 +170,16 @@ def chg_class(x):
     if x is None or pd.isna(x): return "kpi-flat"
     return "kpi-pos" if x > 0.05 else "kpi-neg" if x < -0.05 else "kpi-flat"
 
-@st.cache_data(ttl=180)
-def get_market_data(tickers):
-    rows = []
-    for t in tickers[:150]:
-        try:
-            d = fetch_detail(t)
-            if not d: continue
-            info = d.get("info",{})
-            hist = d.get("history", pd.DataFrame())
-            if hist.empty: continue
-            chg = info.get("change_pct") or 0
-            mcap = info.get("marketCap") or hist["Close"].iloc[-1]*1e6
-            sector = info.get("sector") or "기타"
-            rows.append({"sector": sector, "ticker": t, "size": float(mcap), "chg": float(chg)})
-        except: continue
-    return pd.DataFrame(rows) if rows else pd.DataFrame()
+@st.cache_data(ttl=180, show_spinner="S&P500 전 종목 불러오는 중...")
+def get_market_data(constituents):
+    # 전 종목 일괄 다운로드 + 시총 병렬 조회 (실패한 종목은 빼고 부분 결과 반환)
+    bar = st.progress(0.0, text="히트맵 데이터 로딩 중...")
+    def on_progress(done, total):
+        bar.progress(done / total, text=f"히트맵 데이터 로딩 중... ({done}/{total})")
+    try:
+        return get_universe_data(list(constituents), sectors=constituents, progress=on_progress)
+    finally:
+        bar.empty()
 
 def treemap_fig(df):
     if df.empty: return go.Figure().update_layout(height=500, paper_bgcolor="rgba(0,0,0,0)")
@@ -225,8 +191,42 @@ def treemap_fig(df):
 # =========================
 # 메인 페이지
 # =========================
+KPI_SYMBOLS = [("S&P 500", "^GSPC"), ("NASDAQ", "^IXIC")]
+SNAPSHOT_MAX_AGE = 5 * SNAPSHOT_INTERVAL  # 이보다 오래된 스냅샷은 무시하고 직접 불러온다
+
+@st.cache_resource
+def snapshot_scheduler():
+    # 프로세스당 하나 — 주기적으로 시장 스냅샷 파일을 다시 만든다
+    return start_snapshot_scheduler()
+
+def sections_from_snapshot(snap):
+    sections = {"calendar": (snap["calendar"], None), "news": snap["news"], "heatmap": snap["heatmap"]}
+    for _, sym in KPI_SYMBOLS:
+        idx = snap["indices"].get(sym) or {}
+        sections[f"quote:{sym}"] = idx
+        sections[f"series:{sym}"] = pd.Series(idx.get("series", []), dtype=float)
+    return sections
+
+def load_main_sections():
+    # 백그라운드 스냅샷이 있으면 그대로 렌더링 (메모리 맵 읽기만)
+    snapshot_scheduler()
+    snap = load_snapshot()
+    if snap is not None and snapshot_age() < SNAPSHOT_MAX_AGE:
+        return sections_from_snapshot(snap)
+
+    # 스냅샷이 없거나 오래됐으면: 서로 독립적인 섹션(경제 일정 · KPI · 속보)을 한 번에 병렬로 불러온다
+    sections = {
+        "calendar": run_in_thread(get_economic_calendar),
+        "news": get_market_news_with_sentiment_async(limit=8),
+    }
+    for _, sym in KPI_SYMBOLS:
+        sections[f"quote:{sym}"] = run_in_thread(fetch_quote, sym)
+        sections[f"series:{sym}"] = run_in_thread(fetch_series, sym)
+    return run_sections(sections)
+
 def main_page():
     st.title("실시간 시장 대시보드")
+    sections = load_main_sections()
 
     left, center, right = st.columns([0.35, 0.40, 0.25], gap="small")
 
@@ -252,9 +252,9 @@ def main_page():
                     st.markdown(prompt)
             with chat_container:
                 with st.chat_message("assistant"):
-                    with st.spinner("생각 중..."):
-                        response = chatbot_response(prompt)
-                    st.markdown(response)
+                    # 질문에 나온 종목(없으면 시장 질문 "")을 캐시 범위로 써서 다른 종목의 답변이 섞이지 않게 한다
+                    ticker = prompt_ticker(prompt, get_sp500_tickers())
+                    response = st.write_stream(chatbot_response_stream(prompt, ticker=ticker))
             st.session_state.main_chat.append({"role": "assistant", "content": response})
             st.rerun()
         st.markdown("</div>", unsafe_allow_html=True)
@@ -262,7 +262,9 @@ def main_page():
         # 경제 일정 (챗봇 아래 배치)
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("금주 주요 경제 일정")
-        events = get_economic_calendar()
+        events, err = sections["calendar"] or (pd.DataFrame(), "경제 일정 응답 시간 초과")
+        if err:
+            st.error(err)
         # [수정] use_container_width -> width='stretch'
         st.dataframe(events, hide_index=True, width='stretch')
         st.markdown("</div>", unsafe_allow_html=True)
@@ -273,17 +275,12 @@ def main_page():
         r1c1, r1c2 = st.columns(2)
         r2c1, r2c2 = st.columns(2)
 
-        kpis = [
-            ("S&P 500", "^GSPC", r1c1),
-            ("NASDAQ", "^IXIC", r1c2)
-        ]
-
-        for name, sym, col in kpis:
-            q = fetch_quote(sym)
+        for (name, sym), col in zip(KPI_SYMBOLS, [r1c1, r1c2]):
+            q = sections[f"quote:{sym}"] or {}
             price = q.get("price")
             chg = q.get("change")
             cls = chg_class(chg)
-            series = fetch_series(sym)
+            series = sections[f"series:{sym}"]
             if series is None or series.empty:
                 series = fetch_series(sym.replace("^", "") if "^" in sym else sym)
 
@@ -304,8 +301,9 @@ def main_page():
         # 히트맵
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("S&P500 Heatmap")
-        sp500 = get_sp500_tickers()
-        df_heat = get_market_data(sp500)
+        df_heat = sections.get("heatmap")
+        if df_heat is None:
+            df_heat = get_market_data(get_sp500_constituents())
         # [수정] use_container_width -> width='stretch'
         st.plotly_chart(treemap_fig(df_heat), width='stretch')
         st.markdown("</div>", unsafe_allow_html=True)
@@ -324,7 +322,7 @@ def main_page():
     with right:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("실시간 속보")
-        news = get_market_news_with_sentiment(limit=8)
+        news = sections["news"] or []
         for n in news:
             sentiment_score = n.get('sentiment', 0) or 0
             if sentiment_score > 0.05:
@@ -340,6 +338,17 @@ def main_page():
 # =========================
 # 상세 페이지 (수정됨)
 # =========================
+@st.fragment
+def wordcloud_section(ticker):
+    # 워커가 그리는 동안 페이지는 먼저 보여주고, 이 영역만 다시 그린다
+    wc = get_wordcloud_base64(ticker)
+    if wc:
+        st.image(wc, width='stretch')
+    elif wordcloud_rendering(ticker):
+        st.caption("키워드 클라우드 생성 중...")
+        time.sleep(1)
+        st.rerun(scope="fragment")
+
 def detail_page(ticker):
     st.title(f"{ticker} · 종목 분석")
     if st.button("메인으로 돌아가기"):
@@ -347,7 +356,7 @@ def detail_page(ticker):
         st.session_state.ticker = ""
         st.rerun()
 
-    data = get_stock_detail(ticker)
+    data = fetch_detail(ticker)
     if not data:
         st.error("데이터를 불러올 수 없습니다")
         st.stop()
@@ -432,19 +441,55 @@ def detail_page(ticker):
             icon = "⚪"
         st.markdown(f"<span style='font-size:24px'>{icon}</span> **{n.get('title','')}**", unsafe_allow_html=True)
 
-    wc = get_wordcloud_base64(ticker)
-    # [수정] use_column_width -> width='stretch'
-    if wc: st.image(wc, width='stretch')
+    wordcloud_section(ticker)
 
     st.subheader(f"{ticker} 전용 AI 비서")
     if prompt := st.chat_input(f"{ticker}에 대해 물어보세요"):
         with st.chat_message("user"): st.write(prompt)
-        with st.chat_message("assistant"): st.write(chatbot_response(f"종목: {ticker}\n{prompt}"))
+        # 페이지를 그리며 채운 로컬 데이터(봉 · 지표 · 뉴스)로 만든 종목 컨텍스트를 붙인다
+        full, _ = build_prompt(prompt, [get_ticker_context(ticker)], instructions=f"종목: {ticker}")
+        with st.chat_message("assistant"): st.write_stream(chatbot_response_stream(full, ticker=ticker, question=prompt))
+
+# =========================
+# 지표 스크리너
+# =========================
+def screener_page():
+    st.title("지표 스크리너")
+    st.caption("예: RSI < 30 and GoldenCross and BB_Position < 0.2 · sector = 'Energy' and MACD_hist > 0")
+
+    table = load_indicator_table()
+    if table is None:
+        with st.spinner("지표 테이블 생성 중... (최초 1회, 전 종목 1년치 봉 다운로드)"):
+            try:
+                refresh_indicator_table(get_sp500_constituents(), force=True)
+            except Exception as e:
+                st.error(f"지표 테이블 갱신 실패: {e}")
+        table = load_indicator_table()
+    if table is None or table.empty:
+        st.error("지표 테이블을 만들 수 없습니다")
+        return
+
+    c1, c2 = st.columns([0.75, 0.25])
+    query = c1.text_input("조건식", value=EXAMPLE_QUERY)
+    order_by = c2.selectbox("정렬", ["ticker", "RSI", "RSI desc", "BB_Position", "MACD_hist desc"])
+
+    start = time.perf_counter()
+    try:
+        result = screen(query, table, order_by=order_by)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    elapsed = (time.perf_counter() - start) * 1000
+
+    st.caption(f"{len(table)}개 종목 중 {len(result)}개 일치 · {elapsed:.1f}ms · 기준 봉: {table['as_of'].max()}")
+    st.dataframe(result, hide_index=True, width='stretch')
 
 # =========================
 # 라우터
 # =========================
 if st.session_state.page == "main":
     main_page()
+elif st.session_state.page == "screener":
+    screener_page()
 else:
     detail_page(st.session_state.ticker)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import time
 import plotly.graph_objects as go
 import plotly.express as px
 from dotenv import load_dotenv
@@ -9,10 +10,13 @@ from dotenv import load_dotenv
 # =========================
 try:
     load_dotenv()
-    from utils.data_fetcher import get_index_data, get_stock_detail
+    from utils.data_fetcher import get_index_data, get_quote, get_history, get_fundamentals, build_stock_detail, get_universe_data
     from utils.indicators import calculate_indicators, interpret_indicator
-    from utils.sentiment import get_wordcloud_base64, get_market_news_with_sentiment
-    from utils.chatbot import chatbot_response
+    from utils.sentiment import get_wordcloud_base64, wordcloud_rendering, get_market_news_with_sentiment
+    from utils.chatbot import chatbot_response_stream
+    from utils.semantic_cache import prompt_ticker
+    from utils.context_builder import get_market_context, get_ticker_context, prefetch_context
+    from utils.prompt_budget import build_prompt
 except Exception as e:
     st.error(f"utils 모듈 오류: {e}")
     st.stop()
@@ -156,63 +160,55 @@ def fetch_quote(sym: str) -> dict:
     return get_index_data(sym) or {}
 
 @st.cache_data(ttl=3600, show_spinner="S&P500 목록 불러오는 중...")  # 1시간 캐싱
-def fetch_sp500_tickers(limit=100):
-    # Wikipedia에서 동적으로 S&P500 목록 불러오기
+def fetch_sp500_constituents() -> dict:
+    # Wikipedia에서 동적으로 S&P500 목록 + 섹터 불러오기 ({티커: 섹터})
     try:
         url = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
         sp500_table = pd.read_html(url)[0]
-        tickers = sp500_table['Symbol'].tolist()[:limit]  # 성능 위해 제한
-        return tickers
+        symbols = sp500_table['Symbol'].str.replace('.', '-', regex=False)
+        return dict(zip(symbols, sp500_table['GICS Sector']))
     except Exception as e:
         st.warning(f"S&P500 목록 불러오기 실패: {e}. 고정 워치리스트 사용.")
-        return ["AAPL","MSFT","NVDA","AMZN","GOOG","META","TSLA","AVGO","ORCL","JPM","V","BRK-B","LLY","XOM","COST","HD","WMT"]
+        return {t: "Market" for t in ["AAPL","MSFT","NVDA","AMZN","GOOG","META","TSLA","AVGO","ORCL","JPM","V","BRK-B","LLY","XOM","COST","HD","WMT"]}
+
+def fetch_sp500_tickers(limit=None):
+    tickers = list(fetch_sp500_constituents())
+    return tickers[:limit] if limit else tickers
+
+# 시세 / 히스토리 / 펀더멘털은 캐시 수명을 따로 둔다 (t.info 는 하루 한 번만)
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_stock_quote(ticker: str) -> dict:
+    return get_quote(ticker) or {}
 
 @st.cache_data(ttl=180, show_spinner=False)
+def fetch_history(ticker: str) -> pd.DataFrame:
+    return get_history(ticker)
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def fetch_fundamentals(ticker: str) -> dict:
+    return get_fundamentals(ticker) or {}
+
 def fetch_stock_detail_cached(ticker: str) -> dict | None:
-    return get_stock_detail(ticker)
+    return build_stock_detail(fetch_history(ticker), fetch_stock_quote(ticker), fetch_fundamentals(ticker))
 
-@st.cache_data(ttl=180, show_spinner=False)
 def fetch_close_series(ticker: str) -> pd.Series | None:
-    data = fetch_stock_detail_cached(ticker)
-    if not data or "history" not in data:
-        return None
-    df = data["history"]
+    df = fetch_history(ticker)
     if df is None or df.empty or "Close" not in df.columns:
         return None
     return df["Close"].tail(60)
 
 @st.cache_data(ttl=180, show_spinner=False)
-def fetch_market_items(tickers: list[str]) -> pd.DataFrame:
-    rows = []
-    for t in tickers:
-        try:
-            detail = fetch_stock_detail_cached(t)
-            if not detail:
-                continue
-            info = detail.get("info", {}) or {}
-            hist = detail.get("history", pd.DataFrame())
-            if hist is None or hist.empty:
-                continue
-
-            if "change_pct" in info and info["change_pct"] is not None:
-                chg = float(info["change_pct"])
-            else:
-                closes = hist["Close"].dropna()
-                if len(closes) < 2:
-                    continue
-                chg = float((closes.iloc[-1] / closes.iloc[-2] - 1.0) * 100)
-
-            mcap = info.get("marketCap", None)
-            size = float(mcap) if mcap else float(max(hist["Close"].iloc[-1], 1.0))
-
-            sector = info.get("sector") or info.get("industry") or "Market"
-            rows.append({"sector": sector, "ticker": t, "size": size, "chg": chg})
-        except Exception:
-            continue
-
-    if not rows:
-        return pd.DataFrame(columns=["sector", "ticker", "size", "chg"])
-    return pd.DataFrame(rows)
+def fetch_market_items(constituents: dict) -> pd.DataFrame:
+    # 전 종목 일괄 다운로드 + 시총 병렬 조회 (실패한 종목은 빼고 부분 결과 반환)
+    bar = st.progress(0.0, text="히트맵 데이터 로딩 중...")
+
+    def on_progress(done: int, total: int):
+        bar.progress(done / total, text=f"히트맵 데이터 로딩 중... ({done}/{total})")
+
+    try:
+        return get_universe_data(list(constituents), sectors=constituents, progress=on_progress)
+    finally:
+        bar.empty()
 
 def market_treemap_real(df: pd.DataFrame) -> go.Figure:
     if df.empty:
@@ -267,9 +263,9 @@ def render_main():
             st.write(user_prompt)
 
         with st.chat_message("assistant"):
-            with st.spinner("생각 중..."):
-                ans = chatbot_response(user_prompt)
-            st.write(ans)
+            # 질문에 나온 종목(없으면 시장 질문 "")을 캐시 범위로 써서 다른 종목의 답변이 섞이지 않게 한다
+            ticker = prompt_ticker(user_prompt, fetch_sp500_constituents())
+            ans = st.write_stream(chatbot_response_stream(user_prompt, ticker=ticker))
 
         st.session_state.main_chat.append({"role": "assistant", "content": ans})
 
@@ -369,10 +365,10 @@ def render_main():
                 st.markdown("</div>", unsafe_allow_html=True)
 
         st.markdown('<div class="card">', unsafe_allow_html=True)
-        st.markdown('<div class="card-title">시장 Heatmap (S&P500 Top 100)</div>', unsafe_allow_html=True)
+        st.markdown('<div class="card-title">시장 Heatmap (S&P500)</div>', unsafe_allow_html=True)
 
-        sp500_tickers = fetch_sp500_tickers(limit=100)  # 동적 불러오기
-        df_heat = fetch_market_items(sp500_tickers)
+        sp500 = fetch_sp500_constituents()  # 동적 불러오기
+        df_heat = fetch_market_items(sp500)
 
         st.plotly_chart(
             market_treemap_real(df_heat),
@@ -390,16 +386,8 @@ def render_main():
                 {"role": "assistant", "content": "브리핑 모드입니다. 예: 'NVDA 오늘 뉴스 3줄 요약 + 리스크/기회 시나리오'"} 
             ]
 
-        market_ctx = get_market_news_with_sentiment(limit=5) or []
-        nvda_ctx = get_market_news_with_sentiment(ticker="NVDA", limit=3) or []
-
-        def pack_news_ctx(items, title):
-            lines = [f"[{title}]"]
-            for it in items:
-                lines.append(f"- {it.get('title','')} ({it.get('source','')}, {it.get('time_ago','')})")
-            return "\n".join(lines)
-
-        ctx_text = pack_news_ctx(market_ctx, "시장 속보") + "\n\n" + pack_news_ctx(nvda_ctx, "NVDA 뉴스")
+        # 컨텍스트용 로컬 저장소(속보 · NVDA 뉴스 · 지수 봉)는 백그라운드에서 채워 두고, 질문할 때는 읽기만 한다
+        prefetch_context(["NVDA"])
 
         for m in st.session_state.brief_chat:
             with st.chat_message(m["role"]):
@@ -412,15 +400,15 @@ def render_main():
                 st.write(brief_prompt)
 
             with st.chat_message("assistant"):
-                with st.spinner("브리핑 생성 중..."):
-                    full_prompt = (
+                full_prompt, _ = build_prompt(
+                    brief_prompt,
+                    [get_market_context(), get_ticker_context("NVDA")],
+                    instructions=(
                         "너는 투자 리서치 애널리스트처럼 답한다.\n"
-                        "아래 컨텍스트를 기반으로 '3줄 요약 + 리스크 + 기회 + 체크포인트(조건)' 형식으로 답해라.\n\n"
-                        f"{ctx_text}\n\n"
-                        f"[질문]\n{brief_prompt}"
-                    )
-                    ans = chatbot_response(full_prompt)
-                st.write(ans)
+                        "아래 컨텍스트를 기반으로 '3줄 요약 + 리스크 + 기회 + 체크포인트(조건)' 형식으로 답해라."
+                    ),
+                )
+                ans = st.write_stream(chatbot_response_stream(full_prompt, question=brief_prompt, scope="brief"))
 
             st.session_state.brief_chat.append({"role": "assistant", "content": ans})
 
@@ -450,6 +438,20 @@ def render_main():
 # =========================
 # DETAIL PAGE
 # =========================
+@st.fragment
+def render_wordcloud_section(ticker: str):
+    # 워드 클라우드는 워커에서 그린다 — 준비될 때까지 이 영역만 다시 그림
+    wc = get_wordcloud_base64(ticker)
+    if wc:
+        st.image(wc, width=700)
+    elif wordcloud_rendering(ticker):
+        st.caption("키워드 클라우드 생성 중...")
+        time.sleep(1)
+        st.rerun(scope="fragment")
+    else:
+        st.info("오늘 뉴스가 부족해요")
+
+
 def render_detail(ticker: str):
     st.title(f"{ticker} · 종목 상세 분석")
 
@@ -518,11 +520,7 @@ def render_detail(ticker: str):
         st.caption(f"{item.get('source', '퀀톡')} · {item.get('time_ago', '방금 전')}")
 
     st.subheader("금일 키워드 클라우드")
-    wc = get_wordcloud_base64(ticker)
-    if wc:
-        st.image(wc, width=700)
-    else:
-        st.info("오늘 뉴스가 부족해요")
+    render_wordcloud_section(ticker)
 
     st.subheader("AI 종합 투자 매력도")
     score = 50
@@ -553,15 +551,13 @@ def render_detail(ticker: str):
             st.write(prompt)
 
         with st.chat_message("assistant"):
-            with st.spinner("생각 중..."):
-                ctx = ""
-                if indicators:
-                    ctx += f"\n[기술지표]\n{ {k: indicators[k] for k in list(indicators.keys())[:8]} }\n"
-                if news_list:
-                    ctx += "\n[최근뉴스]\n" + "\n".join([f"- {n.get('title','')}" for n in news_list[:5]])
-                full = f"종목: {ticker}\n{ctx}\n\n질문: {prompt}"
-                resp = chatbot_response(full)
-            st.write(resp)
+            ctx = ""
+            if indicators:
+                ctx += f"\n[기술지표]\n{ {k: indicators[k] for k in list(indicators.keys())[:8]} }\n"
+            if news_list:
+                ctx += "\n[최근뉴스]\n" + "\n".join([f"- {n.get('title','')}" for n in news_list[:5]])
+            full = f"종목: {ticker}\n{ctx}\n\n질문: {prompt}"
+            resp = st.write_stream(chatbot_response_stream(full, ticker=ticker, question=prompt))
 
         st.session_state[chat_key].append({"role": "assistant", "content": resp})
 
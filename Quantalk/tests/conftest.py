@@ -0,0 +1,8 @@
+# 앱과 같은 import 경로를 쓴다: `from utils.xxx` (Quantalk/) · `from SECutils.xxx` (Quantalk/utils/)
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "utils")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
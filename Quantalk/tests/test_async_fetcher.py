@@ -0,0 +1,41 @@
+# 섹션 동시 로딩: 느린 섹션은 제한 시간이 지나면 None 으로 두고, 페이지는 그 섹션을 기다리지 않는다
+import threading
+import time
+
+from utils.async_fetcher import run_in_thread, run_sections
+
+
+def test_slow_section_does_not_block():
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "late"
+
+    start = time.monotonic()
+    try:
+        out = run_sections({"slow": run_in_thread(slow, timeout=0.5), "fast": run_in_thread(lambda: 1)})
+        elapsed = time.monotonic() - start
+    finally:
+        release.set()
+    assert out == {"slow": None, "fast": 1}
+    assert elapsed < 2
+
+
+def test_section_timeout_applies_to_whole_gather():
+    release = threading.Event()
+    start = time.monotonic()
+    try:
+        out = run_sections({"slow": run_in_thread(release.wait, 5), "fast": run_in_thread(lambda: 1)}, timeout=0.5)
+        elapsed = time.monotonic() - start
+    finally:
+        release.set()
+    assert out == {"slow": None, "fast": 1}
+    assert elapsed < 2
+
+
+def test_failed_section_is_none():
+    def boom():
+        raise RuntimeError("down")
+
+    assert run_sections({"bad": run_in_thread(boom), "ok": run_in_thread(lambda: "x")}) == {"bad": None, "ok": "x"}
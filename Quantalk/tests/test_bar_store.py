@@ -0,0 +1,96 @@
+# 봉 저장소: 콜드 스타트(저장본 없음)에서 period 전체를 받는지, 이후에는 증분만 받는지
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import bar_store
+
+
+def _bars(start, periods):
+    idx = pd.date_range(start, periods=periods, freq="B", tz="America/New_York")
+    close = np.linspace(100, 100 + periods, periods)
+    return pd.DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+                         "Volume": np.full(periods, 1000)}, index=idx)
+
+
+HISTORY = _bars("2024-01-01", 300)
+
+
+class FakeTicker:
+    calls = []
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, period=None, start=None, interval="1d"):
+        FakeTicker.calls.append({"period": period, "start": start})
+        if start is not None:
+            return HISTORY[HISTORY.index >= pd.Timestamp(start).tz_convert(HISTORY.index.tz)]
+        return HISTORY
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, "BAR_DIR", str(tmp_path))
+    monkeypatch.setattr(bar_store.yf, "Ticker", FakeTicker)
+    FakeTicker.calls = []
+    return tmp_path
+
+
+def test_covers_is_false_without_stored_bars():
+    assert bar_store._covers(None, "6mo") is False
+    assert bar_store._covers(pd.DataFrame(columns=bar_store.COLUMNS), "6mo") is False
+
+
+def test_load_bars_cold_start_downloads_full_period(store):
+    bars = bar_store.load_bars("AAPL", "1d", period="6mo")
+    assert not bars.empty
+    assert FakeTicker.calls == [{"period": "6mo", "start": None}]
+    assert bar_store.read_bars("AAPL", "1d") is not None
+
+
+def test_update_bars_after_cold_start_is_incremental(store):
+    bar_store.update_bars("AAPL", "1d", period="6mo")
+    FakeTicker.calls = []
+    bar_store.update_bars("AAPL", "1d", period="6mo")
+    assert FakeTicker.calls[0]["period"] is None and FakeTicker.calls[0]["start"] is not None
+
+
+
+def test_update_bars_many_cold_start(store, monkeypatch):
+    downloads = []
+
+    def fake_download(tickers, interval="1d", **kwargs):
+        downloads.append((list(tickers), kwargs.get("period"), kwargs.get("start")))
+        return pd.concat({t: HISTORY for t in tickers}, axis=1)
+
+    monkeypatch.setattr(bar_store.yf, "download", fake_download)
+    bar_store.write_bars("MSFT", "1d", HISTORY.iloc[:-5])  # MSFT 만 저장돼 있다
+
+    result = bar_store.update_bars_many(["AAPL", "MSFT"], "1d", period="6mo")
+    assert set(result) == {"AAPL", "MSFT"}
+    assert (["AAPL"], "6mo", None) in downloads                       # 저장본이 없는 AAPL 은 전체
+    assert any(t == ["MSFT"] and start is not None for t, _, start in downloads)  # MSFT 는 증분
+    assert len(result["MSFT"]) == len(HISTORY)
+
+
+def test_concurrent_updates_keep_longest_history(store, monkeypatch):
+    # 같은 티커를 5d(시세) · 6mo(차트)로 동시에 갱신해도 파일이 깨지거나 긴 히스토리가 지워지지 않는다
+    class SlowTicker(FakeTicker):
+        def history(self, period=None, start=None, interval="1d"):
+            time.sleep(0.05)
+            if period is not None:
+                return bar_store._slice_period(HISTORY, period)
+            return super().history(start=start, interval=interval)
+
+    monkeypatch.setattr(bar_store.yf, "Ticker", SlowTicker)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda p: bar_store.update_bars("AAPL", "1d", period=p), ["5d", "6mo"] * 8))
+    stored = bar_store.read_bars("AAPL", "1d")
+    assert stored.index[0] <= bar_store._slice_period(HISTORY, "6mo").index[0]
+    assert stored.index[-1] == HISTORY.index[-1]
+    assert not [f for f in os.listdir(os.path.join(store, "1d")) if f.endswith(".tmp")]
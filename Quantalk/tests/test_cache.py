@@ -0,0 +1,118 @@
+# 공유 캐시: TTL · stale-while-revalidate · 갱신 권한(lease) · 동시 호출 합치기(singleflight) · jitter
+import threading
+import time
+
+import pytest
+
+from utils import cache
+from utils.cache import MemoryCache, SQLiteCache, SingleFlight, jittered, shared_cache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    return MemoryCache() if request.param == "memory" else SQLiteCache(str(tmp_path / "cache.sqlite"))
+
+
+def _counting(delay=0.0):
+    calls = []
+
+    def fn(x):
+        calls.append(x)
+        time.sleep(delay)
+        return f"{x}:{len(calls)}"
+    return fn, calls
+
+
+def test_hit_within_ttl(backend):
+    fn, calls = _counting()
+    cached = shared_cache(ttl=60, backend=backend, jitter=0)(fn)
+    assert cached("a") == cached("a") == "a:1"
+    assert cached("b") == "b:2"
+    assert calls == ["a", "b"]
+
+
+def test_stale_value_served_while_refreshing(backend):
+    fn, calls = _counting()
+    cached = shared_cache(ttl=0.2, stale_ttl=60, backend=backend, jitter=0)(fn)
+    assert cached("a") == "a:1"
+    time.sleep(0.3)
+    assert cached("a") == "a:1"          # 오래된 값을 즉시 돌려주고
+    deadline = time.time() + 5
+    while len(calls) < 2 and time.time() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.05)
+    assert cached("a") == "a:2"          # 백그라운드 갱신 결과가 다음 호출에 보인다
+
+
+def test_expired_value_is_recomputed(backend):
+    fn, calls = _counting()
+    cached = shared_cache(ttl=0.1, stale_ttl=0.1, backend=backend, jitter=0)(fn)
+    cached("a")
+    time.sleep(0.3)
+    assert cached("a") == "a:2"
+    assert len(calls) == 2
+
+
+def test_claim_refresh_only_once(backend):
+    backend.set("k", "v", ttl=0, stale_ttl=60)
+    time.sleep(0.01)
+    assert backend.claim_refresh("k", lease=30) is True
+    assert backend.claim_refresh("k", lease=30) is False   # 다른 워커가 이미 갱신 중
+    assert backend.get("k")[0] == "v"
+
+
+def test_concurrent_misses_call_once(backend):
+    fn, calls = _counting(delay=0.2)
+    cached = shared_cache(ttl=60, backend=backend, jitter=0)(fn)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cached("a"))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == ["a"]
+    assert results == ["a:1"] * 20
+
+
+def test_singleflight_propagates_errors_and_resets():
+    flight = SingleFlight()
+    started = threading.Event()
+
+    def boom():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("k", boom)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == ["upstream"] * 5
+    assert flight.do("k", lambda: 42) == 42    # 실패 후 같은 키로 다시 호출 가능
+
+
+def test_jittered_stays_within_bounds():
+    values = [jittered(100, 0.1) for _ in range(1000)]
+    assert all(90 <= v <= 110 for v in values)
+    assert len(set(values)) > 1
+    assert jittered(100, 0) == 100
+
+
+def test_backend_errors_fall_back_to_direct_call(monkeypatch):
+    class Broken(cache.CacheBackend):
+        def get(self, key):
+            raise OSError("disk")
+
+    fn, calls = _counting()
+    cached = shared_cache(ttl=60, backend=Broken())(fn)
+    assert cached("a") == "a:1"
+    assert calls == ["a"]
@@ -0,0 +1,72 @@
+# 클러스터 수 탐색: coarse / bayesian / patience 는 잘 분리된 데이터에서 exhaustive 와 같은 k 를 고르고,
+# search_budget 은 탐색 시간을 제한한다
+import time
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_blobs
+
+from SECutils import rag
+from SECutils.rag import Raptor
+
+N_CENTERS = 5
+
+
+@pytest.fixture(scope="module")
+def blobs():
+    X, _ = make_blobs(n_samples=300, centers=N_CENTERS, n_features=10, cluster_std=0.5,
+                      center_box=(-20, 20), random_state=1)
+    return X
+
+
+@pytest.fixture(scope="module")
+def exhaustive_k(blobs):
+    return Raptor(None, None).get_optimal_clusters(blobs)
+
+
+def test_exhaustive_finds_the_blobs(exhaustive_k):
+    assert exhaustive_k == N_CENTERS
+
+
+@pytest.mark.parametrize("options", [
+    {"cluster_search": "coarse"},
+    {"cluster_search": "bayesian"},
+    {"cluster_search": "exhaustive", "search_patience": 5},
+    {"cluster_search": "coarse", "search_jobs": 2},
+])
+def test_fast_searches_match_exhaustive(blobs, exhaustive_k, options):
+    assert Raptor(None, None, **options).get_optimal_clusters(blobs) == exhaustive_k
+
+
+@pytest.fixture
+def slow_fits(monkeypatch):
+    # 후보 하나당 50ms, BIC 는 k = 30 에서 최소
+    fitted = []
+
+    def fake_bic(embeddings, k, random_state):
+        time.sleep(0.05)
+        fitted.append(k)
+        return float((k - 30) ** 2)
+
+    monkeypatch.setattr(rag, "_gmm_bic", fake_bic)
+    return fitted
+
+
+@pytest.mark.parametrize("search", ["exhaustive", "coarse"])
+def test_search_budget_bounds_search_time(blobs, slow_fits, search):
+    start = time.monotonic()
+    k = Raptor(None, None, cluster_search=search, search_budget=0.3).get_optimal_clusters(blobs)
+    elapsed = time.monotonic() - start
+    assert elapsed < 0.3 + 0.2           # 예산 + 진행 중이던 후보 하나
+    assert 0 < len(slow_fits) < 49       # 전체 49 개 후보 중 일부만
+    assert k in slow_fits
+
+
+def test_zero_budget_still_fits_one_candidate(blobs, slow_fits):
+    assert Raptor(None, None, search_budget=0).get_optimal_clusters(blobs) == 1
+    assert slow_fits == [1]
+
+
+def test_without_budget_all_candidates_are_fitted(blobs, slow_fits):
+    assert Raptor(None, None).get_optimal_clusters(blobs) == 30
+    assert slow_fits == list(range(1, 50))
@@ -0,0 +1,88 @@
+# 임베딩 디스크 캐시: 여러 프로세스가 같은 디렉터리에 동시에 써도 행이 섞이거나 중복되지 않아야 한다
+import multiprocessing
+import threading
+
+import numpy as np
+
+from SECutils.embedding_cache import CachedEmbeddings, EmbeddingCache, text_hash
+
+
+class FakeEmbeddings:
+    # 텍스트만으로 정해지는 벡터 (어느 프로세스가 계산해도 같다)
+    model_name = "fake/mini-L6"
+
+    def embed_documents(self, texts):
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0] for t in texts]
+
+
+def _expected(texts):
+    return np.asarray(FakeEmbeddings().embed_documents(texts), dtype=np.float32)
+
+
+def _texts(worker):
+    # 워커끼리 절반 이상 겹치는 60 개 텍스트 중 40 개
+    return [f"text {(worker * 13 + i) % 60}" for i in range(40)]
+
+
+def _worker(cache_dir, worker, results):
+    embd = CachedEmbeddings(FakeEmbeddings(), EmbeddingCache(cache_dir), batch_size=7)
+    texts = _texts(worker)
+    results.put((worker, bool(np.array_equal(embd.embed_array(texts), _expected(texts)))))
+
+
+def _check_cache(cache_dir):
+    cache = EmbeddingCache(cache_dir)
+    texts = [f"text {i}" for i in range(60)]
+    found = cache.get(FakeEmbeddings.model_name, [text_hash(t) for t in texts])
+    assert len(found) == 60
+    assert np.array_equal(np.stack([found[text_hash(t)] for t in texts]), _expected(texts))
+    # 겹치는 텍스트도 한 번만 저장된다
+    assert cache.stats()["models"] == {FakeEmbeddings.model_name: 60}
+
+
+def test_concurrent_processes(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(str(tmp_path), w, results)) for w in range(6)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+    assert all(p.exitcode == 0 for p in procs)
+    assert sorted(results.get(timeout=5) for _ in procs) == [(w, True) for w in range(6)]
+    _check_cache(tmp_path)
+
+
+def test_concurrent_threads(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    ok = []
+
+    def run(worker):
+        embd = CachedEmbeddings(FakeEmbeddings(), cache, batch_size=7)
+        texts = _texts(worker)
+        ok.append(np.array_equal(embd.embed_array(texts), _expected(texts)))
+
+    threads = [threading.Thread(target=run, args=(w,)) for w in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert ok == [True] * 6
+    _check_cache(tmp_path)
+
+
+def test_second_pass_is_served_from_cache(tmp_path):
+    embd = CachedEmbeddings(FakeEmbeddings(), EmbeddingCache(str(tmp_path)))
+    texts = _texts(0)
+    embd.embed_array(texts)
+    embd.embed_array(texts + texts[:5])
+    stats = embd.stats()
+    assert (stats["hits"], stats["misses"]) == (45, 40)
+
+
+def test_all_vectors_in_insertion_order(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    assert cache.all_vectors(FakeEmbeddings.model_name).shape == (0, 0)
+    texts = _texts(0)
+    CachedEmbeddings(FakeEmbeddings(), cache, batch_size=7).embed_array(texts)
+    assert np.array_equal(cache.all_vectors(FakeEmbeddings.model_name), _expected(texts))
@@ -0,0 +1,97 @@
+# 패널 모드 / 스트리밍 지표는 종목별 배치 계산(calculate_indicators)과 같은 값을 내야 한다
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.indicators import (
+    calculate_bb, calculate_indicators, calculate_indicators_panel, calculate_macd, calculate_rsi, calculate_sma,
+)
+from utils.streaming_indicators import (
+    StreamingBollinger, StreamingEMA, StreamingIndicators, StreamingMACD, StreamingRSI, StreamingSMA,
+)
+
+FLOAT_KEYS = ["RSI", "MACD", "MACD_signal", "MACD_hist", "BB_Position"]
+
+
+def _random_walk(n, seed):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+@pytest.fixture
+def prices():
+    # 300 영업일 x 5 종목. 늦게 상장한 종목(NaN 접두) · 히스토리가 짧은 종목 · 중간 결측 포함
+    index = pd.bdate_range("2024-01-01", periods=300)
+    panel = pd.DataFrame({t: _random_walk(len(index), i) for i, t in enumerate(["AAA", "BBB", "CCC", "DDD", "EEE"])},
+                         index=index)
+    panel.iloc[:120, 1] = np.nan    # BBB: 180 봉 (SMA200 없음)
+    panel.iloc[:285, 2] = np.nan    # CCC: 15 봉 (RSI/BB 없음)
+    panel.iloc[-3:, 3] = np.nan     # DDD: 마지막 3 봉 결측 → 마지막 유효 봉 기준
+    panel["EEE"] = 50.0             # EEE: 가격 변화 없음
+    return panel
+
+
+def _batch(series):
+    close = series.dropna()
+    return calculate_indicators(pd.DataFrame({"Close": close, "High": close, "Low": close}))
+
+
+def _assert_same(got, expected):
+    for key in FLOAT_KEYS:
+        assert np.isclose(got[key], expected[key], rtol=1e-8, atol=1e-8, equal_nan=True), key
+    assert bool(got["GoldenCross"]) == bool(expected["GoldenCross"])
+
+
+def test_panel_matches_per_ticker(prices):
+    table = calculate_indicators_panel(prices)
+    assert list(table.index) == list(prices.columns)
+    for ticker in prices.columns:
+        _assert_same(table.loc[ticker], _batch(prices[ticker]))
+
+
+def test_panel_drops_tickers_without_data(prices):
+    prices["ZZZ"] = np.nan
+    table = calculate_indicators_panel(prices)
+    assert "ZZZ" not in table.index
+    assert len(table) == 5
+
+
+# --- 스트리밍: 봉마다 update() 한 값이 같은 시점까지의 배치 계산 마지막 값과 같아야 한다 ---
+@pytest.fixture
+def close():
+    return pd.Series(_random_walk(260, 7), index=pd.bdate_range("2024-01-01", periods=260))
+
+
+def _close(a, b):
+    return np.isclose(a, b, rtol=1e-8, atol=1e-8, equal_nan=True)
+
+
+def test_streaming_matches_batch_every_bar(close):
+    sma, ema = StreamingSMA(20), StreamingEMA(12)
+    macd, rsi, bb = StreamingMACD(), StreamingRSI(), StreamingBollinger()
+    batch_sma = calculate_sma(close, 20)
+    batch_ema = close.ewm(span=12, adjust=False).mean()
+    batch_macd = calculate_macd(close)
+    batch_rsi = calculate_rsi(close)
+    batch_bb = calculate_bb(close)
+    for i, x in enumerate(close):
+        assert _close(sma.update(x), batch_sma.iloc[i])
+        assert _close(ema.update(x), batch_ema.iloc[i])
+        assert all(_close(v, b.iloc[i]) for v, b in zip(macd.update(x), batch_macd))
+        assert _close(rsi.update(x), batch_rsi.iloc[i])
+        assert all(_close(v, b.iloc[i]) for v, b in zip(bb.update(x), batch_bb))
+
+
+def test_streaming_indicators_match_calculate_indicators(close):
+    # 히스토리로 워밍업한 뒤 새 봉을 하나씩 넣어도 전체 배치 결과와 같다
+    ind = StreamingIndicators.from_history(close.iloc[:250])
+    for x in close.iloc[250:]:
+        ind.update(x)
+    _assert_same(ind.value, calculate_indicators(pd.DataFrame({"Close": close, "High": close, "Low": close})))
+
+
+def test_streaming_skips_missing_bars(close):
+    gappy = close.copy()
+    gappy.iloc[[30, 31, 100]] = np.nan
+    ind = StreamingIndicators.from_history(gappy)
+    _assert_same(ind.value, _batch(gappy))
@@ -0,0 +1,34 @@
+# LLM 게이트웨이: 로컬 스텁 서버로 chat / stream / LangChain chat_model 이 모두 게이트웨이 지표에 잡히는지
+import threading
+
+import pytest
+
+from utils.llm_gateway import LLMGateway
+from utils.llm_stub import make_server
+
+pytest.importorskip("langchain_core")
+
+
+@pytest.fixture(scope="module")
+def gateway():
+    server = make_server(port=0, delay=0.0, first_delay=0.0, answer="요약 테스트 답변")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield LLMGateway(base_url=f"http://127.0.0.1:{server.server_port}/v1", api_key="stub", max_concurrency=2)
+    server.shutdown()
+
+
+def test_chat_and_stream(gateway):
+    messages = [{"role": "user", "content": "hi"}]
+    assert gateway.chat(messages) == "요약 테스트 답변"
+    assert "".join(gateway.stream(messages)) == "요약 테스트 답변"
+
+
+def test_chat_model_goes_through_gateway(gateway):
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.prompts import ChatPromptTemplate
+
+    before = gateway.metrics.snapshot()["calls"]
+    chain = ChatPromptTemplate.from_template("{context}") | gateway.chat_model(temperature=0) | StrOutputParser()
+    out = chain.batch([{"context": f"c{i}"} for i in range(4)], config={"max_concurrency": 4})
+    assert out == ["요약 테스트 답변"] * 4
+    assert gateway.metrics.snapshot()["calls"] == before + 4
@@ -0,0 +1,115 @@
+# Raptor 클러스터링 시드: 기본은 예전처럼 시드 없는 축소 + GMM 시드 0, seed 를 주면 n_jobs 와 무관하게 재현된다
+import numpy as np
+import pytest
+from sklearn.datasets import make_blobs
+
+from SECutils import rag
+from SECutils.rag import RANDOM_SEED, Raptor
+
+
+@pytest.fixture(scope="module")
+def embeddings():
+    X, _ = make_blobs(n_samples=200, centers=5, n_features=32, random_state=0)
+    return X
+
+
+def _record_seeds(monkeypatch):
+    seen = {"reduce": [], "gmm": []}
+    reduce, gmm = rag.reduce_embeddings, Raptor.GMM_membership
+
+    def reduce_spy(embeddings, dim, method, n_neighbors, metric, random_state=None):
+        seen["reduce"].append(random_state)
+        return reduce(embeddings, dim, method, n_neighbors, metric, random_state)
+
+    def gmm_spy(self, embeddings, threshold, random_state=0):
+        seen["gmm"].append(random_state)
+        return gmm(self, embeddings, threshold, random_state)
+
+    monkeypatch.setattr(rag, "reduce_embeddings", reduce_spy)
+    monkeypatch.setattr(Raptor, "GMM_membership", gmm_spy)
+    return seen
+
+
+def test_default_clustering_is_unseeded(monkeypatch, embeddings):
+    seen = _record_seeds(monkeypatch)
+    Raptor(None, None, cluster_search="coarse", reduction="pca").perform_clustering(embeddings, 5, 0.1)
+    assert len(seen["reduce"]) > 1
+    assert set(seen["reduce"]) == {None}
+    assert set(seen["gmm"]) == {0}
+
+
+def test_seeded_clustering_uses_seed_per_global_cluster(monkeypatch, embeddings):
+    seen = _record_seeds(monkeypatch)
+    Raptor(None, None, cluster_search="coarse", reduction="pca", seed=RANDOM_SEED).perform_clustering(
+        embeddings, 5, 0.1
+    )
+    assert seen["reduce"][0] == seen["gmm"][0] == RANDOM_SEED
+    assert seen["reduce"][1:] == seen["gmm"][1:] == [RANDOM_SEED + i for i in range(len(seen["reduce"]) - 1)]
+
+
+def test_seeded_clustering_does_not_depend_on_n_jobs(embeddings):
+    with Raptor(None, None, cluster_search="coarse", reduction="pca", seed=RANDOM_SEED) as raptor:
+        serial = raptor.perform_clustering(embeddings, 5, 0.1, n_jobs=1)
+        parallel = raptor.perform_clustering(embeddings, 5, 0.1, n_jobs=2)
+        pool = raptor._pool
+        again = raptor.perform_clustering(embeddings, 5, 0.1, n_jobs=2)
+        assert pool is not None and raptor._pool is pool  # 호출(레벨)마다 워커를 새로 띄우지 않는다
+    assert raptor._pool is None
+    assert all(np.array_equal(a, b) for a, b in zip(serial, parallel))
+    assert all(np.array_equal(a, b) for a, b in zip(parallel, again))
+
+
+def test_few_local_clusters_run_serially(monkeypatch, embeddings):
+    monkeypatch.setattr(rag, "PARALLEL_MIN_CLUSTERS", 100)
+    with Raptor(None, None, cluster_search="coarse", reduction="pca", seed=RANDOM_SEED) as raptor:
+        raptor.perform_clustering(embeddings, 5, 0.1, n_jobs=2)
+        assert raptor._pool is None
+
+
+def test_auto_reduction_is_resolved_once_from_the_corpus_size(monkeypatch, embeddings):
+    # 전체가 AUTO_UMAP_MIN 이상이면 (작은) 지역 클러스터도 전역 단계와 같은 UMAP 을 쓴다
+    methods = []
+    reduce = rag.reduce_embeddings
+
+    def reduce_spy(embeddings, dim, method, n_neighbors, metric, random_state=None):
+        methods.append(method)
+        return reduce(embeddings, dim, "pca", n_neighbors, metric, random_state)
+
+    monkeypatch.setattr(rag, "reduce_embeddings", reduce_spy)
+    monkeypatch.setattr(rag, "AUTO_UMAP_MIN", 150)
+    Raptor(None, None, cluster_search="coarse", reduction="auto").perform_clustering(embeddings, 5, 0.1)
+    assert len(methods) > 1
+    assert set(methods) == {"umap"}
+
+
+def _baseline_clustering(raptor, embeddings, dim, threshold):
+    # user-019 이전 구현: 소속을 리스트로 찾고, 지역 클러스터 구성원은 임베딩 값을 비교해 원래 위치를 찾는다
+    reduced = raptor.global_cluster_embeddings(embeddings, dim)
+    global_clusters, n_global_clusters = raptor.GMM_cluster(reduced, threshold)
+    all_local_clusters = [np.array([]) for _ in range(len(embeddings))]
+    total_clusters = 0
+    for i in range(n_global_clusters):
+        members = embeddings[np.array([i in gc for gc in global_clusters])]
+        if len(members) == 0:
+            continue
+        if len(members) <= dim + 1:
+            local_clusters, n_local_clusters = [np.array([0]) for _ in members], 1
+        else:
+            local_clusters, n_local_clusters = raptor.GMM_cluster(raptor.local_cluster_embeddings(members, dim), threshold)
+        for j in range(n_local_clusters):
+            local_members = members[np.array([j in lc for lc in local_clusters])]
+            for idx in np.where((embeddings == local_members[:, None]).all(-1))[1]:
+                all_local_clusters[idx] = np.append(all_local_clusters[idx], j + total_clusters)
+        total_clusters += n_local_clusters
+    return all_local_clusters
+
+
+def test_clustering_matches_baseline_matching():
+    # 고정 시드(GMM 0) + PCA 라 결정적이다. 겹치는 덩어리라 여러 클러스터에 속하는 임베딩도 나온다
+    X, _ = make_blobs(n_samples=240, centers=6, n_features=16, cluster_std=6.0, random_state=0)
+    raptor = Raptor(None, None, cluster_search="exhaustive", reduction="pca")
+    expected = _baseline_clustering(raptor, X, 5, 0.1)
+    got = raptor.perform_clustering(X, 5, 0.1)
+    assert len(got) == len(expected)
+    assert all(np.array_equal(np.sort(g), np.sort(e)) for g, e in zip(got, expected))
+    assert any(len(e) > 1 for e in expected)
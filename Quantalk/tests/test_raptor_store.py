@@ -0,0 +1,110 @@
+# Raptor 트리 저장본: 청크 · 빌드 설정 · 모델이 같을 때만 재사용하고, 하나라도 바뀌면 다시 만든다
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from SECutils import RaptorStore, rag
+from SECutils.rag import Raptor
+
+KEY = ("AAPL", "10-K", "0000320193-25-000079", "1A")
+TEXT = "risk one\n\nrisk two\n\nrisk three"
+
+
+class ParagraphSplitter:
+    # tiktoken 인코딩은 네트워크로 받아야 하므로 테스트에서는 문단 단위로 나눈다
+    def __init__(self, chunk_size, **kwargs):
+        self.chunk_size = chunk_size
+
+    def split_text(self, text):
+        return text.split("\n\n")
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    calls = []
+
+    def fake_build(self, texts, level=1, n_levels=3, priors=None):
+        calls.append(SimpleNamespace(texts=list(texts), priors=priors))
+        df_clusters = pd.DataFrame({"text": texts, "cluster": [np.array([0.0])] * len(texts)})
+        df_summary = pd.DataFrame({"summaries": [f"summary by {self.model.model_name}"], "level": [level],
+                                   "cluster": [0.0]})
+        return {level: (df_clusters, df_summary)}
+
+    monkeypatch.setattr(rag.RecursiveCharacterTextSplitter, "from_tiktoken_encoder",
+                        classmethod(lambda cls, chunk_size, chunk_overlap: ParagraphSplitter(chunk_size)))
+    monkeypatch.setattr(Raptor, "recursive_embed_cluster_summarize", fake_build)
+    return calls
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RaptorStore(str(tmp_path / "trees.sqlite"))
+
+
+def _raptor(store, llm="gpt-4o-mini", embedding="all-MiniLM-L6-v2", **kwargs):
+    return Raptor(SimpleNamespace(model_name=llm), SimpleNamespace(model_name=embedding), store=store, **kwargs)
+
+
+def test_saved_tree_is_reused(store, builds):
+    first = _raptor(store).text_spliter(TEXT, tree_key=KEY)
+    second = _raptor(store).text_spliter(TEXT, tree_key=KEY)
+    assert first == second == ["risk one", "risk two", "risk three", "summary by gpt-4o-mini"]
+    assert len(builds) == 1
+
+
+def test_changed_chunks_rebuild(store, builds):
+    _raptor(store).text_spliter(TEXT, tree_key=KEY)
+    texts = _raptor(store).text_spliter(TEXT + "\n\nrisk four", tree_key=KEY)
+    assert len(builds) == 2
+    assert texts[:4] == ["risk one", "risk two", "risk three", "risk four"]
+
+
+@pytest.mark.parametrize("change", [
+    {"llm": "gpt-4.1"},
+    {"embedding": "text-embedding-3-small"},
+    {"cluster_search": "coarse"},
+    {"reduction": "pca"},
+    {"seed": 224},
+])
+def test_changed_build_settings_rebuild(store, builds, change):
+    _raptor(store).text_spliter(TEXT, tree_key=KEY)
+    texts = _raptor(store, **change).text_spliter(TEXT, tree_key=KEY)
+    assert len(builds) == 2
+    # 다시 만든 트리가 저장되어 다음 호출부터는 재사용된다
+    assert _raptor(store, **change).text_spliter(TEXT, tree_key=KEY) == texts
+    assert len(builds) == 2
+
+
+def test_changed_chunking_rebuilds(store, builds):
+    _raptor(store).text_spliter(TEXT, tree_key=KEY)
+    _raptor(store).text_spliter(TEXT, n_levels=2, tree_key=KEY)
+    assert len(builds) == 2
+
+
+def test_tree_params_include_models_and_clustering(store):
+    params = _raptor(store).tree_params(2000, 1, 3)
+    assert params["llm"] == "gpt-4o-mini"
+    assert params["embedding"] == "all-MiniLM-L6-v2"
+    assert params["threshold"] == rag.CLUSTER_THRESHOLD
+    assert {"cluster_search", "reduction"} <= params.keys()
+
+
+def test_without_key_nothing_is_stored(store, builds):
+    _raptor(store).text_spliter(TEXT)
+    _raptor(store).text_spliter(TEXT)
+    assert len(builds) == 2
+    assert store.load_tree(KEY) is None
+
+
+def test_rebuild_starts_from_the_previous_filing(store, builds):
+    _raptor(store).text_spliter(TEXT, tree_key=KEY)
+    next_year = ("AAPL", "10-K", "0000320193-26-000012", "1A")
+    _raptor(store).text_spliter(TEXT + "\n\nrisk four", tree_key=next_year)
+    assert builds[1].priors == [{rag.text_hash(t): [0] for t in ["risk one", "risk two", "risk three"]}]
+
+    # 다른 설정으로 만든 트리나 다른 섹션의 트리에서는 시작하지 않는다
+    _raptor(store, llm="gpt-4.1").text_spliter(TEXT, tree_key=("AAPL", "10-K", "0000320193-27-000001", "1A"))
+    _raptor(store).text_spliter(TEXT, tree_key=("AAPL", "10-K", "0000320193-25-000079", "7"))
+    assert [b.priors for b in builds[2:]] == [None, None]
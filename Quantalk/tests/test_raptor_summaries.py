@@ -0,0 +1,163 @@
+# Raptor 클러스터 요약: 동시에 요청해도 클러스터 순서대로 돌려주고, 일시적 실패만 다시 보내며 성공한 요약은 저장한다.
+# 청크 하나만 바뀐 공시를 다시 만들면 그 청크가 속한 클러스터(와 그 위 레벨)만 다시 요약한다
+import random
+import threading
+import time
+
+import httpx
+import numpy as np
+import openai
+import pandas as pd
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from SECutils import RaptorStore, rag
+from SECutils.rag import RANDOM_SEED, Raptor
+
+TEXTS = [f"text {i}" for i in range(12)]
+
+
+class FakeLLM:
+    # 프롬프트의 문서 부분을 그대로 돌려준다. fail[문서] 번 만큼 먼저 실패한다
+    def __init__(self, fail=None, delay=0.02):
+        self.fail = dict(fail or {})
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+        self.model = RunnableLambda(self)
+
+    def __call__(self, prompt):
+        context = prompt.to_string().split("Documentation:")[-1].strip()
+        with self._lock:
+            self.calls.append(context)
+            error = self.fail.get(context)
+            if error is not None:
+                self.fail[context] = error[1:] or None
+        time.sleep(random.random() * self.delay)
+        if error is not None:
+            raise error[0]
+        return f"summary of {context}"
+
+
+def _timeout():
+    return openai.APITimeoutError(request=httpx.Request("POST", "http://llm/v1/chat/completions"))
+
+
+def _gateway_error():
+    # 게이트웨이는 데드라인 안에서 재시도한 뒤 원래 오류를 원인으로 LLMError 를 던진다
+    try:
+        raise RuntimeError("LLM 호출 실패") from _timeout()
+    except RuntimeError as e:
+        return e
+
+
+@pytest.fixture
+def raptor(tmp_path, monkeypatch):
+    # 텍스트 i 는 클러스터 i % 4 (뒤섞인 순서로 처음 나온다)
+    order = [2, 0, 3, 1]
+
+    def fake_cluster(self, texts, prior=None):
+        return pd.DataFrame({"text": texts, "embd": [np.zeros(2)] * len(texts),
+                             "cluster": [np.array([float(order[i % 4])]) for i in range(len(texts))]})
+
+    monkeypatch.setattr(Raptor, "embed_cluster_texts", fake_cluster)
+    monkeypatch.setattr(rag, "SUMMARY_BACKOFF", 0.0)
+
+    def make(llm, **kwargs):
+        return Raptor(llm.model, None, store=RaptorStore(str(tmp_path / "trees.sqlite")), **kwargs)
+    return make
+
+
+def _context(cluster):
+    return "--- --- \n --- --- ".join(t for i, t in enumerate(TEXTS) if [2, 0, 3, 1][i % 4] == cluster)
+
+
+def test_summaries_follow_cluster_order_under_concurrency(raptor):
+    llm = FakeLLM(delay=0.05)
+    _, df_summary = raptor(llm, summary_concurrency=4).embed_cluster_summarize_texts(TEXTS, 1)
+    assert list(df_summary["cluster"]) == [2.0, 0.0, 3.0, 1.0]
+    assert list(df_summary["summaries"]) == [f"summary of {_context(c)}" for c in [2, 0, 3, 1]]
+
+
+def test_only_transient_failures_are_resent(raptor):
+    llm = FakeLLM(fail={_context(0): [_timeout()], _context(3): [_gateway_error(), _timeout()]})
+    _, df_summary = raptor(llm).embed_cluster_summarize_texts(TEXTS, 1)
+    assert list(df_summary["summaries"]) == [f"summary of {_context(c)}" for c in [2, 0, 3, 1]]
+    assert sorted(llm.calls.count(_context(c)) for c in range(4)) == [1, 1, 2, 3]
+
+
+def test_successes_are_stored_before_a_fatal_error(raptor):
+    llm = FakeLLM(fail={_context(1): [ValueError("bad request")]})
+    with pytest.raises(ValueError):
+        raptor(llm).embed_cluster_summarize_texts(TEXTS, 1)
+    assert len(llm.calls) == 4  # 재시도하지 않는다
+
+    # 다시 돌리면 실패했던 클러스터만 요청한다
+    retry = FakeLLM()
+    raptor(retry).embed_cluster_summarize_texts(TEXTS, 1)
+    assert retry.calls == [_context(1)]
+
+
+def test_attempts_are_bounded(raptor):
+    llm = FakeLLM(fail={_context(2): [_timeout()] * 10})
+    with pytest.raises(openai.APITimeoutError):
+        raptor(llm, summary_attempts=3).embed_cluster_summarize_texts(TEXTS, 1)
+    assert llm.calls.count(_context(2)) == 3
+
+
+# --- 증분 트리: 실제 임베딩 → 클러스터링 → 요약 경로 (임베딩 · LLM 만 가짜) ---
+TOPICS = ["revenue", "supply", "litigation", "cyber"]
+FILING = "\n\n".join(f"{TOPICS[i % 4]} risk paragraph {i}" for i in range(32))
+
+
+class ParagraphSplitter:
+    # tiktoken 인코딩은 네트워크로 받아야 하므로 테스트에서는 문단 단위로 나눈다
+    def __init__(self, chunk_size, **kwargs):
+        self.chunk_size = chunk_size
+
+    def split_text(self, text):
+        return text.split("\n\n")
+
+
+class TopicEmbeddings:
+    # 주제 단어 빈도 + 텍스트마다 고정된 작은 잡음
+    def embed_documents(self, texts):
+        vectors = []
+        for text in texts:
+            rng = np.random.default_rng(int(rag.text_hash(text)[:8], 16))
+            counts = np.array([text.count(t) for t in TOPICS], dtype=float)
+            vectors.append(np.concatenate([counts / counts.sum(), 0.01 * rng.normal(size=12)]))
+        return vectors
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag.RecursiveCharacterTextSplitter, "from_tiktoken_encoder",
+                        classmethod(lambda cls, chunk_size, chunk_overlap: ParagraphSplitter(chunk_size)))
+    store = RaptorStore(str(tmp_path / "trees.sqlite"))
+
+    def run(text, key):
+        llm = FakeLLM(delay=0.0)
+        raptor = Raptor(llm.model, TopicEmbeddings(), cluster_search="coarse", reduction="pca",
+                        seed=RANDOM_SEED, store=store)
+        texts = raptor.text_spliter(text, tree_key=key)
+        return texts, llm.calls, store.load_tree(key)
+    return run
+
+
+@pytest.mark.parametrize("accession", ["0000320193-25-000079", "0000320193-26-000012"])
+def test_one_changed_chunk_resummarizes_only_its_clusters(build, accession):
+    _, first_calls, first = build(FILING, ("AAPL", "10-K", "0000320193-25-000079", "1A"))
+    assert len(first["levels"]) > 1
+
+    # 같은 공시를 고쳐 쓴 경우와 다음 해 공시(새 accession) 모두 이전 트리에서 시작한다
+    changed = FILING.replace("supply risk paragraph 5", "supply risk paragraph 5, now with tariffs")
+    texts, calls, tree = build(changed, ("AAPL", "10-K", accession, "1A"))
+    assert "supply risk paragraph 5, now with tariffs" in texts
+
+    # 바뀐 청크는 레벨마다 클러스터 하나에만 영향을 주고, 나머지 요약은 이전 트리의 것 그대로다
+    assert len(calls) == len(tree["levels"]) < len(first_calls)
+    assert all("tariffs" in context for context in calls)
+    for old, new in zip(first["levels"], tree["levels"]):
+        assert len(set(new["summaries"]) - set(old["summaries"])) == 1
+        assert old["summary_clusters"] == new["summary_clusters"]
@@ -0,0 +1,50 @@
+# 스크리너 조건식: 컬럼명 · 숫자 · 문자열 · 비교/논리 연산자만 통과해야 한다
+import pandas as pd
+import pytest
+
+from utils.screener import screen, validate_query
+
+COLUMNS = ["ticker", "sector", "RSI", "MACD_hist", "BB_Position", "GoldenCross"]
+TABLE = pd.DataFrame({
+    "ticker": ["AAA", "BBB", "CCC"],
+    "sector": ["Energy", "Energy", "Technology"],
+    "RSI": [25.0, 55.0, 28.0],
+    "MACD_hist": [0.5, -0.2, 0.1],
+    "BB_Position": [0.1, 0.6, 0.3],
+    "GoldenCross": [True, False, True],
+})
+
+
+@pytest.mark.parametrize("expr", [
+    "RSI < 30 and GoldenCross and BB_Position < 0.2",
+    "sector = 'Energy' and MACD_hist > 0",
+    "not GoldenCross or RSI between 20 and 40",
+    "sector in ('Energy', 'Technology') and BB_Position is not null",
+    "(RSI >= 30) or (MACD_hist <> -0.2)",
+])
+def test_validate_query_accepts_conditions(expr):
+    assert validate_query(expr, COLUMNS) == expr
+
+
+@pytest.mark.parametrize("expr", [
+    "RSI < 30; DROP TABLE indicators",                   # 허용되지 않는 문자
+    "RSI < 30 -- comment",                               # 주석
+    "RSI < 30 /* x */",
+    "read_csv('/etc/passwd') is not null",               # 함수 호출
+    "RSI < (SELECT max(RSI) FROM indicators)",           # 다른 키워드 / 서브쿼리
+    "ticker = \"AAA\"",                                  # 큰따옴표 식별자
+    "Volume > 0",                                        # 없는 컬럼
+])
+def test_validate_query_rejects(expr):
+    with pytest.raises(ValueError):
+        validate_query(expr, COLUMNS)
+
+
+def test_screen_filters_and_orders():
+    result = screen("RSI < 30 and GoldenCross", TABLE, order_by="RSI desc")
+    assert result["ticker"].tolist() == ["CCC", "AAA"]
+
+
+def test_screen_rejects_bad_order_by():
+    with pytest.raises(ValueError):
+        screen("true", TABLE, order_by="RSI; DROP")
@@ -0,0 +1,79 @@
+# 메인 챗봇의 캐시 범위: 질문에 나온 종목(없으면 시장 질문 "", 여럿이면 정렬한 묶음)끼리만 답변을 공유한다
+import re
+import threading
+
+import numpy as np
+import pytest
+
+from utils import chatbot, semantic_cache
+from utils.semantic_cache import prompt_ticker
+
+KNOWN = ["AAPL", "MSFT", "TSLA", "BRK-B", "ON"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("AAPL 실적 전망 알려줘", "AAPL"),
+    ("TSLA는 왜 떨어졌어?", "TSLA"),            # 한글 조사가 바로 붙은 경우
+    ("$MSFT 배당 얼마야", "MSFT"),
+    ("BRK.B 지금 사도 될까", "BRK-B"),
+    ("AAPL 이랑 AAPL 비교", "AAPL"),
+    ("오늘 시장 어때?", ""),                    # 종목 없음 → 시장 질문
+    ("MSFT vs AAPL 어느 쪽이 나아?", "AAPL,MSFT"),
+    ("AAPL vs MSFT 어느 쪽이 나아?", "AAPL,MSFT"),
+    ("CPI 발표 이후 FOMC 전망", ""),             # 목록에 없는 대문자 약어
+    ("apple 이랑 on semi", ""),                 # 소문자는 티커로 보지 않는다
+])
+def test_prompt_ticker(text, expected):
+    assert prompt_ticker(text, KNOWN) == expected
+
+
+class FakeGateway:
+    def __init__(self):
+        self.calls = 0
+
+    def stream(self, messages, **kwargs):
+        self.calls += 1
+        yield from ["시장은 ", "강보합입니다."]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    # 티커를 뺀 질문 문장마다 고정된 단위 벡터 (임베딩 모델 없이). 종목만 다른 질문은 같은 벡터가 된다
+    def fake_embed(text):
+        rng = np.random.default_rng(abs(hash(" ".join(re.sub(r"[$A-Z.-]+", " ", text).split()))) % 2**32)
+        vec = rng.normal(size=8).astype(np.float32)
+        return vec / np.linalg.norm(vec)
+
+    monkeypatch.setattr(semantic_cache, "SEMANTIC_CACHE_PATH", str(tmp_path / "semantic.sqlite"))
+    monkeypatch.setattr(semantic_cache, "_local", threading.local())
+    monkeypatch.setattr(semantic_cache, "embed", fake_embed)
+    gateway = FakeGateway()
+    monkeypatch.setattr(chatbot, "get_gateway", lambda: gateway)
+    return gateway
+
+
+def _ask(question):
+    return "".join(chatbot.chatbot_response_stream(question, ticker=prompt_ticker(question, KNOWN)))
+
+
+def test_market_question_is_served_from_cache(cache):
+    first = _ask("오늘 시장 어때?")
+    assert _ask("오늘  시장 어때?") == first
+    assert cache.calls == 1
+
+
+def test_scopes_do_not_share_answers(cache):
+    _ask("AAPL 어때?")
+    _ask("MSFT 어때?")
+    _ask("AAPL vs MSFT 어때?")
+    assert _ask("MSFT vs AAPL 어때?") == "시장은 강보합입니다."
+    assert cache.calls == 3  # 문장이 같아도 종목이 다르면 새로 묻고, 같은 종목 묶음인 마지막 질문만 캐시에서 나온다
+
+
+def test_invalidate_covers_multi_ticker_answers(cache):
+    _ask("AAPL vs MSFT 어때?")
+    _ask("TSLA 어때?")
+    _ask("오늘 시장 어때?")
+    assert semantic_cache.invalidate(tickers=["MSFT"]) == 1
+    assert semantic_cache.invalidate(tickers=[""]) == 1
+    assert semantic_cache.invalidate() == 1
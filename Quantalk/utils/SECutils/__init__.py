@@ -1,2 +1,4 @@
 from SECutils.earning_calls import get_earnings_transcript, extract_speakers
-from SECutils.rag import Raptor
\ No newline at end of file
+from SECutils.rag import Raptor
+from SECutils.embedding_cache import EmbeddingCache, CachedEmbeddings
+from SECutils.raptor_store import RaptorStore
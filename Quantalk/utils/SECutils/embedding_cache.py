@@ -0,0 +1,244 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from filelock import FileLock
+from langchain_core.embeddings import Embeddings
+
+
+EMBEDDING_CACHE_DIR = os.getenv("QUANTALK_EMBEDDING_CACHE_DIR", "./cache/embeddings")
+EMBED_BATCH_SIZE = 64  # Texts sent to the embedding model per call
+
+
+def text_hash(text: str) -> str:
+    """Content address of a text (sha256 of its UTF-8 bytes)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def model_name_of(embeddings) -> str:
+    """Best-effort model name of a LangChain embeddings object (used as part of the cache key)."""
+    for attr in ("model_name", "model", "model_id", "deployment"):
+        name = getattr(embeddings, attr, None)
+        if isinstance(name, str) and name:
+            return name
+    return type(embeddings).__name__
+
+
+class EmbeddingCache:
+    """
+    Disk-backed embedding cache keyed by (model name, text hash).
+
+    Vectors of each model are appended to one float32 matrix file that readers open as a numpy memmap,
+    so several processes share the same vectors without loading them. A SQLite index maps
+    (model, hash) to a row of that matrix. Writers append under a file lock and commit the index rows
+    only after the vectors are on disk, so readers never see a row that is not written yet.
+    """
+
+    def __init__(self, cache_dir: str = EMBEDDING_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._maps: Dict[str, np.memmap] = {}
+        self.hits = self.misses = 0
+
+    # --- storage ---
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.cache_dir, "index.sqlite"), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS models (model TEXT PRIMARY KEY, file TEXT, dim INTEGER, n_rows INTEGER);
+                CREATE TABLE IF NOT EXISTS vectors (
+                    model TEXT, hash TEXT, row INTEGER, PRIMARY KEY (model, hash)) WITHOUT ROWID;
+            """)
+            self._local.conn = conn
+        return conn
+
+    def _model_info(self, model: str):
+        return self._conn().execute("SELECT file, dim, n_rows FROM models WHERE model = ?", (model,)).fetchone()
+
+    def _matrix(self, model: str, file: str, dim: int, n_rows: int) -> np.memmap:
+        """Read-only memmap covering at least n_rows rows (re-opened when the file has grown)."""
+        with self._lock:
+            mm = self._maps.get(model)
+            if mm is None or mm.shape[0] < n_rows:
+                mm = np.memmap(os.path.join(self.cache_dir, file), dtype=np.float32, mode="r", shape=(n_rows, dim))
+                self._maps[model] = mm
+            return mm
+
+    # --- lookup / store ---
+    def get(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached vectors.
+
+        Parameters:
+        - model: Embedding model name.
+        - hashes: Text hashes (see text_hash).
+
+        Returns:
+        - A dictionary mapping each cached hash to its float32 vector. Missing hashes are absent.
+        """
+        info = self._model_info(model)
+        if info is None or not hashes:
+            return {}
+        file, dim, n_rows = info
+        rows = {}
+        conn = self._conn()
+        unique = list(dict.fromkeys(hashes))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            query = f"SELECT hash, row FROM vectors WHERE model = ? AND hash IN ({','.join('?' * len(chunk))})"
+            rows.update(conn.execute(query, (model, *chunk)).fetchall())
+        if not rows:
+            return {}
+        # Another process may have committed rows after n_rows was read; their vectors are already on disk
+        n_rows = max(n_rows, max(rows.values()) + 1)
+        mm = self._matrix(model, file, dim, n_rows)
+        return {h: np.array(mm[r]) for h, r in rows.items()}
+
+    def put(self, model: str, hashes: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Append vectors for hashes that are not cached yet (hashes added meanwhile by another process are skipped).
+
+        Parameters:
+        - model: Embedding model name.
+        - hashes: Text hashes, one per row of vectors.
+        - vectors: Array of shape (len(hashes), dim).
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if len(hashes) == 0:
+            return
+        # Readable prefix plus a short hash so different model names never share a file
+        file = f"{re.sub(r'[^0-9A-Za-z._-]+', '_', model)[:40]}-{text_hash(model)[:8]}.f32"
+        with FileLock(os.path.join(self.cache_dir, file + ".lock")):
+            conn = self._conn()
+            info = self._model_info(model)
+            if info is None:
+                dim, n_rows = vectors.shape[1], 0
+            else:
+                file, dim, n_rows = info
+                if vectors.shape[1] != dim:
+                    raise ValueError(f"{model}: cached vectors have dimension {dim}, got {vectors.shape[1]}")
+            present = set(self.get(model, hashes))
+            new, seen = [], set()
+            for i, h in enumerate(hashes):
+                if h not in present and h not in seen:
+                    seen.add(h)
+                    new.append(i)
+            if not new:
+                return
+            path = os.path.join(self.cache_dir, file)
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            # Rows past n_rows (left by an interrupted writer) are not indexed and get overwritten
+            with open(path, "r+b") as f:
+                f.seek(n_rows * dim * 4)
+                f.write(vectors[new].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with conn:
+                conn.executemany(
+                    "INSERT INTO vectors (model, hash, row) VALUES (?, ?, ?)",
+                    [(model, hashes[i], n_rows + k) for k, i in enumerate(new)],
+                )
+                conn.execute(
+                    "INSERT INTO models (model, file, dim, n_rows) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(model) DO UPDATE SET n_rows = excluded.n_rows",
+                    (model, file, dim, n_rows + len(new)),
+                )
+
+    def all_vectors(self, model: str) -> np.ndarray:
+        """
+        Every cached vector of a model, in the order they were added.
+
+        Returns:
+        - float32 array of shape (n_cached, dim); empty if nothing is cached for the model.
+        """
+        info = self._model_info(model)
+        if info is None or info[2] == 0:
+            return np.empty((0, 0), dtype=np.float32)
+        file, dim, n_rows = info
+        return np.array(self._matrix(model, file, dim, n_rows)[:n_rows])
+
+    def record(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self) -> dict:
+        """Lookup counters of this process and the number of cached vectors per model."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {"hits": self.hits, "misses": self.misses,
+                     "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0}
+        stats["models"] = dict(self._conn().execute("SELECT model, n_rows FROM models").fetchall())
+        return stats
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LangChain embeddings wrapper that serves repeated texts from an EmbeddingCache.
+
+    Only texts missing from the cache are sent to the wrapped model, in batches of batch_size.
+    Works anywhere a LangChain Embeddings object is expected (Raptor, Chroma, FAISS).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache: Optional[EmbeddingCache] = None,
+        model_name: Optional[str] = None,
+        batch_size: int = EMBED_BATCH_SIZE,
+    ):
+        self.embeddings = embeddings
+        self.cache = cache or EmbeddingCache()
+        self.model_name = model_name or model_name_of(embeddings)
+        self.batch_size = batch_size
+        self.embed_seconds = 0.0
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, computing only the ones missing from the cache.
+
+        Parameters:
+        - texts: List[str], texts to embed.
+
+        Returns:
+        - numpy.ndarray: float32 array of shape (len(texts), dim), in the order of texts.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        hashes = [text_hash(t) for t in texts]
+        found = self.cache.get(self.model_name, hashes)
+
+        missing = list(dict.fromkeys(h for h in hashes if h not in found))
+        if missing:
+            text_of = dict(zip(hashes, texts))
+            start = time.monotonic()
+            for i in range(0, len(missing), self.batch_size):
+                batch = missing[i:i + self.batch_size]
+                vectors = np.asarray(
+                    self.embeddings.embed_documents([text_of[h] for h in batch]), dtype=np.float32
+                )
+                self.cache.put(self.model_name, batch, vectors)
+                found.update(zip(batch, vectors))
+            self.embed_seconds += time.monotonic() - start
+        self.cache.record(hits=len(hashes) - len(missing), misses=len(missing))
+        return np.stack([found[h] for h in hashes])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+    def stats(self) -> dict:
+        """Cache hit rate plus the time spent in the wrapped model."""
+        return {**self.cache.stats(), "embed_seconds": round(self.embed_seconds, 3)}
@@ -1,21 +1,188 @@
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-import umap
+from joblib import Parallel, delayed, effective_n_jobs
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from sklearn.mixture import GaussianMixture
+from sklearn.decomposition import PCA
+from sklearn.mixture import BayesianGaussianMixture, GaussianMixture
+from sklearn.random_projection import GaussianRandomProjection
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from llm_gateway import RETRYABLE
+from SECutils.embedding_cache import model_name_of, text_hash
+from SECutils.raptor_store import RaptorStore, tree_from_results, tree_memberships, tree_texts
+
 
 RANDOM_SEED = 224  # Fixed seed for reproducibility
+CLUSTER_SEARCHES = ("exhaustive", "coarse", "bayesian")
+REDUCTIONS = ("umap", "pca", "random", "auto")
+AUTO_UMAP_MIN = 1000  # "auto" reduction uses PCA below this many embeddings and UMAP from here on
+CLUSTER_DIM = 10  # Dimensionality of the reduced space the texts are clustered in
+CLUSTER_THRESHOLD = 0.1  # GMM probability above which a text belongs to a cluster
+REUSE_MIN_SHARE = 0.5  # A rebuilt level keeps the previous clusters while at least this share of its texts is unchanged
+PARALLEL_MIN_CLUSTERS = 4  # Fewer local clusterings than this run in-process (worker round-trips cost more)
+SUMMARY_CONCURRENCY = 4  # Cluster summaries requested at the same time
+SUMMARY_ATTEMPTS = 5  # Rounds of summary requests; each round re-sends only the clusters that failed transiently
+SUMMARY_BACKOFF = 2.0  # Seconds before the second round, doubled every round (with jitter)
+
+
+def _is_retryable(err: BaseException) -> bool:
+    """True for rate limits and transient API errors, also when the LLM gateway wrapped them in an LLMError."""
+    while err is not None:
+        if isinstance(err, RETRYABLE):
+            return True
+        err = err.__cause__
+    return False
+
+
+def _gmm_bic(embeddings: np.ndarray, n_components: int, random_state: int) -> float:
+    """Fit one GaussianMixture and return its BIC (module level so it can run in worker processes)."""
+    gm = GaussianMixture(n_components=n_components, random_state=random_state)
+    gm.fit(embeddings)
+    return gm.bic(embeddings)
+
+
+def resolve_reduction(method: str, n_embeddings: int) -> str:
+    """The concrete backend for method: "auto" becomes "pca" below AUTO_UMAP_MIN embeddings and "umap" otherwise."""
+    if method == "auto":
+        return "pca" if n_embeddings < AUTO_UMAP_MIN else "umap"
+    return method
+
+
+def reduce_embeddings(
+    embeddings: np.ndarray,
+    dim: int,
+    method: str = "umap",
+    n_neighbors: int = 10,
+    metric: str = "cosine",
+    random_state: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Reduce embeddings to dim dimensions with the given backend.
+
+    Parameters:
+    - embeddings: The input embeddings as a numpy array.
+    - dim: The target dimensionality for the reduced space.
+    - method: "umap", "pca" (exact PCA), "random" (Gaussian random projection) or "auto"
+              (PCA below AUTO_UMAP_MIN embeddings, UMAP otherwise).
+    - n_neighbors: The number of neighbors to consider for each point (UMAP only).
+    - metric: The distance metric. For PCA and random projection, "cosine" L2-normalizes the rows first.
+    - random_state: Optional; seed for reproducibility.
+
+    Returns:
+    - A numpy array of the embeddings reduced to the specified dimensionality.
+    """
+    method = resolve_reduction(method, len(embeddings))
+    if method == "umap":
+        # Imported lazily: umap pulls in numba, which adds seconds to startup
+        import umap
+
+        return umap.UMAP(
+            n_neighbors=n_neighbors, n_components=dim, metric=metric, random_state=random_state
+        ).fit_transform(embeddings)
+
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    if metric == "cosine":
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms == 0, 1, norms)
+    if method == "pca":
+        n_components = min(dim, *embeddings.shape)
+        return PCA(n_components=n_components, random_state=random_state).fit_transform(embeddings)
+    if method == "random":
+        return GaussianRandomProjection(n_components=dim, random_state=random_state).fit_transform(embeddings)
+    raise ValueError(f"reduction must be one of {REDUCTIONS}, got {method!r}")
+
+
+def _local_membership_job(
+    embeddings: np.ndarray, dim: int, threshold: float, random_state: int, raptor_options: dict
+) -> np.ndarray:
+    """Local reduction and GMM clustering of one global cluster (module level so it can run in worker processes)."""
+    raptor = Raptor(None, None, **raptor_options)
+    return raptor.local_membership(embeddings, dim, threshold, random_state)
 
 
 class Raptor:
-    def __init__(self, model, embed):
+    def __init__(
+        self,
+        model,
+        embed,
+        cluster_search: str = "exhaustive",
+        search_budget: Optional[float] = None,
+        search_jobs: int = 1,
+        search_patience: Optional[int] = None,
+        cluster_jobs: int = 1,
+        summary_concurrency: int = SUMMARY_CONCURRENCY,
+        summary_attempts: int = SUMMARY_ATTEMPTS,
+        store: Optional[RaptorStore] = None,
+        reduction: str = "umap",
+        seed: Optional[int] = None,
+    ):
+        """
+        Parameters:
+        - model: LangChain chat model used for the cluster summaries.
+        - embed: LangChain embeddings used for the texts.
+        - cluster_search: How get_optimal_clusters picks the number of clusters, one of CLUSTER_SEARCHES.
+        - search_budget: Optional; seconds each cluster-count search may spend before it stops fitting new candidates.
+        - search_jobs: Number of joblib workers fitting candidate GMMs in parallel (-1 uses all cores).
+        - search_patience: Optional; stop the scan after this many consecutive k without a lower BIC.
+        - cluster_jobs: Number of worker processes running the local clustering of the global clusters. The pool is
+                        started on first use and kept until close() (or the end of a with-block).
+        - summary_concurrency: Maximum number of cluster summaries requested concurrently within a level.
+        - summary_attempts: Rounds of summary requests per level. Summaries that failed with a rate limit or a
+                            transient API error are re-sent in the next round (exponential backoff with jitter);
+                            other errors are raised at once. Finished summaries are stored either way.
+        - store: Optional; RaptorStore for saved trees and cached cluster summaries.
+        - reduction: Dimensionality-reduction backend, one of REDUCTIONS (see reduce_embeddings).
+        - seed: Optional; seed for reproducible clustering (e.g. RANDOM_SEED). The global reduction and GMM use
+                seed and global cluster i uses seed + i, so the result does not depend on cluster_jobs; a seeded
+                UMAP fit runs single-threaded. None keeps unseeded reductions and GMM seed 0.
+        """
+        if cluster_search not in CLUSTER_SEARCHES:
+            raise ValueError(f"cluster_search must be one of {CLUSTER_SEARCHES}, got {cluster_search!r}")
+        if reduction not in REDUCTIONS:
+            raise ValueError(f"reduction must be one of {REDUCTIONS}, got {reduction!r}")
         self.model = model
         self.embd = embed
+        self.cluster_search = cluster_search
+        self.search_budget = search_budget
+        self.search_jobs = search_jobs
+        self.search_patience = search_patience
+        self.cluster_jobs = cluster_jobs
+        self.summary_concurrency = summary_concurrency
+        self.summary_attempts = summary_attempts
+        self.store = store
+        self.reduction = reduction
+        self.seed = seed
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_workers = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the local-clustering worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_workers = 0
+
+    def _worker_pool(self, n_jobs: int) -> ProcessPoolExecutor:
+        """The local-clustering process pool, started once and reused by every perform_clustering call (and level)."""
+        if self._pool is None or self._pool_workers != n_jobs:
+            self.close()
+            # spawn: the parent may hold threads (HTTP clients, Streamlit) that are unsafe to fork
+            self._pool = ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context("spawn"))
+            self._pool_workers = n_jobs
+        return self._pool
 
     def global_cluster_embeddings(
         self,
@@ -23,49 +190,64 @@ class Raptor:
         dim: int,
         n_neighbors: Optional[int] = None,
         metric: str = "cosine",
+        random_state: Optional[int] = None,
+        reduction: Optional[str] = None,
     ) -> np.ndarray:
         """
-        Perform global dimensionality reduction on the embeddings using UMAP.
+        Perform global dimensionality reduction on the embeddings with the configured backend (UMAP by default).
 
         Parameters:
         - embeddings: The input embeddings as a numpy array.
         - dim: The target dimensionality for the reduced space.
         - n_neighbors: Optional; the number of neighbors to consider for each point.
                     If not provided, it defaults to the square root of the number of embeddings.
-        - metric: The distance metric to use for UMAP.
+        - metric: The distance metric to use for the reduction.
+        - random_state: Optional; seed for a reproducible (single-threaded for UMAP) fit.
+        - reduction: Optional; backend to use instead of self.reduction.
 
         Returns:
         - A numpy array of the embeddings reduced to the specified dimensionality.
         """
         if n_neighbors is None:
             n_neighbors = int((len(embeddings) - 1) ** 0.5)
-        return umap.UMAP(
-            n_neighbors=n_neighbors, n_components=dim, metric=metric
-        ).fit_transform(embeddings)
+        return reduce_embeddings(embeddings, dim, reduction or self.reduction, n_neighbors, metric, random_state)
 
 
     def local_cluster_embeddings(
-        self, embeddings: np.ndarray, dim: int, num_neighbors: int = 10, metric: str = "cosine"
+        self,
+        embeddings: np.ndarray,
+        dim: int,
+        num_neighbors: int = 10,
+        metric: str = "cosine",
+        random_state: Optional[int] = None,
+        reduction: Optional[str] = None,
     ) -> np.ndarray:
         """
-        Perform local dimensionality reduction on the embeddings using UMAP, typically after global clustering.
+        Perform local dimensionality reduction on the embeddings with the configured backend, typically after global clustering.
 
         Parameters:
         - embeddings: The input embeddings as a numpy array.
         - dim: The target dimensionality for the reduced space.
         - num_neighbors: The number of neighbors to consider for each point.
-        - metric: The distance metric to use for UMAP.
+        - metric: The distance metric to use for the reduction.
+        - random_state: Optional; seed for a reproducible (single-threaded for UMAP) fit.
+        - reduction: Optional; backend to use instead of self.reduction.
 
         Returns:
         - A numpy array of the embeddings reduced to the specified dimensionality.
         """
-        return umap.UMAP(
-            n_neighbors=num_neighbors, n_components=dim, metric=metric
-        ).fit_transform(embeddings)
+        return reduce_embeddings(embeddings, dim, reduction or self.reduction, num_neighbors, metric, random_state)
 
 
     def get_optimal_clusters(
-        self, embeddings: np.ndarray, max_clusters: int = 50, random_state: int = RANDOM_SEED
+        self,
+        embeddings: np.ndarray,
+        max_clusters: int = 50,
+        random_state: int = RANDOM_SEED,
+        search: Optional[str] = None,
+        time_budget: Optional[float] = None,
+        n_jobs: Optional[int] = None,
+        patience: Optional[int] = None,
     ) -> int:
         """
         Determine the optimal number of clusters using the Bayesian Information Criterion (BIC) with a Gaussian Mixture Model.
@@ -74,23 +256,97 @@ class Raptor:
         - embeddings: The input embeddings as a numpy array.
         - max_clusters: The maximum number of clusters to consider.
         - random_state: Seed for reproducibility.
+        - search: "exhaustive" fits every k from 1 to max_clusters - 1, "coarse" fits a grid of k and then
+                  refines around the best one, "bayesian" fits a single variational (Dirichlet process) GMM
+                  and counts the components it actually uses. Defaults to self.cluster_search.
+        - time_budget: Optional; seconds after which no new candidate fits are started. Defaults to self.search_budget.
+        - n_jobs: Number of joblib workers for the candidate fits. Defaults to self.search_jobs.
+        - patience: Optional; stop the scan after this many consecutive k without a lower BIC. Defaults to self.search_patience.
 
         Returns:
         - An integer representing the optimal number of clusters found.
         """
+        search = search or self.cluster_search
+        time_budget = self.search_budget if time_budget is None else time_budget
+        n_jobs = self.search_jobs if n_jobs is None else n_jobs
+        patience = self.search_patience if patience is None else patience
+        deadline = None if time_budget is None else time.monotonic() + time_budget
+
         max_clusters = min(max_clusters, len(embeddings))
-        n_clusters = np.arange(1, max_clusters)
-        bics = []
-        for n in n_clusters:
-            gm = GaussianMixture(n_components=n, random_state=random_state)
-            gm.fit(embeddings)
-            bics.append(gm.bic(embeddings))
-        return n_clusters[np.argmin(bics)]
+        n_clusters = np.arange(1, max(max_clusters, 2))
+
+        if search == "bayesian":
+            # Diagonal covariances keep the many unused components from overfitting small clusters
+            bgm = BayesianGaussianMixture(
+                n_components=n_clusters[-1],
+                covariance_type="diag",
+                weight_concentration_prior_type="dirichlet_process",
+                max_iter=500,
+                random_state=random_state,
+            )
+            bgm.fit(embeddings)
+            return max(1, len(np.unique(bgm.predict(embeddings))))
+
+        if search == "coarse":
+            # Coarse grid first, then every k between the neighbours of the best grid point
+            step = max(1, int(np.sqrt(len(n_clusters))))
+            bics = self._scan_bics(embeddings, n_clusters[::step], random_state, n_jobs, deadline)
+            best = min(bics, key=bics.get)
+            fine = [k for k in n_clusters if abs(k - best) < step and k not in bics]
+            bics.update(self._scan_bics(embeddings, fine, random_state, n_jobs, deadline, required=False))
+        else:
+            bics = self._scan_bics(embeddings, n_clusters, random_state, n_jobs, deadline, patience=patience)
+        return min(bics, key=bics.get)
+
+
+    @staticmethod
+    def _scan_bics(
+        embeddings: np.ndarray,
+        candidates,
+        random_state: int,
+        n_jobs: int,
+        deadline: Optional[float] = None,
+        patience: Optional[int] = None,
+        required: bool = True,
+    ) -> Dict[int, float]:
+        """
+        Fit a GMM for each candidate number of clusters, in increasing order and in batches of n_jobs.
 
+        Parameters:
+        - embeddings: The input embeddings as a numpy array.
+        - candidates: The numbers of clusters to try.
+        - random_state: Seed for reproducibility.
+        - n_jobs: Number of joblib workers; 1 fits in this process.
+        - deadline: Optional; time.monotonic() value after which no new batch is started.
+        - patience: Optional; stop after this many consecutive candidates without a lower BIC.
+        - required: Whether the first batch runs even when the deadline has already passed.
 
-    def GMM_cluster(self, embeddings: np.ndarray, threshold: float, random_state: int = 0):
+        Returns:
+        - A dictionary mapping each fitted number of clusters to its BIC.
         """
-        Cluster embeddings using a Gaussian Mixture Model (GMM) based on a probability threshold.
+        candidates = [int(k) for k in candidates]
+        batch = max(1, effective_n_jobs(n_jobs))
+        bics = {}
+        with Parallel(n_jobs=n_jobs) as parallel:
+            for start in range(0, len(candidates), batch):
+                if deadline is not None and time.monotonic() >= deadline and (bics or not required):
+                    break
+                ks = candidates[start:start + batch]
+                if batch == 1:
+                    results = [_gmm_bic(embeddings, ks[0], random_state)]
+                else:
+                    results = parallel(delayed(_gmm_bic)(embeddings, k, random_state) for k in ks)
+                bics.update(zip(ks, results))
+                if patience is not None:
+                    best = min(bics, key=bics.get)
+                    if ks[-1] - best >= patience:
+                        break
+        return bics
+
+
+    def GMM_membership(self, embeddings: np.ndarray, threshold: float, random_state: int = 0):
+        """
+        Cluster embeddings using a Gaussian Mixture Model (GMM) and return a boolean membership matrix.
 
         Parameters:
         - embeddings: The input embeddings as a numpy array.
@@ -98,21 +354,71 @@ class Raptor:
         - random_state: Seed for reproducibility.
 
         Returns:
-        - A tuple containing the cluster labels and the number of clusters determined.
+        - A tuple containing a boolean array of shape (n_embeddings, n_clusters), where entry [i, j] is True
+          if embedding i belongs to cluster j, and the number of clusters determined.
         """
         n_clusters = self.get_optimal_clusters(embeddings)
         gm = GaussianMixture(n_components=n_clusters, random_state=random_state)
         gm.fit(embeddings)
-        probs = gm.predict_proba(embeddings)
-        labels = [np.where(prob > threshold)[0] for prob in probs]
+        return gm.predict_proba(embeddings) > threshold, n_clusters
+
+
+    def GMM_cluster(self, embeddings: np.ndarray, threshold: float, random_state: int = 0):
+        """
+        Cluster embeddings using a Gaussian Mixture Model (GMM) based on a probability threshold.
+
+        Parameters:
+        - embeddings: The input embeddings as a numpy array.
+        - threshold: The probability threshold for assigning an embedding to a cluster.
+        - random_state: Seed for reproducibility.
+
+        Returns:
+        - A tuple containing the cluster labels and the number of clusters determined.
+        """
+        membership, n_clusters = self.GMM_membership(embeddings, threshold, random_state)
+        labels = [np.flatnonzero(row) for row in membership]
         return labels, n_clusters
 
 
+    def local_membership(
+        self,
+        embeddings: np.ndarray,
+        dim: int,
+        threshold: float,
+        random_state: Optional[int] = None,
+        reduction: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Cluster the members of one global cluster: local dimensionality reduction followed by GMM clustering.
+
+        Parameters:
+        - embeddings: The embeddings of the global cluster's members.
+        - dim: The target dimensionality of the reduced space.
+        - threshold: The probability threshold for assigning an embedding to a cluster in GMM.
+        - random_state: Optional; seed for both the reduction and the GMM fit (None: unseeded reduction, GMM seed 0).
+        - reduction: Optional; backend to use instead of self.reduction.
+
+        Returns:
+        - A boolean membership array of shape (n_embeddings, n_local_clusters).
+        """
+        if len(embeddings) <= dim + 1:
+            # Handle small clusters with direct assignment
+            return np.ones((len(embeddings), 1), dtype=bool)
+        reduced_embeddings_local = self.local_cluster_embeddings(
+            embeddings, dim, random_state=random_state, reduction=reduction
+        )
+        membership, _ = self.GMM_membership(
+            reduced_embeddings_local, threshold, 0 if random_state is None else random_state
+        )
+        return membership
+
+
     def perform_clustering(
         self,
         embeddings: np.ndarray,
         dim: int,
         threshold: float,
+        n_jobs: Optional[int] = None,
     ) -> List[np.ndarray]:
         """
         Perform clustering on the embeddings by first reducing their dimensionality globally, then clustering
@@ -120,8 +426,13 @@ class Raptor:
 
         Parameters:
         - embeddings: The input embeddings as a numpy array.
-        - dim: The target dimensionality for UMAP reduction.
+        - dim: The target dimensionality of the reduced space.
         - threshold: The probability threshold for assigning an embedding to a cluster in GMM.
+        - n_jobs: Optional; number of worker processes for the local clustering. Defaults to self.cluster_jobs.
+                  With a seed (see __init__) the result does not depend on n_jobs. Levels with fewer than
+                  PARALLEL_MIN_CLUSTERS local clusterings run in-process.
+        An "auto" reduction is resolved once from the number of embeddings, and the global and local steps all use
+        that backend.
 
         Returns:
         - A list of numpy arrays, where each array contains the cluster IDs for each embedding.
@@ -129,55 +440,83 @@ class Raptor:
         if len(embeddings) <= dim + 1:
             # Avoid clustering when there's insufficient data
             return [np.array([0]) for _ in range(len(embeddings))]
+        n_jobs = self.cluster_jobs if n_jobs is None else n_jobs
+        reduction = resolve_reduction(self.reduction, len(embeddings))
 
         # Global dimensionality reduction
-        reduced_embeddings_global = self.global_cluster_embeddings(embeddings, dim)
-        # Global clustering
-        global_clusters, n_global_clusters = self.GMM_cluster(
-            reduced_embeddings_global, threshold
+        reduced_embeddings_global = self.global_cluster_embeddings(
+            embeddings, dim, random_state=self.seed, reduction=reduction
+        )
+        # Global clustering: boolean membership matrix (n_embeddings, n_global_clusters)
+        global_membership, n_global_clusters = self.GMM_membership(
+            reduced_embeddings_global, threshold, 0 if self.seed is None else self.seed
         )
 
-        all_local_clusters = [np.array([]) for _ in range(len(embeddings))]
+        # Indices of the embeddings belonging to each (non-empty) global cluster, with its seed (None if unseeded)
+        global_clusters = [
+            (np.flatnonzero(global_membership[:, i]), None if self.seed is None else self.seed + i)
+            for i in range(n_global_clusters)
+        ]
+        global_clusters = [(idx, seed) for idx, seed in global_clusters if len(idx) > 0]
+
+        # Local clustering within each global cluster; the clusters are independent, so they can run in parallel
+        large = [k for k, (idx, _) in enumerate(global_clusters) if len(idx) > dim + 1]
+        local_memberships = {}
+        if n_jobs > 1 and len(large) >= PARALLEL_MIN_CLUSTERS:
+            raptor_options = {
+                "cluster_search": self.cluster_search,
+                "search_budget": self.search_budget,
+                "search_jobs": self.search_jobs,
+                "search_patience": self.search_patience,
+                "reduction": reduction,
+            }
+            pool = self._worker_pool(n_jobs)
+            futures = {
+                k: pool.submit(
+                    _local_membership_job,
+                    embeddings[global_clusters[k][0]], dim, threshold, global_clusters[k][1], raptor_options,
+                )
+                for k in large
+            }
+            local_memberships = {k: future.result() for k, future in futures.items()}
+
+        # (embedding index, cluster id) pairs, collected per global cluster
+        member_rows, member_ids = [], []
         total_clusters = 0
 
-        # Iterate through each global cluster to perform local clustering
-        for i in range(n_global_clusters):
-            # Extract embeddings belonging to the current global cluster
-            global_cluster_embeddings_ = embeddings[
-                np.array([i in gc for gc in global_clusters])
-            ]
-
-            if len(global_cluster_embeddings_) == 0:
-                continue
-            if len(global_cluster_embeddings_) <= dim + 1:
-                # Handle small clusters with direct assignment
-                local_clusters = [np.array([0]) for _ in global_cluster_embeddings_]
-                n_local_clusters = 1
-            else:
-                # Local dimensionality reduction and clustering
-                reduced_embeddings_local = self.local_cluster_embeddings(
-                    global_cluster_embeddings_, dim
-                )
-                local_clusters, n_local_clusters = self.GMM_cluster(
-                    reduced_embeddings_local, threshold
-                )
+        for k, (global_idx, seed) in enumerate(global_clusters):
+            local_membership = local_memberships.get(k)
+            if local_membership is None:
+                local_membership = self.local_membership(embeddings[global_idx], dim, threshold, seed, reduction)
 
-            # Assign local cluster IDs, adjusting for total clusters already processed
-            for j in range(n_local_clusters):
-                local_cluster_embeddings_ = global_cluster_embeddings_[
-                    np.array([j in lc for lc in local_clusters])
-                ]
-                indices = np.where(
-                    (embeddings == local_cluster_embeddings_[:, None]).all(-1)
-                )[1]
-                for idx in indices:
-                    all_local_clusters[idx] = np.append(
-                        all_local_clusters[idx], j + total_clusters
-                    )
+            # Map local rows back to global indices, offsetting local cluster IDs by the clusters already processed
+            rows, cols = np.nonzero(local_membership)
+            member_rows.append(global_idx[rows])
+            member_ids.append(cols + total_clusters)
+            total_clusters += local_membership.shape[1]
 
-            total_clusters += n_local_clusters
+        return self._group_cluster_ids(member_rows, member_ids, len(embeddings))
 
-        return all_local_clusters
+
+    @staticmethod
+    def _group_cluster_ids(member_rows, member_ids, n):
+        """
+        Group (embedding index, cluster id) pairs into one array of cluster IDs per embedding.
+
+        Parameters:
+        - member_rows: List of integer arrays with embedding indices.
+        - member_ids: List of integer arrays with the matching cluster IDs.
+        - n: The number of embeddings.
+
+        Returns:
+        - A list of n float arrays with each embedding's cluster IDs in increasing order
+          (empty for embeddings that were not assigned to any cluster).
+        """
+        rows = np.concatenate(member_rows) if member_rows else np.empty(0, dtype=int)
+        ids = np.concatenate(member_ids) if member_ids else np.empty(0, dtype=int)
+        order = np.lexsort((ids, rows))
+        counts = np.bincount(rows, minlength=n)
+        return np.split(ids[order].astype(float), np.cumsum(counts)[:-1])
 
 
     ### --- Our code below --- ###
@@ -196,12 +535,53 @@ class Raptor:
         Returns:
         - numpy.ndarray: An array of embeddings for the given text documents.
         """
+        if hasattr(self.embd, "embed_array"):
+            # CachedEmbeddings: cached vectors come back as an array without a list round-trip
+            return self.embd.embed_array(texts)
         text_embeddings = self.embd.embed_documents(texts)
         text_embeddings_np = np.array(text_embeddings)
         return text_embeddings_np
 
 
-    def embed_cluster_texts(self, texts):
+    def assign_clusters(
+        self, texts: List[str], embeddings: np.ndarray, prior: Dict[str, List[int]]
+    ) -> Optional[List[np.ndarray]]:
+        """
+        Cluster texts by reusing a previous build's clusters: unchanged texts keep their cluster IDs and every new
+        text joins the cluster whose centroid (mean of the unchanged members' embeddings) is most cosine-similar.
+
+        Parameters:
+        - texts: List[str], the texts to cluster.
+        - embeddings: The texts' embeddings.
+        - prior: Previous cluster IDs by text hash (see raptor_store.tree_memberships).
+
+        Returns:
+        - Cluster IDs per text, in the format of perform_clustering, or None when fewer than REUSE_MIN_SHARE of
+          the texts are unchanged (the previous clusters no longer describe the texts).
+        """
+        known = [prior.get(text_hash(t)) for t in texts]
+        n_known = sum(ids is not None for ids in known)
+        if n_known == 0 or n_known < REUSE_MIN_SHARE * len(texts):
+            return None
+
+        unit = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        cluster_ids = sorted({c for ids in known if ids is not None for c in ids})
+        members = {c: [] for c in cluster_ids}
+        for i, ids in enumerate(known):
+            for c in ids or ():
+                members[c].append(i)
+        centroids = np.stack([unit[members[c]].mean(axis=0) for c in cluster_ids])
+
+        labels = []
+        for i, ids in enumerate(known):
+            if ids is None:
+                ids = [cluster_ids[int(np.argmax(centroids @ unit[i]))]]
+            labels.append(np.array(sorted(ids), dtype=float))
+        print(f"--Kept the clusters of {n_known} texts, assigned {len(texts) - n_known} new--")
+        return labels
+
+
+    def embed_cluster_texts(self, texts, prior=None):
         """
         Embeds a list of texts and clusters them, returning a DataFrame with texts, their embeddings, and cluster labels.
 
@@ -210,14 +590,18 @@ class Raptor:
 
         Parameters:
         - texts: List[str], a list of text documents to be processed.
+        - prior: Optional; cluster IDs of a previous build by text hash. When enough texts are unchanged the
+                 previous clusters are kept (see assign_clusters) instead of clustering from scratch.
 
         Returns:
         - pandas.DataFrame: A DataFrame containing the original texts, their embeddings, and the assigned cluster labels.
         """
         text_embeddings_np = self.embed(texts)  # Generate embeddings
-        cluster_labels = self.perform_clustering(
-            text_embeddings_np, 10, 0.1
-        )  # Perform clustering on the embeddings
+        cluster_labels = self.assign_clusters(texts, text_embeddings_np, prior) if prior else None
+        if cluster_labels is None:
+            cluster_labels = self.perform_clustering(
+                text_embeddings_np, CLUSTER_DIM, CLUSTER_THRESHOLD
+            )  # Perform clustering on the embeddings
         df = pd.DataFrame()  # Initialize a DataFrame to store the results
         df["text"] = texts  # Store original texts
         df["embd"] = list(text_embeddings_np)  # Store embeddings as a list in the DataFrame
@@ -240,7 +624,7 @@ class Raptor:
 
 
     def embed_cluster_summarize_texts(
-        self, texts: List[str], level: int
+        self, texts: List[str], level: int, prior: Optional[Dict[str, List[int]]] = None
     ) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """
         Embeds, clusters, and summarizes a list of texts. This function first generates embeddings for the texts,
@@ -250,6 +634,9 @@ class Raptor:
         Parameters:
         - texts: A list of text documents to be processed.
         - level: An integer parameter that could define the depth or detail of processing.
+        - prior: Optional; cluster IDs of a previous build of this level by text hash (see embed_cluster_texts).
+                 Clusters whose members are unchanged then have the same content, so their summaries come
+                 from the store.
 
         Returns:
         - Tuple containing two DataFrames:
@@ -259,23 +646,21 @@ class Raptor:
         """
 
         # Embed and cluster the texts, resulting in a DataFrame with 'text', 'embd', and 'cluster' columns
-        df_clusters = self.embed_cluster_texts(texts)
-
-        # Prepare to expand the DataFrame for easier manipulation of clusters
-        expanded_list = []
+        df_clusters = self.embed_cluster_texts(texts, prior)
 
-        # Expand DataFrame entries to document-cluster pairings for straightforward processing
-        for index, row in df_clusters.iterrows():
-            for cluster in row["cluster"]:
-                expanded_list.append(
-                    {"text": row["text"], "embd": row["embd"], "cluster": cluster}
-                )
-
-        # Create a new DataFrame from the expanded list
-        expanded_df = pd.DataFrame(expanded_list)
+        # Expand DataFrame entries to document-cluster pairings (one row per text and cluster)
+        n_memberships = df_clusters["cluster"].map(len).to_numpy()
+        expanded_df = pd.DataFrame(
+            {
+                "text": np.repeat(df_clusters["text"].to_numpy(), n_memberships),
+                "embd": np.repeat(df_clusters["embd"].to_numpy(), n_memberships),
+                "cluster": np.concatenate([np.empty(0), *df_clusters["cluster"]]),
+            }
+        )
 
-        # Retrieve unique cluster identifiers for processing
-        all_clusters = expanded_df["cluster"].unique()
+        # Group once by cluster, keeping clusters in order of first appearance
+        cluster_groups = list(expanded_df.groupby("cluster", sort=False))
+        all_clusters = np.array([cluster for cluster, _ in cluster_groups])
 
         print(f"--Generated {len(all_clusters)} clusters--")
 
@@ -292,12 +677,17 @@ class Raptor:
         prompt = ChatPromptTemplate.from_template(template)
         chain = prompt | self.model | StrOutputParser()
 
-        # Format text within each cluster for summarization
-        summaries = []
-        for i in all_clusters:
-            df_cluster = expanded_df[expanded_df["cluster"] == i]
-            formatted_txt = self.fmt_txt(df_cluster)
-            summaries.append(chain.invoke({"context": formatted_txt}))
+        # Format text within each cluster; clusters whose content was summarized before come from the store
+        inputs = [{"context": self.fmt_txt(df_cluster)} for _, df_cluster in cluster_groups]
+        keys = [text_hash(f"{model_name_of(self.model)}\n{template}\n{x['context']}") for x in inputs]
+        cached = self.store.get_summaries(keys) if self.store is not None else {}
+        todo = [i for i, key in enumerate(keys) if key not in cached]
+        if cached:
+            print(f"--Reused {len(inputs) - len(todo)} cached summaries--")
+
+        # Summarize the remaining clusters concurrently (batch keeps the input order)
+        cached.update(self._summarize_batch(chain, [inputs[i] for i in todo], [keys[i] for i in todo]))
+        summaries = [cached[key] for key in keys]
 
         # Create a DataFrame to store summaries with their corresponding cluster and level
         df_summary = pd.DataFrame(
@@ -311,8 +701,49 @@ class Raptor:
         return df_clusters, df_summary
 
 
+    def _summarize_batch(self, chain, inputs: List[dict], keys: List[str]) -> Dict[str, str]:
+        """
+        Run chain over inputs concurrently, re-sending only the inputs that failed transiently.
+
+        Parameters:
+        - chain: Runnable that turns one input into a summary string.
+        - inputs: Chain inputs.
+        - keys: Summary store key of each input.
+
+        Returns:
+        - A dictionary mapping each key to its summary. Every round's successes are put in the store before
+          the next round, so a failed level resumes from them.
+        """
+        summaries: Dict[str, str] = {}
+        pending = list(range(len(inputs)))
+        for attempt in range(self.summary_attempts):
+            results = chain.batch(
+                [inputs[i] for i in pending], config={"max_concurrency": self.summary_concurrency},
+                return_exceptions=True,
+            )
+            done = {keys[i]: r for i, r in zip(pending, results) if not isinstance(r, Exception)}
+            if self.store is not None and done:
+                self.store.put_summaries(done)
+            summaries.update(done)
+
+            failed = [(i, r) for i, r in zip(pending, results) if isinstance(r, Exception)]
+            if not failed:
+                break
+            fatal = [r for _, r in failed if not _is_retryable(r)]
+            if fatal or attempt == self.summary_attempts - 1:
+                raise (fatal or [failed[0][1]])[0]
+            print(f"--Retrying {len(failed)} failed summaries--")
+            time.sleep(SUMMARY_BACKOFF * 2 ** attempt * (0.5 + random.random() / 2))
+            pending = [i for i, _ in failed]
+        return summaries
+
+
     def recursive_embed_cluster_summarize(
-        self, texts: List[str], level: int = 1, n_levels: int = 3
+        self,
+        texts: List[str],
+        level: int = 1,
+        n_levels: int = 3,
+        priors: Optional[List[Dict[str, List[int]]]] = None,
     ) -> Dict[int, Tuple[pd.DataFrame, pd.DataFrame]]:
         """
         Recursively embeds, clusters, and summarizes texts up to a specified level or until
@@ -322,6 +753,8 @@ class Raptor:
         - texts: List[str], texts to be processed.
         - level: int, current recursion level (starts at 1).
         - n_levels: int, maximum depth of recursion.
+        - priors: Optional; per level from this one on, the previous build's cluster IDs by text hash
+                  (see raptor_store.tree_memberships).
 
         Returns:
         - Dict[int, Tuple[pd.DataFrame, pd.DataFrame]], a dictionary where keys are the recursion
@@ -330,7 +763,8 @@ class Raptor:
         results = {}  # Dictionary to store results at each level
 
         # Perform embedding, clustering, and summarization for the current level
-        df_clusters, df_summary = self.embed_cluster_summarize_texts(texts, level)
+        priors = priors or []
+        df_clusters, df_summary = self.embed_cluster_summarize_texts(texts, level, priors[0] if priors else None)
 
         # Store the results of the current level
         results[level] = (df_clusters, df_summary)
@@ -341,7 +775,7 @@ class Raptor:
             # Use summaries as the input texts for the next level of recursion
             new_texts = df_summary["summaries"].tolist()
             next_level_results = self.recursive_embed_cluster_summarize(
-                new_texts, level + 1, n_levels
+                new_texts, level + 1, n_levels, priors[1:]
             )
 
             # Merge the results from the next level into the current results dictionary
@@ -349,13 +783,39 @@ class Raptor:
 
         return results
     
-    def text_spliter(self, text, chunk_size_tok=2000, level=1, n_levels=3):
+    def tree_params(self, chunk_size_tok: int, level: int, n_levels: int) -> dict:
+        """
+        Everything besides the chunks that determines a tree; a saved tree is only reused when these match.
+
+        Returns:
+        - A JSON-serializable dictionary with the chunking and recursion settings, the LLM and embedding model
+          names, and the clustering settings.
+        """
+        return {
+            "chunk_size_tok": chunk_size_tok,
+            "level": level,
+            "n_levels": n_levels,
+            "llm": model_name_of(self.model),
+            "embedding": model_name_of(self.embd),
+            "cluster_search": self.cluster_search,
+            "reduction": self.reduction,
+            "dim": CLUSTER_DIM,
+            "threshold": CLUSTER_THRESHOLD,
+            "seed": self.seed,
+        }
+
+    def text_spliter(self, text, chunk_size_tok=2000, level=1, n_levels=3, tree_key=None):
         """
         Parameters:
         - text: str, text to be processed.
         - chunk_size_tok: int, size of each chunk in tokens.
         - level: int, current recursion level (starts at 1).
         - n_levels: int, maximum depth of recursion.
+        - tree_key: Optional; (ticker, form, accession, section). With a store, the tree saved under this key is
+                    returned as-is when it was built from the same chunks with the same parameters (see
+                    tree_params), and a rebuilt tree is saved. A rebuild starts from the previous tree of the
+                    same key or, failing that, of the latest filing of the same ticker, form and section: unchanged
+                    texts keep their clusters, so only clusters that gained or lost texts are summarized again.
         Returns:
         - List[str], all texts after recursive embedding, clustering, and summarization.
         """
@@ -369,7 +829,19 @@ class Raptor:
         if texts_split is None or len(texts_split) == 0:
             raise ValueError("Text splitting did not produce any text chunks.")
 
-        results = self.recursive_embed_cluster_summarize(texts_split, level=level, n_levels=n_levels)
+        use_store = self.store is not None and tree_key is not None
+        if use_store:
+            chunk_hashes = [text_hash(t) for t in texts_split]
+            params = self.tree_params(chunk_size_tok, level, n_levels)
+            tree = self.store.load_tree(tree_key, chunk_hashes, params)
+            if tree is not None:
+                return tree_texts(tree)
+            previous = self.store.previous_tree(tree_key, params)
+            priors = tree_memberships(previous) if previous is not None else None
+        else:
+            priors = None
+
+        results = self.recursive_embed_cluster_summarize(texts_split, level=level, n_levels=n_levels, priors=priors)
         if results is None:
             raise ValueError("Recursive embedding and clustering did not produce any results.")
 
@@ -385,6 +857,8 @@ class Raptor:
             # Extend all_texts with the summaries from the current level
             all_texts.extend(summaries)
 
+        if use_store:
+            self.store.save_tree(tree_key, tree_from_results(texts_split, chunk_hashes, results, params))
         return all_texts
 
 
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from SECutils.embedding_cache import text_hash
+
+
+RAPTOR_STORE_PATH = os.getenv("QUANTALK_RAPTOR_STORE_PATH", "./cache/raptor_trees.sqlite")
+
+TreeKey = Tuple[str, str, str, str]  # (ticker, form, accession, section)
+
+
+def tree_from_results(
+    chunks: List[str], chunk_hashes: List[str], results: Dict[int, Tuple[pd.DataFrame, pd.DataFrame]], params: dict
+) -> dict:
+    """
+    Convert the output of Raptor.recursive_embed_cluster_summarize into a JSON-serializable tree.
+
+    Parameters:
+    - chunks: The level-0 text chunks.
+    - chunk_hashes: Content hashes of the chunks (see embedding_cache.text_hash).
+    - results: Dict[int, Tuple[pd.DataFrame, pd.DataFrame]], clusters and summaries per level.
+    - params: Build parameters (chunk size, number of levels, ...); a saved tree is only reused with the same ones.
+
+    Returns:
+    - A dictionary with the chunks, their hashes, the parameters and, per level, the input texts' cluster
+      assignments and the cluster summaries.
+    """
+    levels = []
+    for level in sorted(results):
+        df_clusters, df_summary = results[level]
+        levels.append({
+            "level": int(level),
+            "clusters": [[int(c) for c in cluster] for cluster in df_clusters["cluster"]],
+            "summaries": df_summary["summaries"].tolist(),
+            "summary_clusters": [int(c) for c in df_summary["cluster"]],
+        })
+    return {"chunks": list(chunks), "chunk_hashes": list(chunk_hashes), "params": params, "levels": levels}
+
+
+def tree_texts(tree: dict) -> List[str]:
+    """All texts of a tree in Raptor.text_spliter order: the chunks, then the summaries level by level."""
+    texts = list(tree["chunks"])
+    for level in tree["levels"]:
+        texts.extend(level["summaries"])
+    return texts
+
+
+def tree_memberships(tree: dict) -> List[Dict[str, List[int]]]:
+    """
+    Cluster membership of each level's input texts, keyed by text hash.
+
+    Level 1 clusters the chunks and every further level clusters the summaries of the level below, so a text that
+    is unchanged in a new version of the document can keep the clusters it had (see Raptor.assign_clusters).
+
+    Returns:
+    - One dictionary per level mapping the hash of an input text to its cluster IDs.
+    """
+    memberships = []
+    hashes = list(tree["chunk_hashes"])
+    for level in tree["levels"]:
+        memberships.append(dict(zip(hashes, level["clusters"])))
+        hashes = [text_hash(t) for t in level["summaries"]]
+    return memberships
+
+
+class RaptorStore:
+    """
+    SQLite store for Raptor trees and cluster summaries.
+
+    - trees: one tree per (ticker, form, accession, section), reused while the chunk hashes and build
+      parameters are unchanged. A rebuild keeps the clusters of the unchanged texts (see previous_tree).
+    - summaries: cluster summaries keyed by a hash of the model, the prompt and the cluster content, so a
+      rebuilt tree only sends clusters whose content changed to the LLM.
+    """
+
+    def __init__(self, path: str = RAPTOR_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS trees (
+                    ticker TEXT, form TEXT, accession TEXT, section TEXT, tree TEXT, built_at REAL,
+                    PRIMARY KEY (ticker, form, accession, section));
+                CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT, created_at REAL);
+            """)
+            self._local.conn = conn
+        return conn
+
+    # --- trees ---
+    def load_tree(
+        self, key: TreeKey, chunk_hashes: Optional[Sequence[str]] = None, params: Optional[dict] = None
+    ) -> Optional[dict]:
+        """
+        Load a saved tree.
+
+        Parameters:
+        - key: (ticker, form, accession, section).
+        - chunk_hashes: Optional; only return the tree if it was built from exactly these chunks.
+        - params: Optional; only return the tree if it was built with these parameters.
+
+        Returns:
+        - The tree dictionary (see tree_from_results), or None if there is no matching tree.
+        """
+        row = self._conn().execute(
+            "SELECT tree FROM trees WHERE ticker = ? AND form = ? AND accession = ? AND section = ?", tuple(key)
+        ).fetchone()
+        if row is None:
+            return None
+        tree = json.loads(row[0])
+        if chunk_hashes is not None and tree["chunk_hashes"] != list(chunk_hashes):
+            return None
+        if params is not None and tree["params"] != params:
+            return None
+        return tree
+
+    def previous_tree(self, key: TreeKey, params: dict) -> Optional[dict]:
+        """
+        The tree a rebuild of key can start from: the one saved under key, else the most recently built one for
+        the same ticker, form and section (an earlier filing). Only trees built with params qualify.
+
+        Returns:
+        - The tree dictionary, or None if there is no such tree.
+        """
+        ticker, form, accession, section = key
+        rows = self._conn().execute(
+            "SELECT tree FROM trees WHERE ticker = ? AND form = ? AND section = ? "
+            "ORDER BY accession = ? DESC, built_at DESC",
+            (ticker, form, section, accession),
+        )
+        for (raw,) in rows:
+            tree = json.loads(raw)
+            if tree["params"] == params:
+                return tree
+        return None
+
+    def save_tree(self, key: TreeKey, tree: dict) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO trees (ticker, form, accession, section, tree, built_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, json.dumps(tree, ensure_ascii=False), time.time()),
+            )
+
+    def delete_tree(self, key: TreeKey) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "DELETE FROM trees WHERE ticker = ? AND form = ? AND accession = ? AND section = ?", tuple(key)
+            )
+
+    # --- summaries ---
+    def get_summaries(self, keys: Sequence[str]) -> Dict[str, str]:
+        """Cached summaries for the given keys (missing keys are absent)."""
+        found = {}
+        conn = self._conn()
+        unique = list(dict.fromkeys(keys))
+        for start in range(0, len(unique), 500):
+            chunk = unique[start:start + 500]
+            query = f"SELECT key, summary FROM summaries WHERE key IN ({','.join('?' * len(chunk))})"
+            found.update(conn.execute(query, chunk).fetchall())
+        return found
+
+    def put_summaries(self, summaries: Dict[str, str]) -> None:
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at) VALUES (?, ?, ?)",
+                [(k, s, now) for k, s in summaries.items()],
+            )
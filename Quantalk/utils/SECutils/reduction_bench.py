@@ -0,0 +1,108 @@
+"""
+Benchmark of the Raptor dimensionality-reduction backends (wall time and clustering quality).
+
+For each backend the global step of Raptor.perform_clustering is timed: reduction to `dim` dimensions
+followed by the GMM cluster-count search and fit. Quality is reported as the adjusted Rand index against
+the known labels and the cosine silhouette of the resulting clusters in the original embedding space.
+
+The embeddings are synthetic topic blobs by default. With --cache-dir they are sampled from the vectors an
+EmbeddingCache holds for --model (the chunks and summaries Raptor actually embedded); those have no topic labels,
+so only the silhouette is reported.
+
+Run from utils/:
+    python -m SECutils.reduction_bench --n 300 1000 --backends pca random umap
+    python -m SECutils.reduction_bench --n 300 1000 --cache-dir ./cache/embeddings --model all-MiniLM-L6-v2
+"""
+import argparse
+import time
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sklearn.datasets import make_blobs
+from sklearn.metrics import adjusted_rand_score, silhouette_score
+
+from SECutils.embedding_cache import EMBEDDING_CACHE_DIR, EmbeddingCache
+from SECutils.rag import RANDOM_SEED, REDUCTIONS, Raptor, reduce_embeddings
+
+
+def synthetic_embeddings(n: int, n_topics: int = 8, n_features: int = 384, spread: float = 6.0, seed: int = 0):
+    """Unit-normalized, sentence-embedding-like vectors (all-MiniLM-L6-v2 has 384 dimensions) with topic labels."""
+    X, y = make_blobs(n_samples=n, centers=n_topics, n_features=n_features, cluster_std=spread, random_state=seed)
+    return X / np.linalg.norm(X, axis=1, keepdims=True), y
+
+
+def cached_embeddings(cache_dir: str, model: str, n: int, seed: int = 0):
+    """
+    Up to n unit-normalized vectors sampled from an EmbeddingCache (without labels).
+
+    Parameters:
+    - cache_dir: Directory of the EmbeddingCache.
+    - model: Embedding model name the vectors were cached under.
+    - n: Number of vectors; all cached vectors are used if there are fewer.
+    - seed: Seed of the sample.
+
+    Returns:
+    - A tuple of the float32 array of shape (min(n, n_cached), dim) and None.
+    """
+    vectors = EmbeddingCache(cache_dir).all_vectors(model)
+    if len(vectors) == 0:
+        raise ValueError(f"no cached embeddings for {model!r} in {cache_dir}")
+    if len(vectors) > n:
+        vectors = vectors[np.sort(np.random.default_rng(seed).choice(len(vectors), n, replace=False))]
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), None
+
+
+def bench_backend(
+    raptor: Raptor, embeddings: np.ndarray, labels: Optional[np.ndarray], backend: str, dim: int = 10,
+    threshold: float = 0.1,
+) -> dict:
+    """Time one backend on the global clustering step and score its hard assignments."""
+    n_neighbors = int((len(embeddings) - 1) ** 0.5)
+    start = time.perf_counter()
+    reduced = reduce_embeddings(embeddings, dim, backend, n_neighbors, "cosine", RANDOM_SEED)
+    reduce_sec = time.perf_counter() - start
+    membership, n_clusters = raptor.GMM_membership(reduced, threshold, RANDOM_SEED)
+    cluster_sec = time.perf_counter() - start - reduce_sec
+
+    # Hard label = first cluster the embedding belongs to (-1 if none)
+    hard = np.where(membership.any(axis=1), membership.argmax(axis=1), -1)
+    row = {"backend": backend, "n": len(embeddings), "clusters": n_clusters,
+           "reduce_sec": round(reduce_sec, 3), "cluster_sec": round(cluster_sec, 3),
+           "total_sec": round(reduce_sec + cluster_sec, 3)}
+    row["ari"] = round(adjusted_rand_score(labels, hard), 3) if labels is not None else None
+    row["silhouette"] = (
+        round(silhouette_score(embeddings, hard, metric="cosine"), 3) if len(np.unique(hard)) > 1 else None
+    )
+    return row
+
+
+def run(
+    sizes: Sequence[int], backends: Sequence[str], cluster_search: str = "coarse", n_topics: int = 8,
+    cache_dir: Optional[str] = None, model: Optional[str] = None,
+) -> pd.DataFrame:
+    """Benchmark each backend at each size, on synthetic embeddings or, with cache_dir and model, cached ones."""
+    raptor = Raptor(None, None, cluster_search=cluster_search)
+    rows: List[dict] = []
+    for n in sizes:
+        if cache_dir is not None:
+            embeddings, labels = cached_embeddings(cache_dir, model, n)
+        else:
+            embeddings, labels = synthetic_embeddings(n, n_topics=n_topics)
+        for backend in backends:
+            rows.append(bench_backend(raptor, embeddings, labels, backend))
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raptor reduction backend benchmark")
+    parser.add_argument("--n", type=int, nargs="+", default=[300, 1000], help="numbers of embeddings")
+    parser.add_argument("--backends", nargs="+", default=["pca", "random", "umap"],
+                        choices=[b for b in REDUCTIONS if b != "auto"])
+    parser.add_argument("--search", default="coarse", help="cluster-count search (see Raptor.get_optimal_clusters)")
+    parser.add_argument("--topics", type=int, default=8, help="number of synthetic topics")
+    parser.add_argument("--cache-dir", nargs="?", const=EMBEDDING_CACHE_DIR, default=None,
+                        help=f"sample cached embeddings from this EmbeddingCache instead (default {EMBEDDING_CACHE_DIR})")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="model name of the cached embeddings")
+    args = parser.parse_args()
+    print(run(args.n, args.backends, args.search, args.topics, args.cache_dir, args.model).to_string(index=False))
@@ -0,0 +1,62 @@
+# utils/async_fetcher.py — 비동기 데이터 접근 레이어 (yfinance / 뉴스)
+# 경제 일정은 data_fetcher.get_economic_events (캐시 + 스냅샷 빌더) 를 쓴다.
+import asyncio
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.sentiment import get_market_news_with_sentiment, FALLBACK_NEWS
+
+DEFAULT_TIMEOUT = 10   # 호출 하나당 제한 시간(초)
+MAX_CONCURRENCY = 8    # 동시에 나가는 외부 호출 수 상한
+MAX_THREADS = 32       # 제한 시간을 넘겨 버려진 호출까지 포함한 작업 스레드 수 상한
+
+# 프로세스 전체가 같이 쓰는 작업 스레드 풀.
+# asyncio.to_thread 는 루프의 기본 실행기를 쓰는데, asyncio.run 은 끝날 때 그 스레드들을 모두 기다린다
+# (제한 시간을 넘긴 호출까지). 별도 풀에서 돌리면 시간 초과된 호출은 뒤에 남겨 두고 바로 반환한다.
+_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_THREADS, thread_name_prefix="async-fetch")
+
+# 이벤트 루프마다 세마포어를 따로 둔다 (asyncio.run 이 매번 새 루프를 만들기 때문)
+_limiters = weakref.WeakKeyDictionary()
+
+def _limiter():
+    loop = asyncio.get_running_loop()
+    if loop not in _limiters:
+        _limiters[loop] = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _limiters[loop]
+
+async def run_in_thread(fn, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """동기 함수를 스레드에서 실행한다 (동시성 상한 + 제한 시간 적용)."""
+    loop = asyncio.get_running_loop()
+    async with _limiter():
+        return await asyncio.wait_for(loop.run_in_executor(_EXECUTOR, functools.partial(fn, *args, **kwargs)), timeout)
+
+# --- 뉴스 ---
+async def get_market_news_with_sentiment_async(ticker=None, limit=10, timeout=DEFAULT_TIMEOUT):
+    # 뉴스는 로컬 저장소에서 읽는다 (필요할 때만 Finnhub 증분 폴링)
+    try:
+        return await run_in_thread(get_market_news_with_sentiment, ticker, limit, timeout=timeout)
+    except Exception:
+        return list(FALLBACK_NEWS)
+
+# --- 여러 섹션 동시 로딩 ---
+async def gather_sections(sections, timeout=DEFAULT_TIMEOUT):
+    """
+    {이름: awaitable} 을 동시에 실행해 {이름: 결과} 로 돌려준다.
+    실패하거나 timeout 을 넘긴 섹션은 None (다른 섹션에는 영향 없음).
+    """
+    names = list(sections)
+    results = await asyncio.gather(
+        *(asyncio.wait_for(sections[n], timeout) for n in names), return_exceptions=True
+    )
+    out = {}
+    for name, res in zip(names, results):
+        if isinstance(res, BaseException):
+            print(f"[{name}] {type(res).__name__}: {res}")
+            res = None
+        out[name] = res
+    return out
+
+def run_sections(sections, timeout=DEFAULT_TIMEOUT):
+    """스트림릿 스크립트(동기 코드)에서 gather_sections 를 실행한다."""
+    return asyncio.run(gather_sections(sections, timeout))
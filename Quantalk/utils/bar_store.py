@@ -0,0 +1,169 @@
+# utils/bar_store.py — 로컬 OHLCV 저장소 (Parquet, 티커/주기별 증분 추가)
+import os
+import re
+import tempfile
+import threading
+import time
+import pandas as pd
+import yfinance as yf
+
+BAR_DIR = os.getenv("QUANTALK_BAR_DIR", "./cache/bars")
+REFRESH_SEC = 60  # 이 시간 안에 갱신한 파일은 네트워크 호출 없이 디스크에서 바로 읽는다
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+def _bar_path(ticker, interval):
+    safe = ticker.replace("^", "_").replace("/", "_").replace("=", "_")
+    return os.path.join(BAR_DIR, interval, f"{safe}.parquet")
+
+def _parse_period(period):
+    m = re.fullmatch(r"(\d+)(d|wk|mo|y)", period)
+    return (int(m.group(1)), m.group(2)) if m else (None, None)
+
+def _offset(n, unit):
+    return {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}[unit]
+
+def _slice_period(bars, period):
+    # yfinance period 문자열("5d", "6mo", "1y")만큼 뒤에서 잘라낸다
+    n, unit = _parse_period(period)
+    if n is None:
+        return bars
+    days = bars.index.normalize()
+    if unit == "d":
+        # "5d" 는 거래일 기준
+        return bars[days.isin(days.unique()[-n:])]
+    return bars[bars.index >= days[-1] - _offset(n, unit)]
+
+def _covers(bars, period):
+    # 저장본이 요청한 period 를 모두 담고 있는지 (휴장일 여유 7일)
+    # 저장본이 없으면 (콜드 스타트) period 전체를 받아야 한다
+    n, unit = _parse_period(period)
+    if bars is None or bars.empty or n is None:
+        return False
+    days = bars.index.normalize()
+    if unit == "d":
+        return days.nunique() >= n
+    return days[0] <= days[-1] - _offset(n, unit) + pd.Timedelta(days=7)
+
+def _normalize(df):
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    return df[[c for c in COLUMNS if c in df.columns]]
+
+def read_bars(ticker, interval="1d"):
+    path = _bar_path(ticker, interval)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+def bars_mtime(ticker, interval="1d"):
+    # 저장본의 마지막 갱신 시각 (없으면 None) — 파생 데이터의 버전으로 쓴다
+    path = _bar_path(ticker, interval)
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+# 같은 파일을 갱신하는 스레드들(페이지 섹션 · 스냅샷 스케줄러)이 서로의 결과를 덮어쓰지 않도록 파일별 잠금
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+def _path_lock(path):
+    with _path_locks_guard:
+        return _path_locks.setdefault(path, threading.RLock())
+
+def write_bars(ticker, interval, df):
+    # 고유한 임시 파일에 쓰고 교체 (읽는 쪽이 반쯤 쓰인 파일을 보지 않도록, 동시에 쓰는 쪽과 섞이지 않도록)
+    path = _bar_path(ticker, interval)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _path_lock(path):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            df.to_parquet(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+def _merge(old, new):
+    if old is None or old.empty:
+        return new
+    if new is None or new.empty:
+        return old
+    merged = pd.concat([old, new])
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+def _store_fresh(ticker, interval, fresh):
+    # 받는 동안 다른 스레드가 저장했을 수 있으므로, 잠근 뒤 그 시점의 저장본에 합쳐 쓴다
+    with _path_lock(_bar_path(ticker, interval)):
+        old = read_bars(ticker, interval)
+        merged = _merge(old, fresh)
+        if merged is not None and not merged.empty and merged is not old:
+            write_bars(ticker, interval, merged)
+    return merged
+
+def update_bars(ticker, interval="1d", period="6mo"):
+    """
+    저장된 마지막 봉 이후의 데이터만 받아 붙인다.
+    저장본이 없거나 period 를 다 담지 못하면 period 만큼 전체를 받는다.
+    마지막 봉은 장중에 값이 바뀌므로 다시 받아 덮어쓴다.
+    """
+    stored = read_bars(ticker, interval)
+    t = yf.Ticker(ticker)
+    if not _covers(stored, period):
+        fresh = t.history(period=period, interval=interval)
+    else:
+        fresh = t.history(start=stored.index[-1].to_pydatetime(), interval=interval)
+    return _store_fresh(ticker, interval, _normalize(fresh))
+
+def load_bars(ticker, interval="1d", period="6mo", refresh_sec=REFRESH_SEC):
+    """
+    로컬 저장소에서 ticker/interval 의 봉 데이터를 period 만큼 돌려준다.
+    파일이 refresh_sec 보다 오래됐으면 증분 갱신 후 읽고, 갱신에 실패하면 저장본을 그대로 쓴다.
+    """
+    path = _bar_path(ticker, interval)
+    bars = read_bars(ticker, interval)
+    fresh = bars is not None and time.time() - os.path.getmtime(path) <= refresh_sec
+    if not fresh or not _covers(bars, period):
+        try:
+            bars = update_bars(ticker, interval, period)
+        except Exception as e:
+            print(e)
+    if bars is None or bars.empty:
+        return pd.DataFrame(columns=COLUMNS)
+    return _slice_period(bars, period)
+
+# --- 여러 티커 일괄 갱신 (멀티 티커 다운로드 한 번 + 증분) ---
+def _download_many(tickers, interval, **kwargs):
+    hist = yf.download(tickers, interval=interval, group_by="ticker", progress=False,
+                       auto_adjust=True, ignore_tz=False, threads=True, **kwargs)
+    out = {}
+    for t in tickers:
+        try:
+            df = hist[t] if isinstance(hist.columns, pd.MultiIndex) else hist
+            out[t] = _normalize(df.dropna(how="all"))
+        except KeyError:
+            continue
+    return out
+
+def update_bars_many(tickers, interval="1d", period="1y"):
+    """
+    update_bars 의 일괄 버전. 저장본이 period 를 담고 있는 티커들은 가장 이른 마지막 봉부터
+    한 번에 받고, 나머지는 period 전체를 한 번에 받는다. 반환: {티커: 봉 DataFrame}
+    """
+    stored = {t: read_bars(t, interval) for t in dict.fromkeys(tickers)}
+    # 저장본이 없는 티커는 _covers 가 False 이므로 전체 다운로드 쪽으로 간다
+    full = [t for t, b in stored.items() if not _covers(b, period)]
+    partial = [t for t in stored if t not in full]
+
+    fresh = {}
+    if full:
+        fresh.update(_download_many(full, interval, period=period))
+    if partial:
+        start = min(stored[t].index[-1] for t in partial)
+        fresh.update(_download_many(partial, interval, start=start.to_pydatetime()))
+
+    result = {}
+    for t in stored:
+        merged = _store_fresh(t, interval, fresh.get(t))
+        if merged is not None and not merged.empty:
+            result[t] = merged
+    return result
@@ -0,0 +1,229 @@
+# utils/cache.py — 프로세스 간 공유 캐시 (TTL + stale-while-revalidate + 요청 합치기)
+import functools
+import hashlib
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+CACHE_PATH = os.getenv("QUANTALK_CACHE_PATH", "./cache/quantalk_cache.sqlite")
+CACHE_BACKEND = os.getenv("QUANTALK_CACHE_BACKEND", "sqlite")  # sqlite | memory
+
+
+# --- 백엔드 ---
+class CacheBackend:
+    """
+    캐시 저장소 인터페이스.
+    항목마다 fresh_until(이때까지는 신선)과 expires_at(이때까지는 오래된 값이라도 돌려줌)을 둔다.
+    """
+    def get(self, key):
+        """(value, fresh_until) 또는 None"""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl, stale_ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def claim_refresh(self, key, lease):
+        """오래된 항목의 갱신 권한을 얻는다. 다른 워커가 이미 갱신 중이면 False."""
+        return True
+
+
+class MemoryCache(CacheBackend):
+    # 단일 프로세스용 (테스트/로컬 실행)
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._data.get(key)
+        if hit is None or hit[2] < time.time():
+            return None
+        return hit[0], hit[1]
+
+    def set(self, key, value, ttl, stale_ttl):
+        now = time.time()
+        with self._lock:
+            self._data[key] = (value, now + ttl, now + ttl + stale_ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def claim_refresh(self, key, lease):
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None or hit[1] > time.time():
+                return False
+            self._data[key] = (hit[0], time.time() + lease, hit[2])
+            return True
+
+
+class SQLiteCache(CacheBackend):
+    # 여러 스트림릿 워커가 같은 파일을 공유한다 (WAL 모드, 재시작해도 유지)
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB, fresh_until REAL, expires_at REAL)"
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value, fresh_until FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, key, value, ttl, stale_ttl):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, fresh_until, expires_at) VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), now + ttl, now + ttl + stale_ttl),
+            )
+
+    def delete(self, key):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def claim_refresh(self, key, lease):
+        # fresh_until 을 lease 만큼 미뤄 두면 다른 워커는 갱신하지 않고 기존 값을 쓴다
+        now = time.time()
+        with self._conn() as conn:
+            cur = conn.execute(
+                "UPDATE cache SET fresh_until = ? WHERE key = ? AND fresh_until <= ?", (now + lease, key, now)
+            )
+        return cur.rowcount == 1
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = MemoryCache() if CACHE_BACKEND == "memory" else SQLiteCache()
+        return _backend
+
+def set_backend(backend):
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+# --- 요청 합치기 (singleflight) ---
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 하나로 합친다. 먼저 온 호출만 실행하고 나머지는 그 결과를 같이 받는다."""
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()  # 예외도 그대로 전달된다
+        try:
+            value = fn(*args, **kwargs)
+            call.set_result(value)
+            return value
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+singleflight = SingleFlight()
+
+def jittered(ttl, jitter=0.1):
+    # 만료 시각을 ±jitter 비율로 흩어 같은 시각에 채운 항목들이 한꺼번에 만료되지 않게 한다
+    return ttl * (1 + random.uniform(-jitter, jitter)) if jitter else ttl
+
+
+# --- 데코레이터 ---
+def _make_key(name, args, kwargs):
+    raw = repr((name, args, sorted(kwargs.items())))
+    return f"{name}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+def _refresh(backend, key, fn, args, kwargs, ttl, stale_ttl, jitter):
+    try:
+        backend.set(key, singleflight.do(key, fn, *args, **kwargs), jittered(ttl, jitter), stale_ttl)
+    except Exception as e:
+        print(f"[cache] {key} 갱신 실패: {e}")
+
+def _fill(backend, key, fn, args, kwargs, ttl, stale_ttl, jitter):
+    # singleflight 의 대표 호출만 실행된다. 기다리는 사이 다른 호출이 채웠으면 그 값을 쓴다
+    try:
+        hit = backend.get(key)
+    except Exception:
+        hit = None
+    if hit is not None and hit[1] > time.time():
+        return hit[0]
+    value = fn(*args, **kwargs)
+    try:
+        backend.set(key, value, jittered(ttl, jitter), stale_ttl)
+    except Exception as e:
+        print(f"[cache] {key} 저장 실패: {e}")
+    return value
+
+def shared_cache(ttl, stale_ttl=None, name=None, backend=None, jitter=0.1):
+    """
+    공유 캐시 데코레이터.
+    - ttl 이내: 캐시 값을 그대로 반환
+    - ttl 초과 ~ ttl + stale_ttl: 오래된 값을 즉시 반환하고 백그라운드 스레드에서 갱신
+    - 그 이후 / 없음: 호출해서 채운다 (같은 키의 동시 호출은 하나로 합쳐 한 번만 호출)
+    ttl 은 항목마다 ±jitter 비율로 흩어, 같이 채운 항목들이 같은 순간에 만료되지 않게 한다.
+    """
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+
+    def decorator(fn):
+        cache_name = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            b = backend or get_backend()
+            key = _make_key(cache_name, args, kwargs)
+            try:
+                hit = b.get(key)
+            except Exception as e:
+                print(f"[cache] {key} 조회 실패: {e}")
+                return fn(*args, **kwargs)
+
+            if hit is not None:
+                value, fresh_until = hit
+                if fresh_until <= time.time() and b.claim_refresh(key, lease=min(ttl, 30)):
+                    threading.Thread(
+                        target=_refresh, args=(b, key, fn, args, kwargs, ttl, stale_ttl, jitter), daemon=True
+                    ).start()
+                return value
+
+            return singleflight.do(key, _fill, b, key, fn, args, kwargs, ttl, stale_ttl, jitter)
+
+        wrapper.cache_key = lambda *a, **kw: _make_key(cache_name, a, kw)
+        return wrapper
+    return decorator
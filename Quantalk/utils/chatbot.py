@@ -1,19 +1,72 @@
 #← 기본 금융 챗봇 (OpenAI/Grok API)
-from openai import OpenAI
-import os
-from dotenv import load_dotenv
-load_dotenv()
+from utils import semantic_cache
+from utils.llm_gateway import get_gateway
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# 호출은 공용 게이트웨이를 거친다 (OPENAI_BASE_URL 로 OpenAI 호환 서버 지정, 예: python -m utils.llm_stub)
+MODEL = "gpt-4o-mini"
+MAX_TOKENS = 300
+DEADLINE = 30  # 재시도 포함 응답 시한(초)
+SYSTEM_PROMPT = "너는 한국어로 정확하고 친절한 금융 전문가다. 투자 조언은 하지 말고 정보와 분석만 제공해."
+ERROR_MESSAGE = "죄송합니다. 현재 AI 응답에 문제가 있습니다. 잠시 후 다시 시도해주세요."
 
-def chatbot_response(prompt):
+def _messages(prompt):
+    return [{"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}]
+
+def _cache_lookup(question, ticker, scope, cache_ttl):
+    # 캐시 조회 실패는 응답을 막지 않는다. 반환: (캐시된 답변 또는 None, 질문 임베딩)
+    try:
+        vec = semantic_cache.embed(question)
+        ttl = semantic_cache.DEFAULT_TTL if cache_ttl is None else cache_ttl
+        return semantic_cache.lookup(question, ticker, scope, ttl=ttl, embedding=vec), vec
+    except Exception as e:
+        print(f"[chatbot] 의미 캐시 조회 실패: {e}")
+        return None, None
+
+def _cache_store(question, answer, ticker, scope, vec):
+    try:
+        if vec is not None:
+            semantic_cache.store(question, answer, ticker, scope, embedding=vec)
+    except Exception as e:
+        print(f"[chatbot] 의미 캐시 저장 실패: {e}")
+
+def chatbot_response(prompt, ticker=None, question=None, scope="chat", use_cache=True, cache_ttl=None):
+    """
+    prompt 에 대한 답변. use_cache=True 면 의미 캐시를 먼저 본다.
+    question: 캐시 비교에 쓸 사용자 질문 (prompt 에 컨텍스트가 붙어 있을 때). 기본은 prompt.
+    ticker / scope: 같은 종목 · 같은 화면(답변 형식)의 질문끼리만 비교한다.
+    """
+    question = question or prompt
+    cached, vec = _cache_lookup(question, ticker, scope, cache_ttl) if use_cache else (None, None)
+    if cached is not None:
+        return cached
+    try:
+        answer = get_gateway().chat(_messages(prompt), model=MODEL, max_tokens=MAX_TOKENS, deadline=DEADLINE)
+    except Exception as e:
+        print(f"[chatbot] 응답 실패: {e}")
+        return ERROR_MESSAGE
+    _cache_store(question, answer, ticker, scope, vec)
+    return answer
+
+def chatbot_response_stream(prompt, ticker=None, question=None, scope="chat", use_cache=True, cache_ttl=None):
+    """
+    chatbot_response 의 스트리밍 버전. 토큰이 도착하는 대로 문자열 조각을 yield 한다.
+    스트림릿에서는 st.write_stream(chatbot_response_stream(prompt)) 로 바로 그린다 (반환값 = 전체 답변).
+    캐시에 맞는 답변이 있으면 한 번에 내보내고, 끝까지 받은 답변만 캐시에 저장한다.
+    """
+    question = question or prompt
+    cached, vec = _cache_lookup(question, ticker, scope, cache_ttl) if use_cache else (None, None)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": "너는 한국어로 정확하고 친절한 금융 전문가다. 투자 조언은 하지 말고 정보와 분석만 제공해."},
-                      {"role": "user", "content": prompt}],
-            max_tokens=300
-        )
-        return response.choices[0].message.content
-    except:
-        return "죄송합니다. 현재 AI 응답에 문제가 있습니다. 잠시 후 다시 시도해주세요."
\ No newline at end of file
+        for token in get_gateway().stream(_messages(prompt), model=MODEL, max_tokens=MAX_TOKENS, deadline=DEADLINE):
+            parts.append(token)
+            yield token
+    except Exception as e:
+        print(f"[chatbot] 스트리밍 실패: {e}")
+        # 이미 일부를 보냈다면 끊긴 채로 두고, 아무것도 못 보냈으면 기존 안내 문구
+        yield "\n\n(응답이 중단되었습니다)" if parts else ERROR_MESSAGE
+        return
+    _cache_store(question, "".join(parts), ticker, scope, vec)
@@ -0,0 +1,165 @@
+# utils/context_builder.py — 챗봇 그라운딩 컨텍스트 (종목별 · 시장 스냅샷, 데이터 시각으로 버전 관리)
+#
+# 질문 시점에는 네트워크를 쓰지 않는다. 로컬 저장소(봉 저장소 · 지표 테이블 · 뉴스 저장소 · 시장 스냅샷)만 읽어
+# 짧은 텍스트 블록을 만들고, 원천 데이터의 버전(파일 갱신 시각, 뉴스 rowid)이 바뀌었을 때만 다시 만든다.
+# 저장소를 미리 채워 두려면 화면을 그릴 때 prefetch_context() 를 부른다 (백그라운드).
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.bar_store import read_bars, bars_mtime, load_bars
+from utils.indicators import calculate_indicators
+from utils.news_store import get_news, feed_version, poll, GENERAL_FEED
+from utils.screener import load_indicator_table, INDICATOR_TABLE_PATH
+from utils.snapshot import load_snapshot, SNAPSHOT_PATH, INDEX_SYMBOLS
+
+CONTEXT_HEADLINES = 5   # 블록에 넣을 헤드라인 수
+TOP_MOVERS = 3          # 시장 블록의 상승/하락 상위 종목 수
+INDEX_NAMES = {"^GSPC": "S&P500", "^IXIC": "NASDAQ"}
+INDICATOR_KEYS = ["RSI", "MACD_hist", "BB_Position", "GoldenCross"]
+
+_cache = {}  # (종류, 키) -> (버전, 블록)
+_lock = threading.Lock()
+_prefetcher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="context-prefetch")
+_prefetching = {}  # (티커들, market) -> Future (같은 요청이 끝나기 전에는 다시 넣지 않는다)
+
+
+# --- 포맷 ---
+def _pct(x):
+    return f"{x:+.2f}%"
+
+def _sentiment_line(news):
+    if not news:
+        return "뉴스 감성: 데이터 없음"
+    avg = sum(n["sentiment"] for n in news) / len(news)
+    return f"뉴스 감성 평균: {avg:+.2f} ({len(news)}건)"
+
+def _headline_lines(news, limit=CONTEXT_HEADLINES):
+    return [f"- {n['headline']} ({n['sentiment']:+.2f})" for n in news[:limit]]
+
+def _fmt_indicator(key, value):
+    if key == "GoldenCross":
+        return f"{key} {'예' if value else '아니오'}"
+    return f"{key} {value:.2f}" if value is not None and value == value else f"{key} -"
+
+
+# --- 버전 ---
+def _mtime(path):
+    return os.path.getmtime(path) if os.path.exists(path) else None
+
+def _cached(kind, key, version, build):
+    with _lock:
+        hit = _cache.get((kind, key))
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    block = build()
+    with _lock:
+        _cache[(kind, key)] = (version, block)
+    return block
+
+
+# --- 종목 ---
+def _ticker_indicators(ticker, bars):
+    # 스크리너 지표 테이블에 있으면 그 값을, 없으면 저장된 봉으로 계산
+    table = load_indicator_table()
+    if table is not None and not table.empty:
+        row = table[table["ticker"] == ticker]
+        if not row.empty:
+            return row.iloc[0].to_dict()
+    if bars is not None and len(bars) >= 30:
+        return calculate_indicators(bars)
+    return None
+
+def _build_ticker(ticker):
+    bars = read_bars(ticker, "1d")
+    lines = []
+    if bars is not None and len(bars) >= 2:
+        last, prev = bars["Close"].iloc[-1], bars["Close"].iloc[-2]
+        lines.append(f"[{ticker} · {bars.index[-1].strftime('%Y-%m-%d')} 기준]")
+        lines.append(f"시세: 종가 {last:,.2f} (전일 대비 {_pct((last - prev) / prev * 100)})")
+    else:
+        lines.append(f"[{ticker}]")
+        lines.append("시세: 데이터 없음")
+
+    ind = _ticker_indicators(ticker, bars)
+    if ind:
+        if ind.get("sector"):
+            lines[-1] += f", 섹터 {ind['sector']}"
+        lines.append("지표: " + ", ".join(_fmt_indicator(k, ind[k]) for k in INDICATOR_KEYS if k in ind))
+
+    news = get_news(ticker, limit=CONTEXT_HEADLINES, refresh=False)
+    lines.append(_sentiment_line(news))
+    lines += _headline_lines(news)
+    return "\n".join(lines)
+
+def get_ticker_context(ticker):
+    """종목 컨텍스트 블록 (시세 · 지표 · 헤드라인 · 감성). 로컬 데이터만 읽는다."""
+    version = (bars_mtime(ticker), _mtime(INDICATOR_TABLE_PATH), feed_version(ticker))
+    return _cached("ticker", ticker, version, lambda: _build_ticker(ticker))
+
+
+# --- 시장 ---
+def _index_lines(snap):
+    parts = []
+    for sym in INDEX_SYMBOLS:
+        idx = (snap or {}).get("indices", {}).get(sym)
+        if not idx:
+            bars = read_bars(sym, "1d")
+            if bars is None or len(bars) < 2:
+                continue
+            last, prev = bars["Close"].iloc[-1], bars["Close"].iloc[-2]
+            idx = {"price": last, "change": (last - prev) / prev * 100}
+        if idx.get("price") is not None:
+            parts.append(f"{INDEX_NAMES.get(sym, sym)} {idx['price']:,.2f} ({_pct(idx.get('change') or 0)})")
+    return ["지수: " + ", ".join(parts)] if parts else []
+
+def _breadth_lines(snap):
+    heat = (snap or {}).get("heatmap")
+    if heat is None or heat.empty:
+        return []
+    heat = heat.dropna(subset=["chg"]).sort_values("chg")
+    up, down = int((heat["chg"] > 0).sum()), int((heat["chg"] < 0).sum())
+    top = ", ".join(f"{r.ticker} {_pct(r.chg)}" for r in heat.tail(TOP_MOVERS).iloc[::-1].itertuples())
+    bottom = ", ".join(f"{r.ticker} {_pct(r.chg)}" for r in heat.head(TOP_MOVERS).itertuples())
+    return [f"등락: 상승 {up} / 하락 {down}", f"상승 상위: {top}", f"하락 상위: {bottom}"]
+
+def _build_market():
+    snap = load_snapshot()
+    built_at = (snap or {}).get("built_at") or datetime.now().isoformat(timespec="minutes")
+    lines = [f"[시장 스냅샷 · {built_at.replace('T', ' ')[:16]} 기준]"]
+    lines += _index_lines(snap)
+    lines += _breadth_lines(snap)
+    news = get_news(GENERAL_FEED, limit=CONTEXT_HEADLINES, refresh=False)
+    lines.append(_sentiment_line(news))
+    lines += _headline_lines(news)
+    return "\n".join(lines)
+
+def get_market_context():
+    """시장 컨텍스트 블록 (지수 · 등락 · 속보 · 감성). 로컬 데이터만 읽는다."""
+    version = (_mtime(SNAPSHOT_PATH), feed_version(GENERAL_FEED), tuple(bars_mtime(s) for s in INDEX_SYMBOLS))
+    return _cached("market", "", version, _build_market)
+
+
+# --- 미리 채우기 ---
+def _prefetch(tickers, market):
+    feeds = ([GENERAL_FEED] if market else []) + list(tickers)
+    for feed in feeds:
+        try:
+            poll(feed)
+        except Exception as e:
+            print(f"[context] {feed} 뉴스 폴링 실패: {e}")
+    for sym in list(tickers) + (INDEX_SYMBOLS if market else []):
+        try:
+            load_bars(sym, "1d", period="1y")
+        except Exception as e:
+            print(f"[context] {sym} 봉 갱신 실패: {e}")
+
+def prefetch_context(tickers=(), market=True):
+    """컨텍스트에 쓰일 로컬 저장소를 백그라운드에서 갱신한다 (폴링 주기 · 봉 갱신 주기가 지난 것만)."""
+    key = (tuple(tickers), market)
+    with _lock:
+        future = _prefetching.get(key)
+        if future is None or future.done():
+            future = _prefetching[key] = _prefetcher.submit(_prefetch, *key)
+    return future
@@ -1,15 +1,19 @@
 import yfinance as yf
 import finnhub
-from datetime import datetime
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 import os
+import requests
 from dotenv import load_dotenv
+from utils.bar_store import load_bars
+from utils.cache import shared_cache
 load_dotenv()
 
 finnhub_client = finnhub.Client(api_key=os.getenv("FINNHUB_API_KEY"))
 def get_index_data(symbol):
     try:
-        t = yf.Ticker(symbol)
-        hist = t.history(period="5d")
+        hist = load_bars(symbol, "1d", period="5d")
         if len(hist) < 2: return None
         price = round(hist['Close'].iloc[-1], 2)
         change = round((price - hist['Close'].iloc[-2]) / hist['Close'].iloc[-2] * 100, 2)
@@ -17,23 +21,191 @@ def get_index_data(symbol):
     except:
         return None
 
-def get_stock_detail(ticker):
+# --- 종목 데이터: 시세(빠름) / 히스토리 / 펀더멘털(느림) 분리 ---
+def get_quote(ticker):
+    # t.info 스크랩 없이 fast_info 만 사용
     try:
-        t = yf.Ticker(ticker)
-        hist = t.history(period="6mo", interval="1d")
-        info = t.info
-        price = info.get('currentPrice') or info.get('regularMarketPrice') or hist['Close'].iloc[-1]
-        prev = info.get('previousClose') or hist['Close'].iloc[-2]
+        fi = yf.Ticker(ticker).fast_info
+        price, prev = fi.get("lastPrice"), fi.get("previousClose")
+        if not price or not prev: return None
         return {
-            "history": hist,
-            "info": {
-                "price": price,
-                "change": price - prev,
-                "change_pct": round((price - prev)/prev * 100, 2),
-                "volume": int(hist['Volume'].iloc[-1]),
-                "marketCap": info.get('marketCap', 0)
-            }
+            "price": price,
+            "prev_close": prev,
+            "change": price - prev,
+            "change_pct": round((price - prev)/prev * 100, 2),
+        }
+    except Exception as e:
+        print(e)
+        return None
+
+def get_history(ticker, period="6mo", interval="1d"):
+    return load_bars(ticker, interval, period=period)
+
+def get_fundamentals(ticker):
+    # 가장 느린 yfinance 엔드포인트 (t.info) — 호출하는 쪽에서 하루 단위로 캐싱할 것
+    try:
+        info = yf.Ticker(ticker).info
+        return {
+            "marketCap": info.get('marketCap', 0),
+            "sector": info.get('sector'),
+            "industry": info.get('industry'),
+        }
+    except Exception as e:
+        print(e)
+        return None
+
+def build_stock_detail(hist, quote=None, fundamentals=None):
+    if hist is None or len(hist) < 2: return None
+    quote = quote or {}
+    fundamentals = fundamentals or {}
+    price = quote.get('price') or hist['Close'].iloc[-1]
+    prev = quote.get('prev_close') or hist['Close'].iloc[-2]
+    return {
+        "history": hist,
+        "info": {
+            "price": price,
+            "change": price - prev,
+            "change_pct": round((price - prev)/prev * 100, 2),
+            "volume": int(hist['Volume'].iloc[-1]),
+            "marketCap": fundamentals.get('marketCap', 0),
+            "sector": fundamentals.get('sector'),
         }
+    }
+
+def get_stock_detail(ticker):
+    try:
+        return build_stock_detail(get_history(ticker), get_quote(ticker), get_fundamentals(ticker))
     except Exception as e:
         print(e)
-        return None
\ No newline at end of file
+        return None
+
+# --- 유니버스(S&P500 전체) 일괄 로더 ---
+SP500_URL = "https://raw.githubusercontent.com/datasets/s-and-p-500-companies/main/data/constituents.csv"
+
+def load_sp500_constituents():
+    # {티커: 섹터} — 섹터는 구성종목 CSV 에서 바로 가져온다 (t.info 호출 불필요)
+    try:
+        df = pd.read_csv(SP500_URL)
+        symbols = df['Symbol'].str.replace('.', '-', regex=False)
+        sector_col = next((c for c in ("GICS Sector", "Sector") if c in df.columns), None)
+        sectors = df[sector_col] if sector_col else ["기타"] * len(df)
+        return dict(zip(symbols, sectors))
+    except:
+        return {t: "기타" for t in ["AAPL","MSFT","NVDA","GOOGL","AMZN","META","TSLA","BRK-B","LLY","JPM"]}
+
+SHARES_TTL = 86400  # 상장 주식수는 하루 한 번만 조회
+
+@shared_cache(ttl=SHARES_TTL, stale_ttl=0)
+def _shares(ticker):
+    # t.info 대신 가벼운 fast_info 사용. 실패는 예외로 올려 캐시에 남기지 않는다
+    fi = yf.Ticker(ticker).fast_info
+    shares = fi.get("shares")
+    if not shares:
+        mcap, price = fi.get("marketCap"), fi.get("lastPrice")
+        shares = mcap / price if mcap and price else None
+    if not shares:
+        raise ValueError(f"{ticker}: 주식수 없음")
+    return float(shares)
+
+def _market_cap(ticker, price):
+    # 시총 = 주식수(하루 캐시) x 현재가 — 스냅샷 주기마다 나가는 호출은 가격 일괄 다운로드 한 번뿐
+    try:
+        return _shares(ticker) * price
+    except Exception:
+        return None
+
+def get_universe_closes(tickers, period="1y"):
+    # 멀티 티커 다운로드 한 번으로 종가 행렬(날짜 x 티커)을 만든다
+    tickers = list(dict.fromkeys(tickers))
+    hist = yf.download(tickers, period=period, interval="1d", progress=False,
+                       auto_adjust=False, threads=True)
+    closes = hist["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    return closes
+
+def get_universe_data(tickers, sectors=None, max_workers=16, progress=None):
+    """
+    유니버스 전체의 히트맵 프레임(sector, ticker, size, chg)을 만든다.
+
+    - 가격: yf.download 한 번으로 모든 티커의 최근 5일 종가를 받는다.
+    - 시총: 주식수(fast_info, 하루 캐시) x 최근 종가. 캐시가 비어 있을 때만 max_workers 개 스레드로 조회한다.
+    - progress(done, total): 시총 조회가 끝날 때마다 호출되는 콜백 (선택).
+    - 개별 티커가 실패해도 나머지 결과는 그대로 반환한다.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    sectors = sectors or {}
+    if not tickers:
+        return pd.DataFrame(columns=["sector", "ticker", "size", "chg"])
+
+    try:
+        closes = get_universe_closes(tickers, period="5d")
+    except Exception as e:
+        print(e)
+        return pd.DataFrame(columns=["sector", "ticker", "size", "chg"])
+
+    last, chg = {}, {}
+    for t in closes.columns:
+        s = closes[t].dropna()
+        if len(s) < 2: continue
+        last[t] = float(s.iloc[-1])
+        chg[t] = round((s.iloc[-1] - s.iloc[-2]) / s.iloc[-2] * 100, 2)
+
+    rows = []
+    done, total = 0, len(chg)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_market_cap, t, last[t]): t for t in chg}
+        for f in as_completed(futures):
+            t = futures[f]
+            mcap = f.result() or last[t] * 1e6
+            rows.append({"sector": sectors.get(t) or "기타", "ticker": t, "size": float(mcap), "chg": float(chg[t])})
+            done += 1
+            if progress:
+                progress(done, total)
+
+    if not rows:
+        return pd.DataFrame(columns=["sector", "ticker", "size", "chg"])
+    return pd.DataFrame(rows).sort_values("ticker", ignore_index=True)
+
+# --- 경제 일정 (Finnhub) ---
+ECONOMIC_CALENDAR_URL = "https://finnhub.io/api/v1/calendar/economic"
+REQUEST_TIMEOUT = 10
+
+COUNTRY_MAP = {
+    "US": "미국", "EU": "유로존", "CN": "중국", "JP": "일본", "GB": "영국",
+    "CA": "캐나다", "AU": "호주", "DE": "독일", "FR": "프랑스", "KR": "한국"
+}
+
+def calendar_window():
+    # 이번 주 월요일부터 2주간
+    today = datetime.today()
+    start_of_week = today - timedelta(days=today.weekday())
+    end_of_week = start_of_week + timedelta(days=13)
+    return start_of_week.strftime("%Y-%m-%d"), end_of_week.strftime("%Y-%m-%d")
+
+def get_economic_events(from_date=None, to_date=None):
+    """Finnhub 경제 일정 원본 리스트. HTTP 오류는 requests.HTTPError 로 올린다."""
+    if from_date is None or to_date is None:
+        from_date, to_date = calendar_window()
+    params = {"from": from_date, "to": to_date, "token": os.getenv("FINNHUB_API_KEY")}
+    response = requests.get(ECONOMIC_CALENDAR_URL, params=params, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json().get("economicCalendar", [])
+
+def format_economic_calendar(calendar, limit=15):
+    events = []
+    for item in sorted(calendar, key=lambda x: x.get("date", ""))[:limit]:
+        date_str = item.get("date", "")[:10].replace("-", "/")
+        country_code = item.get("country", "기타")
+        country = COUNTRY_MAP.get(country_code, country_code)
+        event = item.get("event", "제목 없음")
+        impact = (item.get("impact") or "").lower()
+        importance_icon = "★★★" if impact == "high" else "★★" if impact in ["medium", "moderate"] else "★"
+
+        events.append({
+            "날짜": date_str,
+            "국가": country,
+            "지표": event,
+            "중요도": importance_icon
+        })
+    return pd.DataFrame(events)
@@ -83,6 +83,100 @@ def calculate_indicators(df):
         "GoldenCross": sma50.iloc[-1] > sma200.iloc[-1] if not pd.isna(sma50.iloc[-1]) and not pd.isna(sma200.iloc[-1]) else False
     }
 
+# --- 패널 모드: 종가 행렬(날짜 x 티커)에서 전 종목 지표를 한 번에 계산 ---
+# 각 열은 calculate_indicators 에 그 종목 히스토리만 넣었을 때와 같은 값을 낸다.
+def _rolling_sum_2d(x, window):
+    # 누적합 차이로 구간 합계. 구간 안에 NaN 이 있으면 NaN (pandas rolling 의 min_periods=window 와 동일)
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    count = np.cumsum(valid, axis=0)
+    csum[window:] = csum[window:] - csum[:-window]
+    count[window:] = count[window:] - count[:-window]
+    csum[count < window] = np.nan
+    return csum
+
+def _rolling_mean_2d(x, window):
+    return _rolling_sum_2d(x, window) / window
+
+def _rolling_std_2d(x, window):
+    # 표본 표준편차(ddof=1). 열 평균을 빼고 계산해 제곱합의 자릿수 손실을 줄인다
+    with np.errstate(all="ignore"):
+        shifted = x - np.nanmean(x, axis=0)
+        s1 = _rolling_sum_2d(shifted, window)
+        s2 = _rolling_sum_2d(shifted ** 2, window)
+        var = (s2 - s1 ** 2 / window) / (window - 1)
+    return np.sqrt(np.clip(var, 0, None))
+
+def _ema_2d(x, span):
+    # series.ewm(span=span, adjust=False).mean() 과 같은 점화식을 모든 열에 동시에 적용
+    alpha = 2 / (span + 1)
+    out = np.full_like(x, np.nan)
+    weighted = np.full(x.shape[1], np.nan)
+    old_wt = np.ones(x.shape[1])
+    for t in range(x.shape[0]):
+        cur = x[t]
+        obs = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+        old_wt = np.where(started, old_wt * (1 - alpha), old_wt)
+        upd = obs & started
+        with np.errstate(invalid="ignore"):
+            weighted = np.where(upd, (old_wt * weighted + alpha * cur) / (old_wt + alpha), weighted)
+        old_wt = np.where(upd, 1.0, old_wt)
+        weighted = np.where(obs & ~started, cur, weighted)
+        out[t] = weighted
+    return out
+
+def calculate_indicators_panel(prices):
+    """
+    prices: 종가 DataFrame (index=날짜, columns=티커). 상장 전 구간 등은 NaN 이어도 된다.
+    반환: index=티커, columns=RSI/MACD/MACD_signal/MACD_hist/BB_Position/GoldenCross 인 지표 테이블
+    """
+    x = prices.to_numpy(dtype=float)
+    missing = np.isnan(x)
+
+    # 1. RSI (calculate_rsi 와 동일: 첫 변화량은 0 으로 취급)
+    delta = np.vstack([np.full((1, x.shape[1]), np.nan), np.diff(x, axis=0)])
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    gain[missing] = np.nan
+    loss[missing] = np.nan
+    with np.errstate(all="ignore"):
+        rs = _rolling_mean_2d(gain, 14) / _rolling_mean_2d(loss, 14)
+        rsi = 100 - (100 / (1 + rs))
+
+    # 2. MACD
+    macd = _ema_2d(x, 12) - _ema_2d(x, 26)
+    macd_signal = _ema_2d(macd, 9)
+    macd_hist = macd - macd_signal
+
+    # 3. BB Position
+    mid = _rolling_mean_2d(x, 20)
+    std = _rolling_std_2d(x, 20)
+    upper, lower = mid + 2 * std, mid - 2 * std
+    with np.errstate(all="ignore"):
+        bb_pos = (x - lower) / (upper - lower)
+
+    # 4. SMA 50/200 (Golden/Dead Cross)
+    sma50 = _rolling_mean_2d(x, 50)
+    sma200 = _rolling_mean_2d(x, 200)
+    with np.errstate(invalid="ignore"):
+        golden = np.where(np.isnan(sma50) | np.isnan(sma200), False, sma50 > sma200)
+
+    # 종목마다 마지막 유효 가격 시점의 값을 뽑는다
+    has_data = (~missing).any(axis=0)
+    last = x.shape[0] - 1 - np.argmax(~missing[::-1], axis=0)
+    cols = np.arange(x.shape[1])
+    table = pd.DataFrame({
+        "RSI": rsi[last, cols],
+        "MACD": macd[last, cols],
+        "MACD_signal": macd_signal[last, cols],
+        "MACD_hist": macd_hist[last, cols],
+        "BB_Position": bb_pos[last, cols],
+        "GoldenCross": golden[last, cols].astype(bool),
+    }, index=prices.columns)
+    table.index.name = "ticker"
+    return table[has_data]
+
 # --- 해석 함수 (변경 없음) ---
 def interpret_indicator(name, value):
     interp = {
@@ -0,0 +1,243 @@
+# utils/llm_gateway.py — 공용 LLM 게이트웨이 (커넥션 풀 · 호출별 데드라인 · 429 백오프 · 동시 호출 제한 · 지표)
+#
+# chatbot.py 와 Raptor(LangChain, chat_model()) 가 같은 httpx 커넥션 풀 · 동시 호출 제한 · 지표를 쓴다.
+# OPENAI_BASE_URL 로 OpenAI 호환 서버(예: python -m utils.llm_stub)를 지정할 수 있다.
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+import openai
+from dotenv import load_dotenv
+from openai import OpenAI
+load_dotenv()
+
+DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+REQUEST_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))            # 요청 한 번의 타임아웃(초)
+DEFAULT_DEADLINE = float(os.getenv("LLM_DEADLINE", "60"))          # 재시도를 포함한 호출 전체 시한(초)
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))       # 프로세스 전체 동시 호출 수
+MAX_RETRIES = 5
+MAX_BACKOFF = 30
+
+# 재시도할 오류 (레이트 리밋 · 일시적 서버 오류 · 네트워크)
+RETRYABLE = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)
+
+
+class LLMError(Exception):
+    """재시도와 데드라인을 모두 소진한 LLM 호출 실패"""
+
+
+class LLMMetrics:
+    # 지연 시간 · 토큰 사용량 누적 (최근 window 건의 지연만 보관)
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.ttfts = deque(maxlen=window)
+        self.calls = self.errors = self.retries = 0
+        self.prompt_tokens = self.completion_tokens = 0
+
+    def record(self, latency=None, ttft=None, usage=None, error=False, retries=0):
+        with self._lock:
+            self.calls += 1
+            self.errors += bool(error)
+            self.retries += retries
+            if latency is not None:
+                self.latencies.append(latency)
+            if ttft is not None:
+                self.ttfts.append(ttft)
+            if usage is not None:
+                self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+                self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def snapshot(self):
+        """calls, errors, retries, 토큰 합계, 지연 p50/p95 (초)"""
+        def pct(values, q):
+            return round(sorted(values)[min(len(values) - 1, int(q * len(values)))], 3) if values else None
+        with self._lock:
+            lat, ttft = list(self.latencies), list(self.ttfts)
+            return {
+                "calls": self.calls, "errors": self.errors, "retries": self.retries,
+                "prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens,
+                "latency_p50": pct(lat, 0.5), "latency_p95": pct(lat, 0.95),
+                "ttft_p50": pct(ttft, 0.5), "ttft_p95": pct(ttft, 0.95),
+            }
+
+
+def _retry_after(err):
+    # 서버가 준 Retry-After(초) — 없으면 None
+    response = getattr(err, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMGateway:
+    """
+    OpenAI 호환 chat.completions 호출을 한 곳으로 모은다.
+    - httpx 커넥션 풀을 공유하고, 풀 크기와 세마포어로 동시 호출 수를 제한한다
+    - 호출마다 deadline(초) 안에서만 재시도한다. 429 는 Retry-After 를 우선, 없으면 지수 백오프 + 지터
+    - 지연 시간 · 첫 토큰 지연 · 토큰 사용량을 metrics 에 누적한다
+    """
+
+    def __init__(self, base_url=None, api_key=None, timeout=REQUEST_TIMEOUT, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES):
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL") or None
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=httpx.Timeout(timeout, connect=10),
+        )
+        # 재시도는 게이트웨이가 데드라인을 보며 직접 한다
+        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url, http_client=self.http_client, max_retries=0)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.metrics = LLMMetrics()
+
+    # --- 내부: 데드라인 안에서 재시도 ---
+    def _attempts(self, deadline):
+        """(시도 번호, 남은 시간, 데드라인 시각) 을 내보낸다. 다음 시도 전 대기는 _backoff 가 한다."""
+        end = time.monotonic() + (DEFAULT_DEADLINE if deadline is None else deadline)
+        for attempt in range(self.max_retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+            yield attempt, remaining, end
+
+    def _backoff(self, err, attempt, end):
+        wait = _retry_after(err)
+        if wait is None:
+            wait = min(2 ** attempt, MAX_BACKOFF) * (0.5 + random.random() / 2)
+        if time.monotonic() + wait >= end:
+            return False  # 기다리면 데드라인을 넘긴다
+        time.sleep(wait)
+        return True
+
+    def _acquire(self, remaining):
+        if not self._slots.acquire(timeout=remaining):
+            raise LLMError("동시 호출 대기 중 데드라인 초과")
+
+    # --- 호출 ---
+    def chat(self, messages, model=DEFAULT_MODEL, deadline=None, **kwargs):
+        """chat.completions 응답 본문(문자열). 실패하면 LLMError."""
+        last_err, attempt = None, 0
+        for attempt, remaining, end in self._attempts(deadline):
+            self._acquire(remaining)
+            start = time.monotonic()
+            try:
+                response = self.client.chat.completions.create(
+                    model=model, messages=messages, timeout=min(self.timeout, remaining), **kwargs
+                )
+            except RETRYABLE as e:
+                last_err = e
+            except openai.OpenAIError as e:
+                self.metrics.record(error=True, retries=attempt)
+                raise LLMError(str(e)) from e
+            else:
+                self.metrics.record(latency=time.monotonic() - start, usage=response.usage, retries=attempt)
+                return response.choices[0].message.content
+            finally:
+                self._slots.release()
+            if not self._backoff(last_err, attempt, end):
+                break
+        self.metrics.record(error=True, retries=attempt)
+        raise LLMError(f"LLM 호출 실패: {last_err or '데드라인 초과'}") from last_err
+
+    def stream(self, messages, model=DEFAULT_MODEL, deadline=None, **kwargs):
+        """
+        토큰이 도착하는 대로 문자열 조각을 yield 한다.
+        첫 토큰 전의 실패만 재시도한다 (이미 내보낸 내용은 되돌릴 수 없으므로). 실패하면 LLMError.
+        """
+        last_err, attempt = None, 0
+        for attempt, remaining, end in self._attempts(deadline):
+            self._acquire(remaining)
+            start = time.monotonic()
+            ttft, usage, sent = None, None, False
+            try:
+                stream = self.client.chat.completions.create(
+                    model=model, messages=messages, stream=True, stream_options={"include_usage": True},
+                    timeout=min(self.timeout, remaining), **kwargs
+                )
+                for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if ttft is None:
+                            ttft = time.monotonic() - start
+                        sent = True
+                        yield chunk.choices[0].delta.content
+                self.metrics.record(latency=time.monotonic() - start, ttft=ttft, usage=usage, retries=attempt)
+                return
+            except RETRYABLE as e:
+                if sent:
+                    self.metrics.record(error=True, retries=attempt)
+                    raise LLMError(f"스트리밍 중단: {e}") from e
+                last_err = e
+            except openai.OpenAIError as e:
+                self.metrics.record(error=True, retries=attempt)
+                raise LLMError(str(e)) from e
+            finally:
+                self._slots.release()
+            if not self._backoff(last_err, attempt, end):
+                break
+        self.metrics.record(error=True, retries=attempt)
+        raise LLMError(f"LLM 호출 실패: {last_err or '데드라인 초과'}") from last_err
+
+    def chat_model(self, model=DEFAULT_MODEL, **kwargs):
+        """
+        LangChain 채팅 모델 (Raptor 요약 체인용). 호출은 이 게이트웨이의 chat() 을 거치므로
+        동시 호출 제한 · 데드라인 안 재시도 · 지표가 그대로 적용된다. kwargs 는 chat.completions 인자 (temperature 등).
+        """
+        return _chat_model_class()(gateway=self, model_name=model, params=kwargs)
+
+
+_chat_model_cls = None
+
+def _chat_model_class():
+    # langchain_core 는 Raptor 경로에서만 필요하므로 처음 쓸 때 가져온다
+    global _chat_model_cls
+    if _chat_model_cls is None:
+        from typing import Any
+
+        from langchain_core.language_models.chat_models import BaseChatModel
+        from langchain_core.messages import AIMessage, convert_to_openai_messages
+        from langchain_core.outputs import ChatGeneration, ChatResult
+
+        class GatewayChatModel(BaseChatModel):
+            """LLMGateway.chat() 위의 LangChain 채팅 모델"""
+            gateway: Any
+            model_name: str = DEFAULT_MODEL
+            params: dict = {}
+
+            @property
+            def _llm_type(self):
+                return "quantalk-gateway"
+
+            @property
+            def _identifying_params(self):
+                return {"model_name": self.model_name, **self.params}
+
+            def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+                params = {**self.params, **kwargs}
+                if stop:
+                    params["stop"] = stop
+                text = self.gateway.chat(convert_to_openai_messages(messages), model=self.model_name, **params)
+                return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text or ""))])
+
+        _chat_model_cls = GatewayChatModel
+    return _chat_model_cls
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+def get_gateway():
+    """프로세스 공용 게이트웨이 (처음 호출할 때 환경 변수로 만든다)"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
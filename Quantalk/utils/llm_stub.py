@@ -0,0 +1,124 @@
+# utils/llm_stub.py — 오프라인 테스트용 OpenAI 호환 스텁 서버 (/v1/chat/completions, SSE 스트리밍 지원)
+#
+# 정해진 답변을 토큰 단위로 일정 간격을 두고 흘려보낸다. API 키 · 네트워크 없이 스트리밍 UI 와
+# 첫 토큰 지연(TTFT)을 확인할 때 쓴다.
+#
+# 실행: python -m utils.llm_stub --port 8010 --delay 0.05
+#       OPENAI_BASE_URL=http://127.0.0.1:8010/v1 OPENAI_API_KEY=stub streamlit run app.py
+import argparse
+import json
+import re
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8010
+TOKEN_DELAY = 0.05      # 토큰 사이 간격(초)
+FIRST_TOKEN_DELAY = 0.1  # 첫 토큰까지의 지연(초)
+
+CANNED_ANSWER = (
+    "요약: 지수는 기술주 중심으로 강보합, 금리 민감주는 약세입니다. "
+    "리스크: 이번 주 물가 지표와 연준 발언에 따라 변동성이 커질 수 있습니다. "
+    "기회: 실적 발표를 앞둔 반도체 업종의 수급이 개선되고 있습니다. "
+    "체크포인트: 10년물 금리 4.5% 돌파 여부와 달러 인덱스 방향을 확인하세요."
+)
+
+
+def _tokens(text):
+    # 공백을 앞 토큰에 붙여 나눈다 (이어 붙이면 원문과 같다)
+    return re.findall(r"\S+\s*", text)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    answer = CANNED_ANSWER
+    token_delay = TOKEN_DELAY
+    first_token_delay = FIRST_TOKEN_DELAY
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            return self._json(200, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "local"}]})
+        self._json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._json(404, {"error": {"message": "not found"}})
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        model = req.get("model", "stub")
+        tokens = _tokens(self.answer)[: req.get("max_tokens") or None]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = {"prompt_tokens": sum(len(_tokens(m.get("content") or "")) for m in req.get("messages", [])),
+                 "completion_tokens": len(tokens)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        time.sleep(self.first_token_delay)
+        if not req.get("stream"):
+            time.sleep(self.token_delay * len(tokens))
+            return self._json(200, {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(tokens)}}],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(delta, finish_reason=None):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            self.wfile.flush()
+
+        try:
+            send({"role": "assistant", "content": ""})
+            for i, tok in enumerate(tokens):
+                if i:
+                    time.sleep(self.token_delay)
+                send({"content": tok})
+            send({}, "stop")
+            if (req.get("stream_options") or {}).get("include_usage"):
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 클라이언트가 스트림을 끊음
+        self.close_connection = True
+
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT, delay=TOKEN_DELAY, first_delay=FIRST_TOKEN_DELAY, answer=CANNED_ANSWER):
+    """스텁 서버 객체를 만든다 (serve_forever 는 호출하는 쪽에서). port=0 이면 빈 포트를 고른다."""
+    handler = type("ConfiguredStubHandler", (StubHandler,),
+                   {"token_delay": delay, "first_token_delay": first_delay, "answer": answer})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI 호환 스트리밍 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--delay", type=float, default=TOKEN_DELAY, help="토큰 사이 간격(초)")
+    parser.add_argument("--first-delay", type=float, default=FIRST_TOKEN_DELAY, help="첫 토큰까지의 지연(초)")
+    args = parser.parse_args()
+    server = make_server(args.host, args.port, args.delay, args.first_delay)
+    print(f"[llm_stub] http://{args.host}:{server.server_port}/v1 (OPENAI_BASE_URL 로 지정)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,189 @@
+# utils/news_store.py — 로컬 뉴스 저장소 (Finnhub 증분 폴링 + 중복 제거 + 감정 점수 보관)
+#
+# 피드: "general"(시장 뉴스) 또는 티커. 화면은 항상 로컬 DB 에서 읽고,
+# 폴링 주기가 지난 피드만 마지막으로 본 id / 시각 이후의 뉴스를 받아 추가한다.
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import finnhub
+from dotenv import load_dotenv
+
+from wordcloud import STOPWORDS
+
+from utils.cache import singleflight, jittered
+from utils.semantic_cache import invalidate as invalidate_answers
+from utils.sentiment_model import model_scores, keyword_score
+load_dotenv()
+
+NEWS_DB_PATH = os.getenv("QUANTALK_NEWS_PATH", "./cache/news.sqlite")
+GENERAL_FEED = "general"
+POLL_SEC = {GENERAL_FEED: 60}  # 피드별 폴링 주기(초)
+TICKER_POLL_SEC = 300
+RETENTION_DAYS = 7             # 이보다 오래된 뉴스는 지운다 (company_news 조회 구간과 동일)
+
+client = finnhub.Client(api_key=os.getenv("FINNHUB_API_KEY"))
+
+_local = threading.local()
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(NEWS_DB_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(NEWS_DB_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS news (
+                feed TEXT, id INTEGER, datetime INTEGER, headline TEXT, source TEXT, url TEXT,
+                sentiment REAL, PRIMARY KEY (feed, id));
+            CREATE INDEX IF NOT EXISTS news_feed_time ON news (feed, datetime DESC);
+            CREATE TABLE IF NOT EXISTS polls (
+                feed TEXT PRIMARY KEY, polled_at REAL, last_id INTEGER, last_datetime INTEGER);
+            CREATE TABLE IF NOT EXISTS terms (
+                feed TEXT, day TEXT, term TEXT, count INTEGER, PRIMARY KEY (feed, day, term));
+        """)
+        _local.conn = conn
+    return conn
+
+
+# --- 단어 빈도 (워드 클라우드용, 새로 들어온 헤드라인만 일자별로 누적) ---
+_WORD = re.compile(r"\w[\w']+")
+MIN_HEADLINE_LEN = 10
+
+def tokenize(headline):
+    if len(headline) <= MIN_HEADLINE_LEN:
+        return []
+    words = (w[:-2] if w.lower().endswith("'s") else w for w in _WORD.findall(headline))
+    return [w for w in words if len(w) > 1 and not w.isdigit() and w.lower() not in STOPWORDS]
+
+def _add_terms(conn, feed, items):
+    counts = {}
+    for n in items:
+        day = datetime.fromtimestamp(n['datetime']).strftime('%Y-%m-%d')
+        for w in tokenize(n['headline']):
+            counts[(day, w)] = counts.get((day, w), 0) + 1
+    conn.executemany(
+        "INSERT INTO terms VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (feed, day, term) DO UPDATE SET count = count + excluded.count",
+        [(feed, day, w, c) for (day, w), c in counts.items()],
+    )
+
+def term_frequencies(feed, days=3, refresh=True):
+    """최근 days 일 동안 피드에 들어온 헤드라인의 {단어: 빈도}. refresh=True 면 먼저 증분 폴링한다."""
+    if refresh:
+        try:
+            poll(feed)
+        except Exception as e:
+            print(f"[news] {feed} 폴링 실패: {e}")
+    since = (datetime.today() - timedelta(days=days)).strftime('%Y-%m-%d')
+    rows = _conn().execute(
+        "SELECT term, SUM(count) FROM terms WHERE feed = ? AND day >= ? GROUP BY term", (feed, since)
+    ).fetchall()
+    return dict(rows)
+
+
+# --- 폴링 ---
+def _claim_poll(feed, interval):
+    # 폴링 권한 선점 (다른 스레드/워커가 방금 폴링했으면 False)
+    # 주기를 흩어 여러 티커 피드가 같은 순간에 몰려 폴링하지 않게 한다
+    now = time.time()
+    interval = jittered(interval)
+    conn = _conn()
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO polls (feed, polled_at, last_id, last_datetime) VALUES (?, 0, 0, 0)", (feed,))
+        cur = conn.execute("UPDATE polls SET polled_at = ? WHERE feed = ? AND polled_at <= ?", (now, feed, now - interval))
+    return cur.rowcount == 1
+
+def _fetch(feed, last_id, last_datetime):
+    if feed == GENERAL_FEED:
+        # min_id 이후 뉴스만
+        return client.general_news(GENERAL_FEED, min_id=last_id)
+    # company_news 는 날짜 단위 조회 — 마지막으로 본 날짜부터
+    since = datetime.fromtimestamp(last_datetime) if last_datetime else datetime.today() - timedelta(days=RETENTION_DAYS)
+    return client.company_news(feed, _from=since.strftime('%Y-%m-%d'), to=datetime.today().strftime('%Y-%m-%d'))
+
+def poll(feed, force=False):
+    """
+    피드의 새 뉴스를 받아 저장한다. 반환: 새로 저장한 건수 (폴링 주기 전이면 0)
+    같은 프로세스에서 동시에 들어온 폴링은 하나로 합쳐, 나머지 호출은 그 폴링이 끝난 뒤의 저장소를 읽는다.
+    """
+    return singleflight.do(f"news-poll:{feed}", _poll, feed, force)
+
+def _poll(feed, force):
+    interval = POLL_SEC.get(feed, TICKER_POLL_SEC)
+    if not force and not _claim_poll(feed, interval):
+        return 0
+    conn = _conn()
+    _, last_id, last_datetime = conn.execute(
+        "SELECT polled_at, last_id, last_datetime FROM polls WHERE feed = ?", (feed,)
+    ).fetchone() or (0, 0, 0)
+
+    items = [n for n in _fetch(feed, last_id, last_datetime) or [] if n.get('headline')]
+    scores = model_scores([n['headline'] for n in items])
+    rows = [(feed, n['id'], n['datetime'], n['headline'], n.get('source', ''), n.get('url', ''), s)
+            for n, s in zip(items, scores)]
+    cutoff = datetime.now() - timedelta(days=RETENTION_DAYS)
+    with conn:
+        # 이미 저장된 뉴스(중복)는 단어 빈도에 다시 더하지 않는다
+        new = [n for n, row in zip(items, rows)
+               if conn.execute("INSERT OR IGNORE INTO news VALUES (?, ?, ?, ?, ?, ?, ?)", row).rowcount]
+        _add_terms(conn, feed, new)
+        if items:
+            conn.execute(
+                "UPDATE polls SET last_id = MAX(last_id, ?), last_datetime = MAX(last_datetime, ?) WHERE feed = ?",
+                (max(n['id'] for n in items), max(n['datetime'] for n in items), feed),
+            )
+        conn.execute("DELETE FROM news WHERE feed = ? AND datetime < ?", (feed, int(cutoff.timestamp())))
+        conn.execute("DELETE FROM terms WHERE feed = ? AND day < ?", (feed, cutoff.strftime('%Y-%m-%d')))
+    if new and feed != GENERAL_FEED:
+        # 종목 뉴스가 새로 들어오면 그 종목의 캐시된 챗봇 답변은 버린다
+        # (시장 뉴스는 자주 들어오므로 시장 질문은 TTL 로만 만료)
+        try:
+            invalidate_answers([feed])
+        except Exception as e:
+            print(f"[news] {feed} 답변 캐시 무효화 실패: {e}")
+    return len(new)
+
+
+# --- 읽기 ---
+def _rescore(conn, rows):
+    # 모델이 준비되기 전에 들어온 뉴스(sentiment NULL)는 읽을 때 점수를 채운다
+    pending = [r for r in rows if r[5] is None]
+    if not pending:
+        return rows
+    scores = dict(zip((r[0] for r in pending), model_scores([r[2] for r in pending])))
+    with conn:
+        conn.executemany("UPDATE news SET sentiment = ? WHERE rowid = ?",
+                         [(s, rid) for rid, s in scores.items() if s is not None])
+    return [r if r[5] is not None else (*r[:5], scores[r[0]], r[6]) for r in rows]
+
+def feed_version(feed):
+    # 새 뉴스가 들어오거나 점수가 채워지면 바뀌는 값 (파생 데이터 캐시의 버전)
+    return tuple(_conn().execute(
+        "SELECT MAX(rowid), SUM(sentiment IS NULL) FROM news WHERE feed = ?", (feed,)
+    ).fetchone())
+
+def get_news(feed, limit=10, refresh=True):
+    """
+    로컬 저장소에서 피드의 최신 뉴스 limit 건. refresh=True 면 폴링 주기가 지났을 때만 먼저 증분 폴링한다.
+    반환: [{id, headline, source, url, datetime, sentiment}, ...] (최신순, sentiment 는 모델 점수 또는 키워드 규칙)
+    """
+    if refresh:
+        try:
+            poll(feed)
+        except Exception as e:
+            print(f"[news] {feed} 폴링 실패: {e}")
+    conn = _conn()
+    rows = conn.execute(
+        "SELECT rowid, id, headline, source, datetime, sentiment, url FROM news WHERE feed = ? "
+        "ORDER BY datetime DESC LIMIT ?", (feed, limit)
+    ).fetchall()
+    rows = _rescore(conn, rows)
+    return [
+        {"id": r[1], "headline": r[2], "source": r[3], "datetime": r[4], "url": r[6],
+         "sentiment": keyword_score(r[2]) if r[5] is None else r[5]}
+        for r in rows
+    ]
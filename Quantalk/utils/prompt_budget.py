@@ -0,0 +1,141 @@
+# utils/prompt_budget.py — 토큰 예산 안에서 프롬프트 조립 (tiktoken 계산 · 관련도 순 채우기 · 중복 헤드라인 제거)
+#
+# 프롬프트 = [지시문] + [컨텍스트 블록들] + [질문]. 블록은 항상 넘겨받은 순서 그대로 배치해
+# 앞부분(지시문 · 자주 안 바뀌는 블록)이 호출마다 같게 유지되도록 한다 (프로바이더 쪽 프롬프트 캐시에 유리).
+# 예산이 모자라면 질문과의 관련도가 낮은 줄부터 뺀다. 블록의 첫 줄(제목)은 남긴다.
+import re
+import threading
+
+import tiktoken
+
+DEFAULT_MODEL = "gpt-4o-mini"
+PROMPT_BUDGET = 1200       # 지시문 + 컨텍스트 + 질문 토큰 상한
+DUPLICATE_SIMILARITY = 0.8  # 헤드라인 단어 집합의 자카드 유사도가 이 이상이면 같은 뉴스로 본다
+
+_WORD = re.compile(r"[0-9A-Za-z가-힣]+")
+_encodings = {}
+_enc_lock = threading.Lock()
+
+
+# --- 토큰 수 ---
+def _encoding(model):
+    with _enc_lock:
+        if model not in _encodings:
+            try:
+                try:
+                    enc = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    enc = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # 인코딩 파일을 받을 수 없으면 (오프라인) 근사치로 센다
+                print(f"[prompt_budget] tiktoken 인코딩 로드 실패, 근사치 사용: {e}")
+                enc = None
+            _encodings[model] = enc
+        return _encodings[model]
+
+def count_tokens(text, model=DEFAULT_MODEL):
+    if not text:
+        return 0
+    enc = _encoding(model)
+    # 근사치: UTF-8 3바이트당 1토큰 (한글 1자 ≈ 1토큰, 영문은 약간 과대 추정)
+    return len(enc.encode(text)) if enc is not None else len(text.encode()) // 3 + 1
+
+
+# --- 관련도 / 중복 ---
+def _terms(text):
+    return {w.lower() for w in _WORD.findall(text) if len(w) > 1}
+
+def relevance(text, question):
+    """질문 단어가 text 에 얼마나 들어 있는지 (0 ~ 1)"""
+    q = _terms(question)
+    return len(q & _terms(text)) / len(q) if q else 0.0
+
+def _is_item(line):
+    return line.lstrip().startswith("- ")
+
+def _near_duplicate(terms, seen):
+    return any(len(terms & s) / max(len(terms | s), 1) >= DUPLICATE_SIMILARITY for s in seen)
+
+
+# --- 지표 ---
+class BudgetMetrics:
+    # 조립 전/후 토큰 누적 (절약량 확인용)
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = self.tokens_before = self.tokens_after = self.duplicates = self.dropped = 0
+
+    def record(self, report):
+        with self._lock:
+            self.calls += 1
+            self.tokens_before += report["tokens_before"]
+            self.tokens_after += report["tokens_after"]
+            self.duplicates += report["duplicates"]
+            self.dropped += report["dropped_lines"]
+
+    def snapshot(self):
+        with self._lock:
+            saved = self.tokens_before - self.tokens_after
+            return {
+                "calls": self.calls, "tokens_before": self.tokens_before, "tokens_after": self.tokens_after,
+                "tokens_saved": saved, "saved_ratio": round(saved / self.tokens_before, 3) if self.tokens_before else 0.0,
+                "duplicates": self.duplicates, "dropped_lines": self.dropped,
+            }
+
+metrics = BudgetMetrics()
+
+
+# --- 조립 ---
+def build_prompt(question, blocks, instructions="", budget=PROMPT_BUDGET, model=DEFAULT_MODEL):
+    """
+    blocks: 컨텍스트 텍스트 리스트 (자주 바뀌지 않는 것부터). 각 블록의 "- " 로 시작하는 줄이 항목(헤드라인 등).
+    반환: (프롬프트, 리포트). 리포트: tokens_before / tokens_after / tokens_saved / duplicates / dropped_lines
+    """
+    question_part = f"[질문]\n{question}"
+    head = instructions.strip()
+    original = "\n\n".join([p for p in (head, *blocks) if p] + [question_part])
+
+    # 1) 블록 간 · 블록 내 중복 헤드라인 제거 (앞쪽 블록의 것을 남긴다)
+    seen, duplicates, parsed = [], 0, []
+    for block in blocks:
+        lines = []
+        for i, line in enumerate(block.splitlines()):
+            if i > 0 and _is_item(line):
+                terms = _terms(line)
+                if terms and _near_duplicate(terms, seen):
+                    duplicates += 1
+                    continue
+                seen.append(terms)
+            lines.append(line)
+        parsed.append(lines)
+
+    # 2) 예산: 지시문과 질문은 그대로 두고, 남는 만큼 컨텍스트 줄을 관련도 순으로 채운다
+    fixed = count_tokens("\n\n".join(p for p in (head, question_part) if p), model)
+    remaining = max(budget - fixed, 0)
+    keep = [[False] * len(lines) for lines in parsed]
+    candidates = []
+    for b, lines in enumerate(parsed):
+        for i, line in enumerate(lines):
+            tokens = count_tokens(line, model) + 1  # 줄바꿈
+            if i == 0:
+                # 블록 제목은 먼저 넣는다
+                if tokens <= remaining:
+                    keep[b][i] = True
+                    remaining -= tokens
+            else:
+                # 같은 관련도면 블록 안에서 앞 줄(요약 줄)이 먼저
+                candidates.append((-relevance(line, question), b, i, tokens))
+    dropped = 0
+    for _, b, i, tokens in sorted(candidates):
+        if tokens <= remaining:
+            keep[b][i] = True
+            remaining -= tokens
+        else:
+            dropped += 1
+
+    kept_blocks = ["\n".join(l for l, k in zip(lines, flags) if k) for lines, flags in zip(parsed, keep)]
+    prompt = "\n\n".join([p for p in (head, *kept_blocks) if p] + [question_part])
+    before, after = count_tokens(original, model), count_tokens(prompt, model)
+    report = {"tokens_before": before, "tokens_after": after, "tokens_saved": before - after,
+              "duplicates": duplicates, "dropped_lines": dropped}
+    metrics.record(report)
+    return prompt, report
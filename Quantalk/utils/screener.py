@@ -0,0 +1,133 @@
+# utils/screener.py — 지표 스크리너 (미리 계산한 종목별 지표 테이블 + DuckDB 조건 검색)
+#
+# 예) screen("RSI < 30 and GoldenCross and BB_Position < 0.2")
+# 지표 테이블은 로컬 봉 저장소에서 새 봉이 들어왔을 때만 패널 모드로 한 번에 다시 계산한다.
+import os
+import re
+import threading
+import time
+
+import duckdb
+import pandas as pd
+from filelock import FileLock, Timeout
+
+from utils.bar_store import update_bars_many
+from utils.indicators import calculate_indicators_panel
+
+INDICATOR_TABLE_PATH = os.getenv("QUANTALK_INDICATOR_PATH", "./cache/indicators.parquet")
+INDICATOR_REFRESH_SEC = 900  # 봉 저장소를 확인하는 주기(초)
+HISTORY_PERIOD = "1y"        # SMA200 을 계산하려면 200 거래일 이상 필요
+
+EXAMPLE_QUERY = "RSI < 30 and GoldenCross and BB_Position < 0.2"
+
+
+# --- 지표 테이블 생성 / 갱신 ---
+def build_indicator_table(bars, sectors=None):
+    """{티커: 봉 DataFrame} -> 티커별 지표 테이블 (sector, close, as_of 포함)"""
+    sectors = sectors or {}
+    closes = pd.DataFrame({t: b["Close"] for t, b in bars.items() if not b.empty})
+    if closes.empty:
+        return pd.DataFrame()
+    table = calculate_indicators_panel(closes.sort_index())
+    last = closes.apply(lambda s: s.last_valid_index())
+    table.insert(0, "sector", [sectors.get(t) or "기타" for t in table.index])
+    table["close"] = [closes[t].loc[last[t]] for t in table.index]
+    table["as_of"] = [last[t].strftime("%Y-%m-%d %H:%M") for t in table.index]
+    return table.reset_index()
+
+def _table_as_of(path=INDICATOR_TABLE_PATH):
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_parquet(path, columns=["ticker", "as_of"])
+    return dict(zip(df["ticker"], df["as_of"]))
+
+def indicator_table_age(path=INDICATOR_TABLE_PATH):
+    return time.time() - os.path.getmtime(path) if os.path.exists(path) else float("inf")
+
+def refresh_indicator_table(constituents, path=INDICATOR_TABLE_PATH, max_age=INDICATOR_REFRESH_SEC, force=False):
+    """
+    constituents: {티커: 섹터}. 봉 저장소를 증분 갱신하고,
+    어느 종목이든 새 봉이 생겼을 때만 지표 테이블을 다시 계산해 저장한다.
+    """
+    if not force and indicator_table_age(path) < max_age:
+        return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        with FileLock(f"{path}.lock", timeout=0):
+            bars = update_bars_many(list(constituents), "1d", period=HISTORY_PERIOD)
+            latest = {t: b.index[-1].strftime("%Y-%m-%d %H:%M") for t, b in bars.items() if not b.empty}
+            if not force and os.path.exists(path) and latest == _table_as_of(path):
+                os.utime(path)  # 새 봉 없음 — 확인 시각만 갱신
+                return False
+            table = build_indicator_table(bars, constituents)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            table.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+            return True
+    except Timeout:
+        return False
+
+
+# --- 조회 ---
+_cached = {"mtime": None, "table": None}
+_read_lock = threading.Lock()
+
+def load_indicator_table(path=INDICATOR_TABLE_PATH):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _read_lock:
+        if _cached["mtime"] != mtime:
+            _cached.update(mtime=mtime, table=pd.read_parquet(path))
+        return _cached["table"]
+
+_TOKEN = re.compile(r"""
+    \s+ | (?P<num>\d+(\.\d+)?) | (?P<str>'[^']*') | (?P<op><=|>=|<>|!=|=|<|>|\(|\)|,|-|\+)
+    | (?P<ident>[A-Za-z_][A-Za-z0-9_]*)
+""", re.VERBOSE)
+_KEYWORDS = {"and", "or", "not", "true", "false", "is", "null", "between", "in"}
+
+def validate_query(expr, columns):
+    """
+    WHERE 절로 쓸 수 있는 조건식인지 검사한다 (컬럼명 · 숫자 · 문자열 · 비교/논리 연산자만 허용).
+    함수 호출이나 다른 테이블 참조는 ValueError.
+    """
+    if "--" in expr or "/*" in expr:
+        raise ValueError("주석은 사용할 수 없습니다")
+    allowed = {c.lower() for c in columns} | _KEYWORDS
+    pos = 0
+    while pos < len(expr):
+        m = _TOKEN.match(expr, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"허용되지 않는 문자: {expr[pos:pos + 10]!r}")
+        ident = m.group("ident")
+        if ident and ident.lower() not in allowed:
+            raise ValueError(f"알 수 없는 항목: {ident}")
+        pos = m.end()
+    return expr
+
+def screen(expr, table=None, order_by="ticker", limit=None):
+    """
+    지표 테이블에서 조건식을 만족하는 종목을 돌려준다.
+    expr 예: "RSI < 30 and GoldenCross and BB_Position < 0.2", "sector = 'Energy' and MACD_hist > 0"
+    """
+    table = load_indicator_table() if table is None else table
+    if table is None or table.empty:
+        return pd.DataFrame()
+    expr = validate_query(expr.strip() or "true", table.columns)
+    order_col, _, direction = order_by.partition(" ")
+    if order_col.lower() not in {c.lower() for c in table.columns} or direction.lower() not in ("", "asc", "desc"):
+        raise ValueError(f"정렬 기준 오류: {order_by}")
+
+    sql = f"SELECT * FROM indicators WHERE {expr} ORDER BY {order_col} {direction}"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    con = duckdb.connect()
+    try:
+        con.register("indicators", table)
+        return con.execute(sql).df()
+    except duckdb.Error as e:
+        raise ValueError(f"조건식 오류: {e}") from e
+    finally:
+        con.close()
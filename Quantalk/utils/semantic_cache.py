@@ -0,0 +1,146 @@
+# utils/semantic_cache.py — 챗봇 의미 기반 응답 캐시 (문장 임베딩 유사도 + TTL + 티커별 무효화)
+#
+# 질문을 sentence-transformer 로 임베딩해 SQLite 에 답변과 함께 보관한다.
+# 같은 범위(scope) · 같은 티커의 최근 질문 중 코사인 유사도가 임계값 이상인 것이 있으면 그 답변을 돌려준다.
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")  # SEC 노트북과 같은 임베딩 모델
+SEMANTIC_CACHE_PATH = os.getenv("QUANTALK_SEMANTIC_CACHE_PATH", "./cache/semantic_cache.sqlite")
+SIMILARITY_THRESHOLD = 0.92
+DEFAULT_TTL = 600          # 시세에 민감한 답변이므로 짧게 (초)
+MAX_CANDIDATES = 500       # 한 번에 비교할 최근 답변 수
+RETENTION_SEC = 86400      # 이보다 오래된 답변은 저장할 때 지운다
+
+_model = None
+_load_lock = threading.Lock()
+_loading = False
+_failed = False  # 로드에 실패하면 캐시 없이 동작
+
+_local = threading.local()
+
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(os.path.dirname(SEMANTIC_CACHE_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(SEMANTIC_CACHE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY, model TEXT, scope TEXT, ticker TEXT, prompt TEXT, embedding BLOB,
+                answer TEXT, created_at REAL);
+            CREATE INDEX IF NOT EXISTS answers_lookup ON answers (model, scope, ticker, created_at DESC);
+        """)
+        _local.conn = conn
+    return conn
+
+
+# --- 임베딩 모델 (처음 한 번, 백그라운드) ---
+def _load():
+    global _model, _loading, _failed
+    try:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(EMBED_MODEL, device="cpu")
+        with _load_lock:
+            _model = model
+    except Exception as e:
+        print(f"[semantic_cache] 임베딩 모델 로드 실패 ({EMBED_MODEL}): {e}")
+        _failed = True
+    finally:
+        with _load_lock:
+            _loading = False
+
+def warm_up(block=False):
+    """임베딩 모델을 미리 로드한다. block=False 면 백그라운드 스레드에서."""
+    global _loading
+    with _load_lock:
+        if _model is not None or _loading or _failed:
+            start = False
+        else:
+            _loading = start = True
+    if start:
+        if block:
+            _load()
+        else:
+            threading.Thread(target=_load, daemon=True, name="semantic-cache-model").start()
+    return _model is not None
+
+def embed(text):
+    """정규화된 float32 임베딩 (모델이 아직 준비되지 않았으면 None)"""
+    if not warm_up():
+        return None
+    return _model.encode([" ".join(text.split())], normalize_embeddings=True)[0].astype(np.float32)
+
+
+# --- 질문의 종목 (캐시 범위) ---
+# 대문자 티커 (BRK.B / BRK-B 포함). 한글 조사가 바로 붙어도 잡히도록 영문/숫자 경계만 본다
+_TICKER_RE = re.compile(r"(?<![A-Za-z0-9])\$?([A-Z]{1,5}(?:[.-][A-Z])?)(?![A-Za-z0-9])")
+
+def prompt_ticker(text, known_tickers):
+    """
+    질문의 캐시 범위(ticker 키). 질문에 나온 티커 중 known_tickers 에 있는 것만 본다.
+    없으면 "" (시장 질문), 하나면 그 티커, 여럿이면 정렬해 쉼표로 이은 것 (예: "AAPL,MSFT").
+    """
+    known = set(known_tickers)
+    found = {m.replace(".", "-") for m in _TICKER_RE.findall(text or "")} & known
+    return ",".join(sorted(found))
+
+
+# --- 조회 / 저장 ---
+def lookup(prompt, ticker=None, scope="chat", ttl=DEFAULT_TTL, threshold=SIMILARITY_THRESHOLD, embedding=None):
+    """ttl 초 이내에 저장된 비슷한 질문의 답변. 없으면 None."""
+    vec = embed(prompt) if embedding is None else embedding
+    if vec is None:
+        return None
+    rows = _conn().execute(
+        "SELECT embedding, answer FROM answers WHERE model = ? AND scope = ? AND ticker = ? AND created_at >= ? "
+        "ORDER BY created_at DESC LIMIT ?", (EMBED_MODEL, scope, ticker or "", time.time() - ttl, MAX_CANDIDATES)
+    ).fetchall()
+    if not rows:
+        return None
+    sims = np.frombuffer(b"".join(r[0] for r in rows), dtype=np.float32).reshape(len(rows), -1) @ vec
+    best = int(np.argmax(sims))
+    return rows[best][1] if sims[best] >= threshold else None
+
+def store(prompt, answer, ticker=None, scope="chat", embedding=None):
+    vec = embed(prompt) if embedding is None else embedding
+    if vec is None or not answer:
+        return False
+    now = time.time()
+    with _conn() as conn:
+        conn.execute("DELETE FROM answers WHERE created_at < ?", (now - RETENTION_SEC,))
+        conn.execute(
+            "INSERT INTO answers (model, scope, ticker, prompt, embedding, answer, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (EMBED_MODEL, scope, ticker or "", prompt, vec.tobytes(), answer, now),
+        )
+    return True
+
+def invalidate(tickers=None, older_than=None):
+    """
+    캐시된 답변을 지운다.
+    tickers: 이 티커들이 들어간 답변만 (여러 종목 질문 "AAPL,MSFT" 도 포함, "" 은 종목 없는 시장 질문).
+    older_than: 이 초보다 오래된 답변만. 둘 다 None 이면 전부. 반환: 지운 건수
+    """
+    where, params = [], []
+    if tickers is not None:
+        tickers = list(tickers)
+        match = []
+        for t in tickers:
+            if t:
+                match.append("(',' || ticker || ',') LIKE ?")
+                params.append(f"%,{t},%")
+            else:
+                match.append("ticker = ''")
+        where.append("(" + (" OR ".join(match) or "0") + ")")
+    if older_than is not None:
+        where.append("created_at < ?")
+        params.append(time.time() - older_than)
+    sql = "DELETE FROM answers" + (" WHERE " + " AND ".join(where) if where else "")
+    with _conn() as conn:
+        return conn.execute(sql, params).rowcount
@@ -1,14 +1,16 @@
-import finnhub
 from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+from PIL import Image
 from io import BytesIO
 import base64
-from datetime import datetime, timedelta
-import os
-from dotenv import load_dotenv
-load_dotenv()
-
-client = finnhub.Client(api_key=os.getenv("FINNHUB_API_KEY"))
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from cachetools import LRUCache
+from utils.cache import get_backend
+from utils.sentiment_model import score_headlines
+from utils.news_store import get_news, term_frequencies, GENERAL_FEED
 
 def time_ago(dt_str):
     dt = datetime.fromtimestamp(int(dt_str))
@@ -20,40 +22,117 @@ def time_ago(dt_str):
     else:
         return f"{diff.seconds//60}분 전"
 
+def to_news_items(news, limit):
+    news = news[:limit]
+    # 점수가 없는 헤드라인만 한 번에 배치로 (이미 본 헤드라인은 캐시)
+    scores = iter(score_headlines([n['headline'] for n in news if n.get('sentiment') is None]))
+    result = []
+    for n in news:
+        result.append({
+            "title": n['headline'],
+            "source": n['source'],
+            "time_ago": time_ago(n['datetime']),
+            "sentiment": n['sentiment'] if n.get('sentiment') is not None else next(scores)
+        })
+    return result
+
+FALLBACK_NEWS = [{"title": "뉴스 서버 연결 중...", "source": "퀀톡", "time_ago": "지금", "sentiment": 0}]
+
 def get_market_news_with_sentiment(ticker=None, limit=10):
+    # 로컬 뉴스 저장소에서 읽는다 (폴링 주기가 지난 피드만 Finnhub 증분 조회)
     try:
-        if ticker:
-            # 회사별 뉴스
-            to_date = datetime.today().strftime('%Y-%m-%d')
-            from_date = (datetime.today() - timedelta(days=7)).strftime('%Y-%m-%d')
-            news = client.company_news(ticker, _from=from_date, to=to_date)
-        else:
-            # 일반 시장 뉴스
-            news = client.general_news('general')[:limit*2]
-
-        result = []
-        for n in news[:limit]:
-            result.append({
-                "title": n['headline'],
-                "source": n['source'],
-                "time_ago": time_ago(n['datetime']),
-                "sentiment": 0.1 if 'positive' in n['headline'].lower() else -0.1 if 'negative' in n['headline'].lower() else 0
-            })
-        return result
+        news = get_news(ticker or GENERAL_FEED, limit)
+        return to_news_items(news, limit)
     except:
-        return [{"title": "뉴스 서버 연결 중...", "source": "퀀톡", "time_ago": "지금", "sentiment": 0}]
+        return list(FALLBACK_NEWS)
+
+# --- 워드 클라우드 (단어 빈도 -> 이미지, 빈도표 해시로 캐시, 렌더링은 워커 스레드) ---
+WORDCLOUD_DAYS = 3
+WORDCLOUD_SIZE = (800, 400)
+WORDCLOUD_MIN_WORDS = 8       # 이보다 단어가 적으면 그리지 않는다
+WORDCLOUD_TTL = 7 * 86400     # 같은 빈도표면 같은 그림이므로 오래 보관
 
-def get_wordcloud_base64(ticker):
+_wc_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wordcloud")
+_wc_images = LRUCache(maxsize=256)  # 빈도표 해시 -> data URI
+_wc_latest = {}                     # 티커 -> 마지막으로 그린 빈도표 해시 (새 그림이 준비될 때까지 보여줄 것)
+_wc_pending = set()                 # 워커가 그리고 있는 빈도표 해시
+_wc_rendering = {}                  # 티커 -> 그 티커를 위해 마지막으로 요청한 빈도표 해시
+_wc_lock = threading.Lock()
+
+def _freq_key(freqs):
+    digest = hashlib.sha1(json.dumps(sorted(freqs.items())).encode()).hexdigest()
+    return f"wordcloud:{digest}"
+
+def _encode(image):
+    # WEBP 가 가장 작고, Pillow 가 WEBP 를 지원하지 않으면 최적화한 PNG
+    buf = BytesIO()
     try:
-        to_date = datetime.today().strftime('%Y-%m-%d')
-        from_date = (datetime.today() - timedelta(days=3)).strftime('%Y-%m-%d')
-        news = client.company_news(ticker, _from=from_date, to=to_date)
-        text = " ".join([n['headline'] for n in news if len(n['headline']) > 10])
-        if len(text) < 50:
+        image.save(buf, format="WEBP", quality=80, method=4)
+        mime = "image/webp"
+    except (KeyError, OSError):
+        buf = BytesIO()
+        image.convert("P", palette=Image.ADAPTIVE).save(buf, format="PNG", optimize=True)
+        mime = "image/png"
+    return f"data:{mime};base64," + base64.b64encode(buf.getvalue()).decode()
+
+def render_wordcloud(freqs):
+    width, height = WORDCLOUD_SIZE
+    wc = WordCloud(width=width, height=height, background_color='white', colormap='viridis')
+    return _encode(wc.generate_from_frequencies(freqs).to_image())
+
+def _render_job(key, freqs):
+    try:
+        uri = render_wordcloud(freqs)
+        _wc_images[key] = uri
+        get_backend().set(key, uri, WORDCLOUD_TTL, 0)
+    except Exception as e:
+        print(f"[wordcloud] 렌더링 실패: {e}")
+    finally:
+        with _wc_lock:
+            _wc_pending.discard(key)
+
+def _cached_image(key):
+    if key in _wc_images:
+        return _wc_images[key]
+    try:
+        hit = get_backend().get(key)
+    except Exception:
+        hit = None
+    if hit is not None:
+        _wc_images[key] = hit[0]
+        return hit[0]
+    return None
+
+def wordcloud_rendering(ticker):
+    """이 티커의 워드 클라우드를 워커가 아직 그리고 있는지 (다른 티커의 렌더링과는 무관)"""
+    with _wc_lock:
+        return _wc_rendering.get(ticker) in _wc_pending
+
+def get_wordcloud_base64(ticker, block=False):
+    """
+    최근 뉴스 헤드라인의 워드 클라우드 이미지(data URI). 뉴스가 부족하면 None.
+    같은 빈도표의 그림은 캐시에서 바로 돌려주고, 새 그림은 워커에서 그린다.
+    block=False 면 그리는 동안 직전 그림(없으면 None)을 돌려준다.
+    """
+    try:
+        freqs = term_frequencies(ticker, days=WORDCLOUD_DAYS)
+        if len(freqs) < WORDCLOUD_MIN_WORDS:
             return None
-        wc = WordCloud(width=800, height=400, background_color='white', colormap='viridis').generate(text)
-        img = BytesIO()
-        wc.to_image().save(img, format='PNG')
-        return "data:image/png;base64," + base64.b64encode(img.getvalue()).decode()
-    except:
-        return None
\ No newline at end of file
+        key = _freq_key(freqs)
+        uri = _cached_image(key)
+        if uri is None:
+            with _wc_lock:
+                future = None
+                _wc_rendering[ticker] = key
+                if key not in _wc_pending:
+                    _wc_pending.add(key)
+                    future = _wc_executor.submit(_render_job, key, freqs)
+            if block and future is not None:
+                future.result()
+                uri = _wc_images.get(key)
+        if uri is None:
+            return _wc_images.get(_wc_latest.get(ticker))
+        _wc_latest[ticker] = key
+        return uri
+    except Exception:
+        return None
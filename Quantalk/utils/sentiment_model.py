@@ -0,0 +1,105 @@
+# utils/sentiment_model.py — 로컬 트랜스포머 헤드라인 감정 점수 (CPU 배치 추론 + 헤드라인 해시 캐시)
+import hashlib
+import os
+import threading
+
+from cachetools import LRUCache
+
+from utils.cache import get_backend
+
+MODEL_NAME = os.getenv("SENTIMENT_MODEL", "ProsusAI/finbert")  # 금융 뉴스용 BERT (positive/negative/neutral)
+BATCH_SIZE = 32
+SCORE_TTL = 30 * 86400  # 같은 헤드라인의 점수는 바뀌지 않으므로 오래 보관
+
+_memory = LRUCache(maxsize=20000)
+_pipeline = None
+_load_lock = threading.Lock()
+_loading = False
+_failed = False  # 로드에 실패하면 다시 시도하지 않고 키워드 규칙만 쓴다
+
+
+# --- 모델 로딩 (처음 한 번, 백그라운드) ---
+def _load():
+    global _pipeline, _loading, _failed
+    try:
+        from transformers import pipeline
+        pipe = pipeline("text-classification", model=MODEL_NAME, top_k=None, device=-1, truncation=True)
+        with _load_lock:
+            _pipeline = pipe
+    except Exception as e:
+        print(f"[sentiment] 모델 로드 실패 ({MODEL_NAME}): {e}")
+        _failed = True
+    finally:
+        with _load_lock:
+            _loading = False
+
+def warm_up(block=False):
+    """모델을 미리 로드한다. block=False 면 백그라운드 스레드에서."""
+    global _loading
+    with _load_lock:
+        if _pipeline is not None or _loading or _failed:
+            start = False
+        else:
+            _loading = start = True
+    if start:
+        if block:
+            _load()
+        else:
+            threading.Thread(target=_load, daemon=True, name="sentiment-model").start()
+    return _pipeline is not None
+
+
+# --- 점수 ---
+def keyword_score(headline):
+    # 모델이 아직 준비되지 않았을 때 쓰는 기존 규칙
+    text = headline.lower()
+    return 0.1 if 'positive' in text else -0.1 if 'negative' in text else 0
+
+def _key(headline):
+    digest = hashlib.sha1(" ".join(headline.lower().split()).encode()).hexdigest()
+    return f"sentiment:{MODEL_NAME}:{digest}"
+
+def _to_score(labels):
+    # [{label, score}, ...] -> P(positive) - P(negative), 범위 -1 ~ 1
+    probs = {d["label"].lower(): d["score"] for d in labels}
+    return round(probs.get("positive", 0.0) - probs.get("negative", 0.0), 4)
+
+def model_scores(headlines, block=False):
+    """
+    헤드라인 리스트의 모델 감정 점수(-1 ~ 1)를 같은 순서로 돌려준다. 모델이 준비되지 않았으면 그 자리는 None.
+    이미 점수를 매긴 헤드라인은 캐시(메모리 -> 공유 캐시)에서 꺼내고, 나머지만 배치로 추론한다.
+    """
+    keys = [_key(h) for h in headlines]
+    scores = {}
+    backend = get_backend()
+    for k in set(keys):
+        if k in _memory:
+            scores[k] = _memory[k]
+            continue
+        try:
+            hit = backend.get(k)
+        except Exception:
+            hit = None
+        if hit is not None:
+            scores[k] = _memory[k] = hit[0]
+
+    missing = list({k: h for k, h in zip(keys, headlines) if k not in scores}.items())
+    if missing and warm_up(block=block):
+        texts = [h for _, h in missing]
+        try:
+            outputs = _pipeline(texts, batch_size=BATCH_SIZE)
+            for (k, _), labels in zip(missing, outputs):
+                scores[k] = _memory[k] = _to_score(labels)
+                backend.set(k, scores[k], SCORE_TTL, 0)
+        except Exception as e:
+            print(f"[sentiment] 추론 실패: {e}")
+
+    return [scores.get(k) for k in keys]
+
+def score_headlines(headlines, block=False):
+    """
+    model_scores 와 같되, 모델이 아직 로드 중이면 (block=False) 기다리지 않고 키워드 규칙으로 대신한다.
+    키워드 규칙 값은 캐시하지 않는다.
+    """
+    scores = model_scores(headlines, block=block)
+    return [keyword_score(h) if s is None else s for s, h in zip(scores, headlines)]
@@ -0,0 +1,157 @@
+# utils/snapshot.py — 백그라운드 시장 스냅샷 빌더 (Arrow IPC 파일 + 메모리 맵 읽기)
+#
+# 스케줄러가 일정 주기로 지수 시세 · 히트맵(종목별 등락/시총/섹터) · 속보 · 경제 일정을 모아
+# 하나의 Arrow 파일로 원자적으로 교체한다. 메인 페이지는 이 파일을 메모리 맵으로 읽기만 한다.
+# 같은 스레드가 스크리너용 지표 테이블도 주기적으로 갱신한다.
+#
+# 단독 실행: python -m utils.snapshot  (스트림릿 워커와 별도로 빌더만 돌릴 때)
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+from filelock import FileLock, Timeout
+
+from utils.data_fetcher import (
+    get_index_data, get_history, get_universe_data, load_sp500_constituents,
+    get_economic_events, format_economic_calendar,
+)
+from utils.sentiment import get_market_news_with_sentiment
+from utils.async_fetcher import run_in_thread, run_sections
+from utils.screener import refresh_indicator_table, indicator_table_age, INDICATOR_REFRESH_SEC
+
+SNAPSHOT_PATH = os.getenv("QUANTALK_SNAPSHOT_PATH", "./cache/market_snapshot.arrow")
+SNAPSHOT_INTERVAL = 60  # 재생성 주기(초)
+INDEX_SYMBOLS = ["^GSPC", "^IXIC"]
+
+HEATMAP_SCHEMA = pa.schema([
+    ("ticker", pa.string()),
+    ("sector", pa.string()),
+    ("size", pa.float64()),
+    ("chg", pa.float64()),
+])
+
+
+# --- 빌드 ---
+def _index_entry(sym):
+    quote = get_index_data(sym) or {}
+    hist = get_history(sym)
+    series = hist["Close"].tail(60).round(2).tolist() if not hist.empty else []
+    return {**quote, "series": series}
+
+def _calendar_records():
+    events = get_economic_events()
+    return format_economic_calendar(events).to_dict("records") if events else []
+
+def build_market_snapshot(index_symbols=INDEX_SYMBOLS, news_limit=8):
+    """히트맵 테이블 + (지수 · 속보 · 경제 일정) 메타데이터를 담은 Arrow 테이블을 만든다."""
+    sections = {
+        "news": run_in_thread(get_market_news_with_sentiment, limit=news_limit),
+        "calendar": run_in_thread(_calendar_records),
+    }
+    for sym in index_symbols:
+        sections[f"index:{sym}"] = run_in_thread(_index_entry, sym)
+    small = run_sections(sections)
+
+    constituents = load_sp500_constituents()
+    heat = get_universe_data(list(constituents), sectors=constituents)
+
+    table = pa.Table.from_pandas(heat[HEATMAP_SCHEMA.names], schema=HEATMAP_SCHEMA, preserve_index=False)
+    meta = {
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+        "indices": json.dumps({sym: small[f"index:{sym}"] or {} for sym in index_symbols}, ensure_ascii=False),
+        "news": json.dumps(small["news"] or [], ensure_ascii=False),
+        "calendar": json.dumps(small["calendar"] or [], ensure_ascii=False),
+    }
+    return table.replace_schema_metadata(meta)
+
+def write_snapshot(table, path=SNAPSHOT_PATH):
+    # 임시 파일에 쓰고 os.replace 로 교체 — 읽는 쪽은 항상 완성된 파일만 본다
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+def snapshot_age(path=SNAPSHOT_PATH):
+    return time.time() - os.path.getmtime(path) if os.path.exists(path) else float("inf")
+
+def refresh_snapshot(path=SNAPSHOT_PATH, interval=SNAPSHOT_INTERVAL):
+    """
+    스냅샷이 interval 보다 오래됐으면 다시 만든다.
+    여러 워커가 동시에 돌아도 파일 락을 잡은 하나만 빌드한다.
+    """
+    if snapshot_age(path) < interval:
+        return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        with FileLock(f"{path}.lock", timeout=0):
+            if snapshot_age(path) < interval:  # 락을 기다리는 사이 다른 워커가 만들었을 수 있음
+                return False
+            write_snapshot(build_market_snapshot(), path)
+            return True
+    except Timeout:
+        return False
+
+
+# --- 읽기 ---
+_cached = {"mtime": None, "snapshot": None}
+_read_lock = threading.Lock()
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """
+    스냅샷을 메모리 맵으로 읽어 dict 로 돌려준다 (파일이 그대로면 이전 결과 재사용).
+    키: heatmap(DataFrame), indices, news, calendar, built_at. 파일이 없으면 None.
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _read_lock:
+        if _cached["mtime"] == mtime:
+            return _cached["snapshot"]
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+        meta = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+        snapshot = {
+            "heatmap": table.to_pandas(),
+            "indices": json.loads(meta.get("indices", "{}")),
+            "news": json.loads(meta.get("news", "[]")),
+            "calendar": pd.DataFrame(json.loads(meta.get("calendar", "[]"))),
+            "built_at": meta.get("built_at"),
+        }
+        _cached.update(mtime=mtime, snapshot=snapshot)
+        return snapshot
+
+
+# --- 스케줄러 ---
+_scheduler = None
+
+def _run_forever(interval):
+    while True:
+        try:
+            refresh_snapshot(interval=interval)
+        except Exception as e:
+            print(f"[snapshot] 빌드 실패: {e}")
+        try:
+            # 스크리너용 지표 테이블 (새 봉이 있을 때만 다시 계산)
+            if indicator_table_age() >= INDICATOR_REFRESH_SEC:
+                refresh_indicator_table(load_sp500_constituents())
+        except Exception as e:
+            print(f"[snapshot] 지표 테이블 갱신 실패: {e}")
+        time.sleep(max(5, interval / 4))
+
+def start_snapshot_scheduler(interval=SNAPSHOT_INTERVAL):
+    """프로세스당 한 번만 데몬 스레드를 띄운다."""
+    global _scheduler
+    if _scheduler is None or not _scheduler.is_alive():
+        _scheduler = threading.Thread(target=_run_forever, args=(interval,), daemon=True, name="market-snapshot")
+        _scheduler.start()
+    return _scheduler
+
+
+if __name__ == "__main__":
+    _run_forever(SNAPSHOT_INTERVAL)
@@ -0,0 +1,176 @@
+# utils/streaming_indicators.py — 상태를 유지하는 증분 지표 (새 봉 하나당 O(1) 갱신)
+#
+# indicators.py 의 배치 함수와 같은 정의를 따른다:
+#   SMA/BB = rolling(window).mean()/std(ddof=1), EMA = ewm(span, adjust=False),
+#   RSI = 상승/하락분의 단순 이동평균 (첫 봉의 변화량은 0 으로 취급)
+# 저장된 히스토리로 from_history() 워밍업 후, 장중 봉이 들어올 때마다 update() 만 호출하면 된다.
+import math
+from collections import deque
+
+NAN = float("nan")
+
+
+class _RollingWindow:
+    # 고정 길이 구간의 합/제곱합 (첫 값 기준으로 이동시켜 자릿수 손실 방지)
+    RESYNC_EVERY = 1000  # 누적 오차를 없애기 위해 주기적으로 구간을 다시 합산
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.shift = None
+        self.s1 = 0.0
+        self.s2 = 0.0
+        self._updates = 0
+
+    def push(self, x):
+        if self.shift is None:
+            self.shift = x
+        d = x - self.shift
+        self.values.append(d)
+        self.s1 += d
+        self.s2 += d * d
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            self.s1 -= old
+            self.s2 -= old * old
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self.s1 = sum(self.values)
+            self.s2 = sum(v * v for v in self.values)
+
+    @property
+    def full(self):
+        return len(self.values) == self.window
+
+    def mean(self):
+        return self.s1 / self.window + self.shift if self.full else NAN
+
+    def std(self):
+        if not self.full or self.window < 2:
+            return NAN
+        var = (self.s2 - self.s1 * self.s1 / self.window) / (self.window - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class _Streaming:
+    value = NAN
+
+    @classmethod
+    def from_history(cls, series, *args, **kwargs):
+        """저장된 히스토리(가격 시퀀스)로 상태를 채운 인스턴스를 만든다."""
+        ind = cls(*args, **kwargs)
+        for x in series:
+            ind.update(x)
+        return ind
+
+    def update(self, x):
+        if x is None or x != x:  # 결측 봉은 건너뛴다
+            return self.value
+        return self._update(float(x))
+
+
+class StreamingSMA(_Streaming):
+    def __init__(self, window):
+        self._win = _RollingWindow(window)
+
+    def _update(self, x):
+        self._win.push(x)
+        self.value = self._win.mean()
+        return self.value
+
+
+class StreamingEMA(_Streaming):
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+
+    def _update(self, x):
+        self.value = x if self.value != self.value else (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+
+class StreamingMACD(_Streaming):
+    # value = (macd, signal, hist)
+    value = (NAN, NAN, NAN)
+
+    def __init__(self, fast_period=12, slow_period=26, signal_period=9):
+        self.fast = StreamingEMA(fast_period)
+        self.slow = StreamingEMA(slow_period)
+        self.signal = StreamingEMA(signal_period)
+
+    def _update(self, x):
+        macd = self.fast.update(x) - self.slow.update(x)
+        signal = self.signal.update(macd)
+        self.value = (macd, signal, macd - signal)
+        return self.value
+
+
+class StreamingRSI(_Streaming):
+    def __init__(self, window=14):
+        self.prev = None
+        self.gain = _RollingWindow(window)
+        self.loss = _RollingWindow(window)
+
+    def _update(self, x):
+        delta = 0.0 if self.prev is None else x - self.prev
+        self.prev = x
+        self.gain.push(max(delta, 0.0))
+        self.loss.push(max(-delta, 0.0))
+        avg_gain, avg_loss = self.gain.mean(), self.loss.mean()
+        if avg_gain != avg_gain or avg_loss != avg_loss or (avg_gain == 0 and avg_loss == 0):
+            self.value = NAN
+        elif avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - 100 / (1 + avg_gain / avg_loss)
+        return self.value
+
+
+class StreamingBollinger(_Streaming):
+    # value = (upper, mid, lower)
+    value = (NAN, NAN, NAN)
+
+    def __init__(self, window=20, num_std=2):
+        self.num_std = num_std
+        self._win = _RollingWindow(window)
+        self.last = NAN
+
+    def _update(self, x):
+        self._win.push(x)
+        self.last = x
+        mid, std = self._win.mean(), self._win.std()
+        self.value = (mid + std * self.num_std, mid, mid - std * self.num_std)
+        return self.value
+
+    @property
+    def position(self):
+        upper, _, lower = self.value
+        if upper != upper or upper == lower:
+            return NAN
+        return (self.last - lower) / (upper - lower)
+
+
+class StreamingIndicators(_Streaming):
+    """calculate_indicators 와 같은 키의 dict 를 봉마다 O(1) 로 갱신한다."""
+
+    def __init__(self):
+        self.rsi = StreamingRSI()
+        self.macd = StreamingMACD()
+        self.bb = StreamingBollinger()
+        self.sma50 = StreamingSMA(50)
+        self.sma200 = StreamingSMA(200)
+        self.value = None
+
+    def _update(self, x):
+        rsi = self.rsi.update(x)
+        macd, signal, hist = self.macd.update(x)
+        self.bb.update(x)
+        sma50, sma200 = self.sma50.update(x), self.sma200.update(x)
+        self.value = {
+            "RSI": rsi,
+            "MACD": macd,
+            "MACD_signal": signal,
+            "MACD_hist": hist,
+            "BB_Position": self.bb.position,
+            "GoldenCross": sma50 > sma200 if sma50 == sma50 and sma200 == sma200 else False,
+        }
+        return self.value